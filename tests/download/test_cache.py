@@ -0,0 +1,88 @@
+import unittest
+import os
+import tempfile
+from tulit.download.cache import HTTPCache
+from tulit.download.cellar import CellarDownloader
+from tulit.download.extract import MemberFilter
+from tulit.download.standin import StandInServer
+
+
+class TestHTTPCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = StandInServer(documents={'abc.0006.04/DOC_1': b'<FMX/>'}, etags={'abc.0006.04/DOC_1': '"v1"'}).start()
+
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+        self.downloader = CellarDownloader(download_dir=os.path.join(self.tmp.name, 'data'), log_dir=os.path.join(self.tmp.name, 'logs'), cache_dir=self.cache_dir)
+        self.server.configure(self.downloader)
+
+    def tearDown(self):
+        self.downloader.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def validators(self):
+        # If-None-Match header of each request received by the server
+        return [headers.get('If-None-Match') for headers in self.server.history]
+
+    def test_conditional_headers(self):
+        cache = HTTPCache(self.cache_dir)
+        self.assertEqual(cache.conditional_headers('http://example.com/doc'), {})
+
+    def test_not_modified(self):
+        path = self.downloader.download_item('abc.0006.04/DOC_1')
+        self.assertTrue(path.endswith('DOC_1.xml'))
+        mtime = os.stat(path).st_mtime_ns
+
+        # The second request is conditional and the file is left untouched
+        self.assertEqual(self.downloader.download_item('abc.0006.04/DOC_1'), path)
+        self.assertEqual(self.validators(), [None, '"v1"'])
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+    def test_unchanged_content_is_not_rewritten(self):
+        path = self.downloader.download_item('abc.0006.04/DOC_1')
+        mtime = os.stat(path).st_mtime_ns
+
+        # New validators, same content
+        self.server.etags['abc.0006.04/DOC_1'] = '"v2"'
+        self.assertEqual(self.downloader.download_item('abc.0006.04/DOC_1'), path)
+        self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+
+        self.server.etags['abc.0006.04/DOC_1'] = '"v3"'
+        self.server.documents['abc.0006.04/DOC_1'] = b'<FMX>amended</FMX>'
+        self.downloader.download_item('abc.0006.04/DOC_1')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'<FMX>amended</FMX>')
+
+    def test_zip_filter_change(self):
+        self.server.documents['abc.0006.04/DOC_1'] = {'DOC_1.fmx.xml': b'<ACT/>', 'DOC_1.pdf': b'pdf'}
+
+        self.downloader.zip_filter = MemberFilter('*.xml')
+        path = self.downloader.download_item('abc.0006.04/DOC_1')
+        self.assertEqual(os.listdir(path), ['DOC_1.fmx.xml'])
+        self.assertEqual(self.downloader.download_item('abc.0006.04/DOC_1'), path)
+
+        # Another filter needs the archive again, even if it did not change
+        self.downloader.zip_filter = None
+        self.assertEqual(self.downloader.download_item('abc.0006.04/DOC_1'), path)
+        self.assertEqual(sorted(os.listdir(path)), ['DOC_1.fmx.xml', 'DOC_1.pdf'])
+        self.assertEqual(self.validators(), [None, '"v1"', None])
+
+        # The content did not change, but the folder is extracted again with the new filter
+        self.downloader.zip_filter = MemberFilter('*.xml')
+        self.assertEqual(self.downloader.download_item('abc.0006.04/DOC_1'), path)
+        self.assertEqual(os.listdir(path), ['DOC_1.fmx.xml'])
+        self.assertEqual(self.validators()[-1], None)
+
+    def test_offline(self):
+        path = self.downloader.download_item('abc.0006.04/DOC_1')
+
+        offline = CellarDownloader(download_dir=os.path.join(self.tmp.name, 'data'), log_dir=os.path.join(self.tmp.name, 'logs'), cache_dir=self.cache_dir, offline=True)
+        offline.endpoint = self.downloader.endpoint
+        self.assertEqual(offline.download_item('abc.0006.04/DOC_1'), path)
+        self.assertIsNone(offline.download_item('abc.0006.04/DOC_2'))
+        self.assertEqual(self.server.stats['requests'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
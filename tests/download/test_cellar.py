@@ -1,10 +1,13 @@
 import unittest
 import json
 from tulit.download.cellar import CellarDownloader
+from tulit.download.standin import StandInServer
+from tulit.download.throttle import RetryPolicy
 import os
 from unittest.mock import patch, Mock
 import requests
 import io
+import tempfile
 
 class TestCellarDownloader(unittest.TestCase):
     def setUp(self):
@@ -46,7 +49,7 @@ class TestCellarDownloader(unittest.TestCase):
         actual_url = self.downloader.build_request_url(params)
         self.assertEqual(actual_url, expected_url)
     
-    @patch('tulit.download.download.requests.request')
+    @patch('tulit.download.download.requests.Session.request')
     def test_fetch_content(self, mock_request):
         mock_response = Mock()
         mock_response.status_code = 200
@@ -63,22 +66,93 @@ class TestCellarDownloader(unittest.TestCase):
             'Content-Type': "application/x-www-form-urlencoded",
             'Host': "publications.europa.eu"
         }
-        mock_request.assert_called_once_with("GET", url, headers=headers)
+        mock_request.assert_called_once_with("GET", url, headers=headers, stream=True, timeout=self.downloader.timeout)
 
         # Check that the response is as expected
         self.assertEqual(response, mock_response)
 
-    @patch('tulit.download.download.requests.request')
+    @patch('tulit.download.download.requests.Session.request')
     def test_fetch_content_request_exception(self, mock_request):
         # Mock request to raise a RequestException
         mock_request.side_effect = requests.RequestException("Error sending GET request")
 
         url = 'http://publications.europa.eu/resource/cellar/e115172d-3ab3-4b14-b0a4-dfdcc9871793.0006.04/DOC_1'
-        response = self.downloader.fetch_content(url)
+        # The error is raised for download_item to tell missing items from failed requests
+        with self.assertRaises(requests.RequestException):
+            self.downloader.fetch_content(url)
+
+
+    @patch('tulit.download.cellar.CellarDownloader.handle_response')
+    @patch('tulit.download.cellar.CellarDownloader.fetch_content')
+    def test_download_concurrent(self, mock_fetch_content, mock_handle_response):
+        mock_fetch_content.side_effect = lambda url: Mock(url=url)
+        mock_handle_response.side_effect = lambda response, filename: None if filename.endswith('DOC_3') else f"{filename}.xml"
+
+        bindings = [
+            {'cellarURIs': {'value': f'http://publications.europa.eu/resource/cellar/abc.0006.04/DOC_{i}'}, 'format': {'value': 'fmx4'}}
+            for i in [1, 2, 3, 2, 4]
+        ]
+        downloader = CellarDownloader(download_dir='./tests/data', log_dir='./tests/logs', max_per_host=2)
+        document_paths = downloader.download({'results': {'bindings': bindings}}, format='fmx4', max_workers=4)
+
+        # Duplicates are fetched once, failures are None and the order of the results is kept
+        self.assertEqual(mock_fetch_content.call_count, 4)
+        self.assertEqual(document_paths, ['abc.0006.04/DOC_1.xml', 'abc.0006.04/DOC_2.xml', None, 'abc.0006.04/DOC_2.xml', 'abc.0006.04/DOC_4.xml'])
+
+    @patch('tulit.download.cellar.CellarDownloader.handle_response')
+    @patch('tulit.download.cellar.CellarDownloader.fetch_content')
+    def test_download_resumable_job(self, mock_fetch_content, mock_handle_response):
+        with tempfile.TemporaryDirectory() as tmp:
+            def handle_response(response, filename):
+                if filename.endswith('DOC_2'):
+                    raise requests.ConnectionError('connection reset')
+                path = os.path.join(tmp, f"{filename.replace('/', '_')}.xml")
+                open(path, 'w').close()
+                return path
+            mock_fetch_content.side_effect = lambda url: Mock(url=url)
+            mock_handle_response.side_effect = handle_response
+
+            bindings = [
+                {'cellarURIs': {'value': f'http://publications.europa.eu/resource/cellar/abc.0006.04/DOC_{i}'}, 'format': {'value': 'fmx4'}}
+                for i in [1, 2, 3]
+            ]
+            downloader = CellarDownloader(download_dir=tmp, log_dir=os.path.join(tmp, 'logs'))
+            document_paths = downloader.download({'results': {'bindings': bindings}}, format='fmx4', job='batch')
+            self.assertEqual(len(document_paths), 3)
+            self.assertIsNone(document_paths[1])
+
+            status = downloader.job_status('batch')
+            self.assertEqual((status['done'], status['failed']), (2, 1))
+            self.assertEqual(status['errors'][0][0], 'abc.0006.04/DOC_2')
+
+            # Resuming the job only retries the failed document
+            mock_fetch_content.reset_mock()
+            mock_handle_response.side_effect = lambda response, filename: handle_response(response, 'retried')
+            document_paths = downloader.download({'results': {'bindings': bindings}}, format='fmx4', job='batch')
+            self.assertEqual(mock_fetch_content.call_count, 1)
+            self.assertNotIn(None, document_paths)
+            self.assertEqual(downloader.job_status('batch')['progress'], 1.0)
+            downloader.close()
+
+    def test_download_item_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with StandInServer(documents={'abc.0006.04/DOC_1': b'<ACT/>'}) as server:
+                downloader = CellarDownloader(download_dir=tmp, log_dir=os.path.join(tmp, 'logs'), retry=RetryPolicy(max_retries=1, backoff_factor=0.01))
+                server.configure(downloader)
+                # A missing item is not an error of the download
+                self.assertIsNone(downloader.download_item('abc.0006.04/DOC_2'))
+                self.assertTrue(downloader.download_item('abc.0006.04/DOC_1').endswith('DOC_1.xml'))
 
-        # Check that the response is None when an exception is raised
-        self.assertIsNone(response)
+            with StandInServer(error_rate=1.0, error_status=500) as server:
+                server.configure(downloader)
+                with self.assertRaises(requests.HTTPError):
+                    downloader.download_item('abc.0006.04/DOC_1')
 
+                # The errors of the requests are recorded with their message
+                errors = {}
+                downloader.download_items(downloader.download_item, ['abc.0006.04/DOC_1'], errors=errors)
+                self.assertIn('500 Server Error', errors['abc.0006.04/DOC_1'])
+            downloader.close()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,13 @@
 import unittest
 from unittest.mock import patch, Mock
 import os
+import io
+import time
+import zipfile
+import tempfile
+import threading
 from tulit.download.download import DocumentDownloader
+from tulit.download.standin import StandInServer
 
 
 class TestDocumentDownloader(unittest.TestCase):
@@ -21,46 +27,134 @@ class TestDocumentDownloader(unittest.TestCase):
             actual_extension = self.downloader.get_extension_from_content_type(content_type)
             self.assertEqual(actual_extension, expected_extension)
 
-    @patch('tulit.download.download.zipfile.ZipFile')
-    def test_extract_zip(self, mock_zipfile):
-        # Mock zipfile object
-        mock_zip = Mock()
-        mock_zipfile.return_value = mock_zip
+    def test_extract_zip(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.writestr('L_202400903EN.000101.fmx.xml', '<ACT/>')
+            z.writestr('L_202400903EN.doc.fmx.xml', '<DOC/>')
 
+        # The archive is streamed in chunks instead of being read from response.content
         response = Mock()
-        response.content = b'fake zip content'
+        response.headers = {'Content-Length': str(len(archive.getvalue()))}
+        data = archive.getvalue()
+        response.iter_content.return_value = [data[i:i + 100] for i in range(0, len(data), 100)]
+        progress = []
 
-        folder_path = './downloads/test_folder'
-        self.downloader.extract_zip(response, folder_path)
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = DocumentDownloader(download_dir=tmp, log_dir=os.path.join(tmp, 'logs'), chunk_size=100,
+                                            progress_callback=lambda name, done, total: progress.append((done, total)))
+            folder_path = os.path.join(tmp, 'test_folder')
+            downloader.extract_zip(response, folder_path)
 
-        # Check that the zipfile was opened and extracted
-        args, kwargs = mock_zipfile.call_args
-        self.assertEqual(args[0].getvalue(), response.content)
-        mock_zip.extractall.assert_called_once_with(folder_path)
+            self.assertEqual(sorted(os.listdir(folder_path)), ['L_202400903EN.000101.fmx.xml', 'L_202400903EN.doc.fmx.xml'])
+            self.assertEqual(sorted(os.listdir(tmp)), ['logs', 'test_folder'])
+
+        response.iter_content.assert_called_once_with(chunk_size=100)
+        response.close.assert_called_once()
+        self.assertEqual(progress[-1], (len(data), len(data)))
     
     @patch('tulit.download.download.DocumentDownloader.extract_zip')
-    @patch('tulit.download.download.os.makedirs')
-    def test_handle_response(self, mock_makedirs, mock_extract_zip):
+    def test_handle_response(self, mock_extract_zip):
         # Mock response object
         response = Mock()
         response.headers = {'Content-Type': 'application/zip'}
-        response.content = b'fake zip content'
+        response.iter_content.return_value = [b'fake xml ', b'content']
+
+        def extract_zip(response, folder_path):
+            with open(os.path.join(folder_path, 'DOC_1.fmx.xml'), 'wb') as f:
+                f.write(b'<ACT/>')
+            return 'hash'
+        mock_extract_zip.side_effect = extract_zip
+
+        with tempfile.TemporaryDirectory() as download_dir:
+            downloader = DocumentDownloader(download_dir=download_dir, log_dir=os.path.join(download_dir, 'logs'))
+            cellar_id = 'e115172d-3ab3-4b14-b0a4-dfdcc9871793.0006.04/DOC_1'
+            target_path = os.path.join(download_dir, cellar_id)
+
+            # Test handling zip content: the archive is extracted in a temporary folder, then moved in place
+            result = downloader.handle_response(response, cellar_id)
+            self.assertEqual(mock_extract_zip.call_args[0][0], response)
+            self.assertNotEqual(mock_extract_zip.call_args[0][1], target_path)
+            self.assertEqual(result, target_path)
+            self.assertEqual(os.listdir(target_path), ['DOC_1.fmx.xml'])
+
+            # Extracting again replaces the folder
+            result = downloader.handle_response(response, cellar_id)
+            self.assertEqual(os.listdir(os.path.dirname(target_path)), ['DOC_1'])
+
+            # Test handling non-zip content
+            response.headers = {'Content-Type': 'application/xml'}
+            mock_extract_zip.reset_mock()
+            result = downloader.handle_response(response, cellar_id)
+            expected_file_path = os.path.normpath(f"{target_path}.xml")
+            self.assertEqual(os.path.normpath(result), expected_file_path)
+            with open(result, 'rb') as f:
+                self.assertEqual(f.read(), b'fake xml content')
+            self.assertEqual(sorted(os.listdir(os.path.dirname(target_path))), ['DOC_1', 'DOC_1.xml'])
+
+    def test_handle_response_corrupt_zip(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as z:
+            z.writestr('DOC_1.fmx.xml', '<ACT/>')
+
+        def response(body):
+            response = Mock()
+            response.headers = {'Content-Type': 'application/zip'}
+            response.iter_content.return_value = [body]
+            return response
+
+        with tempfile.TemporaryDirectory() as download_dir:
+            downloader = DocumentDownloader(download_dir=download_dir, log_dir=os.path.join(download_dir, 'logs'))
+            target_path = downloader.handle_response(response(archive.getvalue()), 'abc.0006.04/DOC_1')
+            self.assertEqual(os.listdir(target_path), ['DOC_1.fmx.xml'])
+
+            # A corrupt archive fails, and leaves the folder extracted before in place
+            corrupt = response(b'not a zip file')
+            self.assertIsNone(downloader.handle_response(corrupt, 'abc.0006.04/DOC_1'))
+            corrupt.close.assert_called()
+            self.assertEqual(os.listdir(target_path), ['DOC_1.fmx.xml'])
+            self.assertEqual(os.listdir(os.path.dirname(target_path)), ['DOC_1'])
+
+    def test_map_concurrent(self):
+        items = list(range(20))
+        self.assertEqual(self.downloader.map_concurrent(lambda x: x * 2, items, max_workers=4), [x * 2 for x in items])
+        self.assertEqual(self.downloader.map_concurrent(lambda x: x * 2, items), [x * 2 for x in items])
+
+    def test_host_slot(self):
+        downloader = DocumentDownloader(download_dir='./tests/data', log_dir='./tests/logs', max_per_host=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work(url):
+            with downloader.host_slot(url):
+                with lock:
+                    active.append(url)
+                    peak.append(len(active))
+                time.sleep(0.01)
+                with lock:
+                    active.remove(url)
 
-        cellar_id = 'e115172d-3ab3-4b14-b0a4-dfdcc9871793.0006.04\\DOC_1'
-        target_path = os.path.join(self.downloader.download_dir, cellar_id)
+        downloader.map_concurrent(work, ['http://publications.europa.eu/resource/cellar/a'] * 8, max_workers=8)
+        self.assertLessEqual(max(peak), 2)
 
-        # Test handling zip content
-        result = self.downloader.handle_response(response, cellar_id)
-        mock_extract_zip.assert_called_once_with(response, target_path)
-        self.assertEqual(result, target_path)
+    def test_session_pool(self):
+        downloader = DocumentDownloader(download_dir='./tests/data', log_dir='./tests/logs', pool_size=4, timeout=5)
+        adapter = downloader.session.get_adapter('https://publications.europa.eu')
+        self.assertEqual(adapter._pool_maxsize, 4)
 
-        # Test handling non-zip content
-        response.headers = {'Content-Type': 'application/xml'}
-        mock_extract_zip.reset_mock()
-        result = self.downloader.handle_response(response, cellar_id)
-        expected_file_path = os.path.normpath(f"{target_path}.xml")
-        self.assertEqual(os.path.normpath(result), expected_file_path)
+        # A session can be shared between downloaders
+        other = DocumentDownloader(download_dir='./tests/data', log_dir='./tests/logs', session=downloader.session)
+        self.assertIs(other.session, downloader.session)
+        downloader.close()
 
+    def test_connection_stats(self):
+        with StandInServer(documents={'doc': b'<akomaNtoso/>'}) as server:
+            with DocumentDownloader(download_dir='./tests/data', log_dir='./tests/logs') as downloader:
+                url = f"{server.cellar_endpoint}doc"
+                for _ in range(3):
+                    self.assertEqual(downloader.request('GET', url).status_code, 200)
+                self.assertEqual(downloader.connection_stats(), {'requests': 3, 'connections': 1, 'reused': 2})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+import unittest
+import os
+import zipfile
+import tempfile
+from unittest.mock import Mock
+from tulit.download.download import DocumentDownloader
+from tulit.download.extract import MemberFilter, extract_members
+
+MEMBERS = {
+    'L_1.fmx.xml': b'<ACT>' + b'a' * 100 + b'</ACT>',
+    'L_1.doc.fmx.xml': b'<DOC/>',
+    'L_1.pdf': b'%PDF' + b'0' * 50,
+    'images/L_1.png': b'\x89PNG' + b'1' * 20,
+}
+
+
+class TestExtract(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.tmp.name, 'archive.zip')
+        with zipfile.ZipFile(self.zip_path, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name, content in MEMBERS.items():
+                z.writestr(name, content)
+        self.folder = os.path.join(self.tmp.name, 'out')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _extracted(self):
+        return sorted(os.path.relpath(os.path.join(root, f), self.folder) for root, _, files in os.walk(self.folder) for f in files)
+
+    def test_extract_all(self):
+        report = extract_members(self.zip_path, self.folder)
+        self.assertEqual(report['extracted'], 4)
+        self.assertEqual(report['extracted_bytes'], sum(len(content) for content in MEMBERS.values()))
+        self.assertEqual(self._extracted(), sorted(MEMBERS))
+
+    def test_patterns(self):
+        report = extract_members(self.zip_path, self.folder, MemberFilter('*.fmx.xml', predicate=lambda info: not info.filename.endswith('.doc.fmx.xml')))
+        self.assertEqual(self._extracted(), ['L_1.fmx.xml'])
+        self.assertEqual((report['extracted'], report['skipped']), (1, 3))
+        self.assertEqual(report['skipped_bytes'], sum(len(MEMBERS[name]) for name in MEMBERS if name != 'L_1.fmx.xml'))
+        self.assertIn(('L_1.pdf', 'filtered'), report['skipped_members'])
+
+    def test_content_types(self):
+        extract_members(self.zip_path, self.folder, MemberFilter(content_types=['application/pdf', 'image/png']))
+        self.assertEqual(self._extracted(), ['L_1.pdf', os.path.join('images', 'L_1.png')])
+
+    def test_limits(self):
+        report = extract_members(self.zip_path, self.folder, MemberFilter(max_member_size=60))
+        self.assertIn(('L_1.fmx.xml', 'too large'), report['skipped_members'])
+
+        report = extract_members(self.zip_path, os.path.join(self.tmp.name, 'ratio'), MemberFilter(max_ratio=2))
+        self.assertIn(('L_1.fmx.xml', 'compression ratio'), report['skipped_members'])
+
+        report = extract_members(self.zip_path, os.path.join(self.tmp.name, 'total'), MemberFilter(max_total_size=115))
+        self.assertEqual(report['extracted_bytes'], len(MEMBERS['L_1.fmx.xml']))
+        self.assertEqual(report['skipped_members'][0][1], 'total size limit')
+
+    def test_unsafe_path(self):
+        with zipfile.ZipFile(self.zip_path, 'a') as z:
+            z.writestr('../evil.xml', b'<EVIL/>')
+        report = extract_members(self.zip_path, self.folder)
+        self.assertIn(('../evil.xml', 'unsafe path'), report['skipped_members'])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'evil.xml')))
+
+    def test_downloader(self):
+        with open(self.zip_path, 'rb') as f:
+            archive = f.read()
+        response = Mock()
+        response.headers = {'Content-Type': 'application/zip'}
+        response.iter_content.return_value = [archive]
+        downloader = DocumentDownloader(download_dir=self.tmp.name, log_dir=os.path.join(self.tmp.name, 'logs'), zip_filter=MemberFilter('*.fmx.xml'))
+
+        path = downloader.handle_response(response, 'abc.0006.04/DOC_1')
+        self.assertEqual(sorted(os.listdir(path)), ['L_1.doc.fmx.xml', 'L_1.fmx.xml'])
+        self.assertEqual(downloader.extraction_stats['extracted'], 2)
+        self.assertEqual(downloader.extraction_stats['skipped_bytes'], len(MEMBERS['L_1.pdf']) + len(MEMBERS['images/L_1.png']))
+        downloader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
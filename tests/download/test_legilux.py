@@ -0,0 +1,55 @@
+import unittest
+import os
+import tempfile
+from tulit.download.legilux import LegiluxDownloader
+from tulit.download.standin import StandInServer
+
+
+class TestLegiluxDownloader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queries = []
+        acts = {f"eli/etat/leg/loi/2006/07/31/n{i}/jo": b'<act/>' for i in (1, 2)}
+        self.server = StandInServer(legilux_acts=acts, sparql_results=self.results).start()
+        self.base = self.server.legilux_endpoint
+        self.downloader = LegiluxDownloader(download_dir=self.tmp.name, log_dir=os.path.join(self.tmp.name, 'logs'))
+        self.server.configure(self.downloader)
+
+    def tearDown(self):
+        self.downloader.close()
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def results(self, query):
+        self.queries.append(query)
+        bindings = [{'act': {'type': 'uri', 'value': f"{self.base}eli/etat/leg/loi/2006/07/31/n{i}/jo"}} for i in (1, 2)]
+        return {'head': {'vars': ['act']}, 'results': {'bindings': bindings}}
+
+    def test_eli_filename(self):
+        self.assertEqual(LegiluxDownloader.eli_filename('http://data.legilux.public.lu/eli/etat/leg/loi/2006/07/31/n2/jo'), '2006_07_31_n2_jo')
+        self.assertEqual(LegiluxDownloader.eli_filename('http://data.legilux.public.lu/eli/etat/leg/rgd/2010/01/05/n1/jo'), 'etat_leg_rgd_2010_01_05_n1_jo')
+
+    def test_download(self):
+        paths = self.downloader.download(f"{self.base}eli/etat/leg/loi/2006/07/31/n2/jo")
+        self.assertEqual(paths, [os.path.join(self.tmp.name, '2006_07_31_n2_jo.xml')])
+        self.assertIsNone(self.downloader.download(f"{self.base}eli/etat/leg/loi/2006/07/31/n404/jo"))
+
+    def test_download_many(self):
+        open(os.path.join(self.tmp.name, '2006_07_31_n1_jo.xml'), 'w').close()
+        elis = [f"{self.base}eli/etat/leg/loi/2006/07/31/n{i}/jo" for i in (1, 2, 404, 2)]
+
+        records = self.downloader.download_many(elis, max_workers=4)
+        self.assertEqual([record['status'] for record in records], ['skipped', 'downloaded', 'failed'])
+        self.assertTrue(os.path.exists(records[1]['path']))
+        self.assertIn('404', records[2]['error'])
+
+    def test_enumerate(self):
+        records = self.downloader.download_many(start_year=2006, max_workers=2, job='2006')
+        self.assertEqual([record['status'] for record in records], ['downloaded', 'downloaded'])
+        self.assertIn('YEAR(?date) >= 2006 && YEAR(?date) <= 2006', self.queries[0])
+        self.assertIn('resource-type/LOI>', self.queries[0])
+        self.assertEqual(self.downloader.job_status('2006')['done'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import tempfile
+from tulit.download.manifest import JobManifest
+
+
+class TestJobManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'logs', 'jobs.sqlite')
+        self.manifest = JobManifest(self.path, 'job')
+        self.manifest.register(['a', 'b', 'c'])
+
+    def tearDown(self):
+        self.manifest.close()
+        self.tmp.cleanup()
+
+    def test_register(self):
+        self.assertEqual(self.manifest.get('a'), {'item': 'a', 'state': 'pending', 'path': None, 'attempts': 0, 'error': None})
+        self.assertIsNone(self.manifest.get('d'))
+
+        # Registering again does not reset the state of the items
+        self.manifest.fail('a', 'timeout')
+        self.manifest.register(['a', 'd'])
+        self.assertEqual(self.manifest.get('a')['state'], 'failed')
+        self.assertEqual(self.manifest.status()['total'], 4)
+
+    def test_status(self):
+        document = os.path.join(self.tmp.name, 'a.xml')
+        open(document, 'w').close()
+        self.manifest.complete('a', document)
+        self.manifest.fail('b', 'timeout')
+
+        status = self.manifest.status()
+        self.assertEqual((status['pending'], status['done'], status['failed'], status['total']), (1, 1, 1, 3))
+        self.assertAlmostEqual(status['progress'], 1 / 3)
+        self.assertEqual(status['errors'], [('b', 'timeout')])
+        self.assertEqual(self.manifest.completed(), {'a': document})
+
+    def test_durable(self):
+        document = os.path.join(self.tmp.name, 'a.xml')
+        open(document, 'w').close()
+        self.manifest.complete('a', document)
+        self.manifest.close()
+
+        # The state survives the manifest being reopened, and jobs are kept apart
+        self.manifest = JobManifest(self.path, 'job')
+        self.assertEqual(self.manifest.get('a')['attempts'], 1)
+        self.assertEqual(self.manifest.completed(), {'a': document})
+        other = JobManifest(self.path, 'other')
+        self.assertEqual(other.status()['total'], 0)
+        other.close()
+
+    def test_missing_document_is_not_completed(self):
+        self.manifest.complete('a', os.path.join(self.tmp.name, 'deleted.xml'))
+        self.assertEqual(self.manifest.completed(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,7 @@
 import unittest
+import os
+import tempfile
+from datetime import datetime
 
 from unittest.mock import patch, Mock
 from tulit.download.normattiva import NormattivaDownloader
@@ -7,7 +10,7 @@ class TestNormattivaDownloader(unittest.TestCase):
     def setUp(self):
         self.downloader = NormattivaDownloader(download_dir='./tests/data/akn/italy', log_dir='./tests/logs')
     
-    @patch('tulit.download.normattiva.requests.get')
+    @patch('tulit.download.download.requests.Session.request')
     def test_build_request_url(self, mock_get):
         params = {
             'dataGU': '20210101',
@@ -21,9 +24,10 @@ class TestNormattivaDownloader(unittest.TestCase):
         self.assertEqual(uri, expected_uri)
         self.assertEqual(url, expected_url)
     
-    @patch('tulit.download.normattiva.requests.get')
+    @patch('tulit.download.download.requests.Session.request')
     def test_fetch_content(self, mock_get):
         mock_response = Mock()
+        mock_response.status_code = 200
         mock_response.raise_for_status = Mock()
         mock_response.cookies = {'cookie_key': 'cookie_value'}
         mock_get.return_value = mock_response
@@ -34,10 +38,11 @@ class TestNormattivaDownloader(unittest.TestCase):
         response = self.downloader.fetch_content(uri, url)
         self.assertEqual(response, mock_response)
     
-    @patch('tulit.download.normattiva.requests.get')
+    @patch('tulit.download.download.requests.Session.request')
     @patch('tulit.download.normattiva.NormattivaDownloader.handle_response')
     def test_download(self, mock_handle_response, mock_get):
         mock_response = Mock()
+        mock_response.status_code = 200
         mock_response.raise_for_status = Mock()
         mock_response.headers = {'Content-Type': 'application/xml'}
         mock_get.return_value = mock_response
@@ -47,6 +52,100 @@ class TestNormattivaDownloader(unittest.TestCase):
         expected_paths = ['./tests/data/akn/italy/20210101_12345_VIGENZA_20211231.xml']
         self.assertEqual(document_paths, expected_paths)
 
+    @patch('tulit.download.download.requests.Session.request')
+    def test_cookies_reused(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, headers={'Content-Type': 'application/xml'}, cookies={'JSESSIONID': '1'})
+        uri = "https://www.normattiva.it/eli/id/2021/01/01//12345/CONSOLIDATED"
+        url = "https://www.normattiva.it/do/atto/caricaAKN?dataGU=20210101&codiceRedaz=12345&dataVigenza=20211231"
+
+        for _ in range(3):
+            self.downloader.fetch_content(uri, url)
+        # One request for the cookies, then one request per document
+        self.assertEqual([call.args[1] for call in mock_get.call_args_list], [uri, url, url, url])
+
+    @patch('tulit.download.download.requests.Session.request')
+    def test_cookies_refreshed(self, mock_get):
+        ok = Mock(status_code=200, headers={'Content-Type': 'application/xml'}, cookies={'JSESSIONID': '1'})
+        rejected = Mock(status_code=403, headers={'Content-Type': 'text/html'}, cookies={})
+        mock_get.side_effect = [ok, ok, ok, rejected, ok, ok]
+        uri = "https://www.normattiva.it/eli/id/2021/01/01//12345/CONSOLIDATED"
+        url = "https://www.normattiva.it/do/atto/caricaAKN?dataGU=20210101&codiceRedaz=12345&dataVigenza=20211231"
+
+        self.downloader.fetch_content(uri, url)
+        self.downloader.fetch_content(uri, url)
+        # The server rejects the cookies: they are fetched again and the document is requested again
+        response = self.downloader.fetch_content(uri, url)
+        self.assertEqual(response, ok)
+        self.assertEqual([call.args[1] for call in mock_get.call_args_list], [uri, url, url, url, uri, url])
+
+    @patch('tulit.download.download.requests.Session.request')
+    def test_cookies_expired(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, headers={'Content-Type': 'application/xml'}, cookies={'JSESSIONID': '1'})
+        self.downloader.cookie_ttl = 0
+        uri = "https://www.normattiva.it/eli/id/2021/01/01//12345/CONSOLIDATED"
+        url = "https://www.normattiva.it/do/atto/caricaAKN?dataGU=20210101&codiceRedaz=12345&dataVigenza=20211231"
+
+        self.downloader.fetch_content(uri, url)
+        self.downloader.fetch_content(uri, url)
+        self.assertEqual([call.args[1] for call in mock_get.call_args_list], [uri, url, uri, url])
+
+    @patch('tulit.download.download.requests.Session.request')
+    def test_unknown_act(self, mock_get):
+        ok = Mock(status_code=200, headers={'Content-Type': 'application/xml'}, cookies={'JSESSIONID': '1'})
+        html = Mock(status_code=200, headers={'Content-Type': 'text/html'}, cookies={})
+        mock_get.side_effect = [ok, ok, html, html, ok, html]
+        uri = "https://www.normattiva.it/eli/id/2021/01/01//12345/CONSOLIDATED"
+        url = "https://www.normattiva.it/do/atto/caricaAKN?dataGU=20210101&codiceRedaz=12345&dataVigenza=20211231"
+
+        self.downloader.fetch_content(uri, url)
+        # Recent cookies are kept: the HTML page is the answer for an unknown act
+        self.assertEqual(self.downloader.fetch_content(uri, url), html)
+        self.assertEqual([call.args[1] for call in mock_get.call_args_list], [uri, url, url])
+
+        # Older cookies are refreshed on an HTML answer
+        self.downloader.stale_cookie_age = 0
+        self.assertEqual(self.downloader.fetch_content(uri, url), html)
+        self.assertEqual([call.args[1] for call in mock_get.call_args_list], [uri, url, url, url, uri, url])
+
+    @patch('tulit.download.normattiva.NormattivaDownloader.fetch_content')
+    def test_download_default_date(self, mock_fetch_content):
+        mock_fetch_content.return_value = None
+        self.assertIsNone(self.downloader.download(dataGU='20210101', codiceRedaz='12345'))
+        # The default dataVigenza is the day of the call
+        self.assertIn(f"dataVigenza={datetime.today().strftime('%Y%m%d')}", mock_fetch_content.call_args.args[1])
+
+    @patch('tulit.download.normattiva.NormattivaDownloader.handle_response')
+    @patch('tulit.download.normattiva.NormattivaDownloader.fetch_content')
+    def test_download_many(self, mock_fetch_content, mock_handle_response):
+        with tempfile.TemporaryDirectory() as tmp:
+            downloader = NormattivaDownloader(download_dir=tmp, log_dir=os.path.join(tmp, 'logs'), max_per_host=2)
+            # A snapshot already on disk
+            open(os.path.join(tmp, '20210101_12345_VIGENZA_20200101.xml'), 'w').close()
+
+            def fetch_content(uri, url):
+                if 'codiceRedaz=99999' in url:
+                    return Mock(headers={'Content-Type': 'text/html'})
+                return Mock(headers={'Content-Type': 'application/xml'})
+            mock_fetch_content.side_effect = fetch_content
+            mock_handle_response.side_effect = lambda response, filename: os.path.join(tmp, f"{filename}.xml")
+
+            csv_path = os.path.join(tmp, 'acts.csv')
+            with open(csv_path, 'w') as f:
+                f.write("dataGU,codiceRedaz,dataVigenza\n20210101,12345,20200101;20211231\n20220202,99999,\n20210101,12345,20211231\n")
+            acts = downloader.read_acts(csv_path)
+            self.assertEqual(acts[0], {'dataGU': '20210101', 'codiceRedaz': '12345', 'dataVigenza': ['20200101', '20211231']})
+
+            records = downloader.download_many(csv_path, dataVigenza='20230101', max_workers=4)
+            self.assertEqual(
+                [(record['codiceRedaz'], record['dataVigenza'], record['status']) for record in records],
+                [('12345', '20200101', 'skipped'), ('12345', '20211231', 'downloaded'), ('99999', '20230101', 'failed')]
+            )
+            self.assertEqual(records[1]['path'], os.path.join(tmp, '20210101_12345_VIGENZA_20211231.xml'))
+            self.assertIsNotNone(records[2]['error'])
+            self.assertEqual(mock_fetch_content.call_count, 2)
+            downloader.close()
+
+
 if __name__ == "__main__":
     unittest.main()
 
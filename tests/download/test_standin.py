@@ -0,0 +1,109 @@
+import unittest
+import os
+import time
+import tempfile
+from tulit.download.cellar import CellarDownloader
+from tulit.download.normattiva import NormattivaDownloader
+from tulit.download.replay import RecordReplayAdapter
+from tulit.download.standin import StandInServer
+from tulit.download.throttle import RetryPolicy
+from tulit.sparql import get_results_table
+
+DOCUMENTS = {
+    'abc.0006.04/DOC_1': b'<ACT>single</ACT>',
+    'abc.0006.04/DOC_2': {'L_1.fmx.xml': b'<ACT>zipped</ACT>', 'L_1.doc.fmx.xml': b'<DOC/>'},
+}
+ACTS = {'19410716_041U0633': b'<akomaNtoso/>'}
+
+
+class TestStandInServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _cellar(self, server, **kwargs):
+        downloader = CellarDownloader(download_dir=os.path.join(self.tmp.name, 'data'), log_dir=os.path.join(self.tmp.name, 'logs'), **kwargs)
+        server.configure(downloader)
+        return downloader
+
+    def test_cellar(self):
+        with StandInServer(documents=DOCUMENTS) as server:
+            with self._cellar(server) as downloader:
+                path = downloader.download_item('abc.0006.04/DOC_1')
+                self.assertTrue(path.endswith('DOC_1.xml'))
+                path = downloader.download_item('abc.0006.04/DOC_2')
+                self.assertEqual(sorted(os.listdir(path)), ['L_1.doc.fmx.xml', 'L_1.fmx.xml'])
+                self.assertIsNone(downloader.download_item('abc.0006.04/DOC_3'))
+
+    def test_normattiva(self):
+        with StandInServer(acts=ACTS) as server:
+            downloader = NormattivaDownloader(download_dir=os.path.join(self.tmp.name, 'data'), log_dir=os.path.join(self.tmp.name, 'logs'))
+            server.configure(downloader)
+            self.assertIsNotNone(downloader.download(dataGU='19410716', codiceRedaz='041U0633', dataVigenza='20211231'))
+            self.assertIsNotNone(downloader.download(dataGU='19410716', codiceRedaz='041U0633', dataVigenza='20221231'))
+            self.assertEqual(server.stats['sessions'], 1)
+
+            # An unknown act is reported without refreshing recent cookies
+            self.assertIsNone(downloader.download(dataGU='19410716', codiceRedaz='000U0000', dataVigenza='20231231'))
+            self.assertEqual(server.stats['sessions'], 1)
+
+            # Sessions expire once old, and are then refreshed transparently
+            downloader.stale_cookie_age = 0
+            server.expire_sessions()
+            self.assertIsNotNone(downloader.download(dataGU='19410716', codiceRedaz='041U0633', dataVigenza='20231231'))
+            self.assertEqual(server.stats['sessions'], 2)
+            self.assertIsNone(downloader.download(dataGU='19410716', codiceRedaz='000U0000', dataVigenza='20231231'))
+            downloader.close()
+
+    def test_sparql(self):
+        results = {'head': {'vars': ['celex']}, 'results': {'bindings': [{'celex': {'type': 'literal', 'value': '32024R0903'}}]}}
+        with StandInServer(sparql_results=lambda query: results if '32024R0903' in query else {}) as server:
+            self.assertEqual(get_results_table('SELECT ?celex WHERE { "32024R0903" }', endpoint=server.sparql_endpoint), results)
+
+    def test_error_injection(self):
+        with StandInServer(documents=DOCUMENTS, error_rate=0.5, retry_after=0, seed=1) as server:
+            with self._cellar(server, retry=RetryPolicy(max_retries=10, backoff_factor=0.001)) as downloader:
+                paths = downloader.map_concurrent(downloader.download_item, ['abc.0006.04/DOC_1'] * 8, max_workers=4)
+                self.assertTrue(all(path is not None for path in paths))
+                self.assertGreater(server.stats['errors'], 0)
+                self.assertEqual(server.stats['requests'], 8 + server.stats['errors'])
+
+    def test_latency_and_bandwidth(self):
+        with StandInServer(documents={'abc.0006.04/DOC_1': b'x' * 20000}, latency=0.05, bandwidth=100000) as server:
+            with self._cellar(server) as downloader:
+                start = time.monotonic()
+                downloader.map_concurrent(downloader.download_item, ['abc.0006.04/DOC_1'] * 4, max_workers=4)
+                # Latency, then the first 16 KB chunk at 100 KB/s, for the concurrent requests
+                self.assertGreaterEqual(time.monotonic() - start, 0.05 + 0.15)
+                self.assertGreater(server.stats['max_in_flight'], 1)
+
+
+class TestRecordReplay(unittest.TestCase):
+    def test_record_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cassette_dir = os.path.join(tmp, 'cassette')
+            with StandInServer(documents=DOCUMENTS) as server:
+                recorder = CellarDownloader(download_dir=os.path.join(tmp, 'recorded'), log_dir=os.path.join(tmp, 'logs'))
+                server.configure(recorder)
+                RecordReplayAdapter(cassette_dir, mode='record').mount(recorder.session)
+                recorded = [recorder.download_item(id) for id in DOCUMENTS]
+                recorder.close()
+                requests_served = server.stats['requests']
+
+            # The server is down: the responses come from the cassette
+            player = CellarDownloader(download_dir=os.path.join(tmp, 'replayed'), log_dir=os.path.join(tmp, 'logs'))
+            player.endpoint = recorder.endpoint
+            RecordReplayAdapter(cassette_dir, mode='replay').mount(player.session)
+            replayed = [player.download_item(id) for id in DOCUMENTS]
+            self.assertEqual(requests_served, 2)
+            with open(recorded[0], 'rb') as f, open(replayed[0], 'rb') as g:
+                self.assertEqual(f.read(), g.read())
+            self.assertEqual(sorted(os.listdir(replayed[1])), sorted(os.listdir(recorded[1])))
+            self.assertIsNone(player.download_item('abc.0006.04/DOC_3'))
+            player.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import Mock, patch
+from tulit.download.download import DocumentDownloader
+from tulit.download.store import ContentStore, file_hash, file_extension
+
+
+class TestContentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ContentStore(os.path.join(self.tmp.name, 'store'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_put(self):
+        first = self.store.put(self._write('a.xml', b'<ACT/>'), extension='xml')
+        second = self.store.put(self._write('b.xml', b'<ACT/>'), extension='xml')
+        # Identical content is stored once
+        self.assertEqual(first, second)
+        self.assertEqual(os.path.basename(first), f"{file_hash(first)}.xml")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'b.xml')))
+        self.assertTrue(self.store.has_object(file_hash(first), 'xml'))
+
+    def test_record(self):
+        object_path = self.store.put(self._write('a.xml', b'<ACT/>'), extension='xml')
+        self.assertFalse(self.store.contains('abc.0006.04/DOC_1'))
+        self.store.record('abc.0006.04/DOC_1', [('', file_hash(object_path), 'xml')])
+        self.assertTrue(self.store.contains('abc.0006.04/DOC_1'))
+        self.assertEqual(self.store.get('abc.0006.04/DOC_1'), [('', object_path)])
+
+        target = os.path.join(self.tmp.name, 'data', 'DOC_1.xml')
+        self.store.link(object_path, target)
+        self.assertTrue(os.path.samefile(target, object_path))
+
+    def test_file_extension(self):
+        self.assertEqual(file_extension('L_2024.0001.fmx.xml'), 'fmx.xml')
+        self.assertEqual(file_extension('folder/L_2024.0001.fmx.xml.gz'), 'fmx.xml.gz')
+        self.assertEqual(file_extension('L_2024.0001.pdf'), 'pdf')
+        self.assertEqual(file_extension('DOC_1.zst'), 'zst')
+        self.assertEqual(file_extension('DOC_1'), '')
+
+
+class TestDownloaderStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.download_dir = os.path.join(self.tmp.name, 'data')
+        self.downloader = DocumentDownloader(download_dir=self.download_dir, log_dir=os.path.join(self.tmp.name, 'logs'), store_dir=os.path.join(self.tmp.name, 'store'))
+
+    def tearDown(self):
+        self.downloader.close()
+        self.tmp.cleanup()
+
+    def _response(self, content_type, chunks):
+        response = Mock()
+        response.headers = {'Content-Type': content_type}
+        response.iter_content.return_value = chunks
+        return response
+
+    def test_deduplicated_files(self):
+        first = self.downloader.handle_response(self._response('application/xml', [b'<ACT/>']), 'abc.0006.04/DOC_1')
+        second = self.downloader.handle_response(self._response('application/xml', [b'<ACT/>']), 'abc.0006.05/DOC_1')
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp.name, 'store', 'objects'))), 1)
+
+        # A document deleted from the download directory is restored from the store
+        os.remove(second)
+        self.assertEqual(self.downloader.existing_path('abc.0006.05/DOC_1'), second)
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertIsNone(self.downloader.existing_path('abc.0006.06/DOC_1'))
+
+    @patch('tulit.download.download.DocumentDownloader.extract_zip')
+    def test_deduplicated_folders(self, mock_extract_zip):
+        def extract_zip(response, folder_path):
+            with open(os.path.join(folder_path, 'DOC_1.fmx.xml'), 'wb') as f:
+                f.write(b'<ACT/>')
+            with open(os.path.join(folder_path, 'L_2024.0001.fmx.xml'), 'wb') as f:
+                f.write(b'<DOC/>')
+            return 'hash'
+        mock_extract_zip.side_effect = extract_zip
+
+        first = self.downloader.handle_response(self._response('application/zip', []), 'abc.0006.04/DOC_1')
+        second = self.downloader.handle_response(self._response('application/zip', []), 'abc.0006.05/DOC_1')
+        self.assertTrue(os.path.samefile(os.path.join(first, 'DOC_1.fmx.xml'), os.path.join(second, 'DOC_1.fmx.xml')))
+        # Dots in the name of a member are not part of the extension of its object
+        objects = [name for _, _, names in os.walk(os.path.join(self.tmp.name, 'store', 'objects')) for name in names]
+        self.assertTrue(all(name.endswith('.fmx.xml') and name.count('.') == 2 for name in objects))
+
+        self.downloader.close()
+        self.downloader = DocumentDownloader(download_dir=os.path.join(self.tmp.name, 'other'), log_dir=os.path.join(self.tmp.name, 'logs'), store_dir=os.path.join(self.tmp.name, 'store'))
+        path = self.downloader.existing_path('abc.0006.04/DOC_1')
+        self.assertEqual(sorted(os.listdir(path)), ['DOC_1.fmx.xml', 'L_2024.0001.fmx.xml'])
+
+
+if __name__ == "__main__":
+    unittest.main()
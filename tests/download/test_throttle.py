@@ -0,0 +1,145 @@
+import gc
+import time
+import unittest
+import threading
+from unittest.mock import Mock
+import requests
+from tulit.download.download import DocumentDownloader
+from tulit.download.standin import StandInServer
+from tulit.download.throttle import RetryPolicy, AdaptiveLimiter, retry_after_seconds
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_should_retry(self):
+        policy = RetryPolicy(max_retries=2)
+        self.assertTrue(policy.should_retry(1, response=Mock(status_code=503)))
+        self.assertFalse(policy.should_retry(1, response=Mock(status_code=404)))
+        self.assertFalse(policy.should_retry(3, response=Mock(status_code=503)))
+        self.assertTrue(policy.should_retry(1, error=requests.ConnectionError()))
+        self.assertFalse(policy.should_retry(1, error=requests.HTTPError()))
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+        for attempt in range(1, 6):
+            self.assertTrue(0 <= policy.delay(attempt) <= min(5, 2 ** (attempt - 1)))
+        self.assertEqual(policy.delay(1, Mock(headers={'Retry-After': '3'})), 3)
+        self.assertEqual(policy.delay(1, Mock(headers={'Retry-After': '120'})), 5)
+
+    def test_retry_after_date(self):
+        response = Mock(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(retry_after_seconds(response), 0.0)
+        self.assertIsNone(retry_after_seconds(Mock(headers={'Retry-After': 'soon'})))
+        self.assertIsNone(retry_after_seconds(Mock(headers={})))
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter(initial=8, maximum=8)
+        tickets = [limiter.acquire() for _ in range(4)]
+        # Throttled responses to requests sent at the same time decrease the limit once
+        for ticket in tickets:
+            limiter.release(ticket, 429, 0.1)
+        self.assertEqual(limiter.limit, 4)
+
+        limiter.release(limiter.acquire(), 503, 0.1)
+        self.assertEqual(limiter.limit, 2)
+        for _ in range(5):
+            limiter.release(limiter.acquire(), 503, 0.1)
+        self.assertEqual(limiter.limit, 1)
+
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter(initial=2, maximum=3)
+        for _ in range(2):
+            limiter.release(limiter.acquire(), 200, 0.1)
+        self.assertEqual(limiter.limit, 3)
+        for _ in range(10):
+            limiter.release(limiter.acquire(), 200, 0.1)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_latency(self):
+        limiter = AdaptiveLimiter(initial=4, maximum=4, latency_tolerance=2)
+        limiter.release(limiter.acquire(), 200, 0.1)
+        for _ in range(5):
+            limiter.release(limiter.acquire(), 200, 2.0)
+        self.assertLess(limiter.limit, 4)
+
+    def test_slots(self):
+        limiter = AdaptiveLimiter(initial=1, maximum=1)
+        ticket = limiter.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(ticket, 200, 0.1)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+
+class TestRequestRetries(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(documents={'doc': b'ok'}, retry_after=0).start()
+        self.url = f"{self.server.cellar_endpoint}doc"
+        self.downloader = DocumentDownloader(download_dir='./tests/data', log_dir='./tests/logs', retry=RetryPolicy(max_retries=2, backoff_factor=0.01))
+
+    def tearDown(self):
+        self.downloader.close()
+        self.server.stop()
+
+    def test_retry(self):
+        self.server.statuses = [429, 503]
+        limiter = self.downloader.limiter(self.url)
+        initial = limiter.limit
+        response = self.downloader.request('GET', self.url)
+        self.assertEqual(response.status_code, 200)
+        # Each throttled response was sent after the previous decrease, so both halve the limit,
+        # and the successful response fills the window of the lowered limit
+        self.assertEqual(limiter.limit, initial / 4 + 1)
+
+    def test_limit_grows(self):
+        limiter = self.downloader.limiter(self.url)
+        # The limit starts below pool_size, so that it can grow while the host keeps up
+        self.assertLess(limiter.limit, self.downloader.pool_size)
+        # Loopback latencies are too short to tell congestion from jitter
+        limiter.latency_tolerance = None
+        for _ in range(50):
+            self.downloader.request('GET', self.url)
+        self.assertEqual(limiter.limit, self.downloader.pool_size)
+
+    def test_retries_exhausted(self):
+        self.server.statuses = [503, 503, 503]
+        response = self.downloader.request('GET', self.url)
+        self.assertEqual(response.status_code, 503)
+
+    def test_streamed_slot(self):
+        limiter = self.downloader.limiter(self.url)
+        # The slot of a streamed response is held until it is closed
+        response = self.downloader.request('GET', self.url, stream=True)
+        self.assertEqual(limiter._in_flight, 1)
+        response.close()
+        self.assertEqual(limiter._in_flight, 0)
+        response.close()
+        self.assertEqual(limiter._in_flight, 0)
+
+        # or until its body is read to the end
+        response = self.downloader.request('GET', self.url, stream=True)
+        self.assertEqual(limiter._in_flight, 1)
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(limiter._in_flight, 0)
+
+        # The latency is measured until the headers are received, whatever the time taken to read the body
+        response = self.downloader.request('GET', self.url, stream=True)
+        time.sleep(0.2)
+        response.close()
+        self.assertLess(limiter._latency, 0.2)
+
+        # or until it is dropped and collected
+        self.downloader.request('GET', self.url, stream=True)
+        gc.collect()
+        self.assertEqual(limiter._in_flight, 0)
+
+        self.downloader.request('GET', self.url)
+        self.assertEqual(limiter._in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
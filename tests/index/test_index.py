@@ -0,0 +1,99 @@
+import unittest
+import os
+import tempfile
+from tulit.index.index import InvertedIndex, tokenize
+from tulit.index.segment import Segment, write_segment
+
+
+ARTICLES = [
+    {'eId': 'art_1', 'article_text': [
+        {'eId': 'art_1__para_1', 'text': 'Member States shall ensure that consumers have access to a payment account.'},
+        {'eId': 'art_1__para_2', 'text': 'This Directive applies to payment service providers.'},
+    ]},
+    {'eId': 'art_2', 'article_text': [
+        {'eId': 'art_2__para_1', 'text': 'Fees related to payment accounts shall be comparable.'},
+    ]},
+]
+
+FORMEX_ARTICLES = [
+    {'eId': '001', 'article_text': 'Annex I to Regulation (EC) No 1484/95 is replaced by the Annex to this Regulation.'},
+]
+
+
+class TestSegment(unittest.TestCase):
+    def test_write_and_read(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'seg_000000')
+            write_segment(path, [['doc', 'art_1', 'art_1', 2], ['doc', 'art_2', 'art_2', 1]], {'fee': [(0, 2), (1, 1)]})
+            segment = Segment(path)
+            self.assertEqual(segment.postings('fee'), [(0, 2), (1, 1)])
+            self.assertEqual(segment.postings('missing'), [])
+            segment.close()
+
+
+class TestInvertedIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'index')
+        self.index = InvertedIndex(self.path)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Regulation (EC) No 1484/95'), ['regulation', 'ec', 'no', '1484', '95'])
+
+    def test_search(self):
+        self.index.add('32014L0092', ARTICLES)
+        self.index.add('32011R1319', FORMEX_ARTICLES)
+        self.assertEqual(self.index.search('fees'), [])
+
+        self.index.commit()
+        hits = self.index.search('payment fees')
+        self.assertEqual(hits[0]['eId'], 'art_2__para_1')
+        self.assertEqual(hits[0]['article_eId'], 'art_2')
+        self.assertEqual(len(hits), 3)
+
+        hits = self.index.search('annex')
+        self.assertEqual([(hit['doc_id'], hit['eId']) for hit in hits], [('32011R1319', '001')])
+
+    def test_reopen(self):
+        self.index.add('32014L0092', ARTICLES)
+        self.index.commit()
+        self.index.close()
+
+        self.index = InvertedIndex(self.path)
+        self.assertEqual(len(self.index.search('payment')), 3)
+
+    def test_update_and_delete(self):
+        self.index.add('32014L0092', ARTICLES)
+        self.index.commit()
+        self.index.add('32014L0092', FORMEX_ARTICLES)
+        self.index.commit()
+
+        self.assertEqual(self.index.search('payment'), [])
+        self.assertEqual(len(self.index.search('annex')), 1)
+
+        self.index.delete('32014L0092')
+        self.assertEqual(self.index.search('annex'), [])
+
+    def test_merge(self):
+        self.index.add('32014L0092', ARTICLES)
+        self.index.commit()
+        self.index.add('32011R1319', FORMEX_ARTICLES)
+        self.index.commit()
+        self.index.add('32014L0092', ARTICLES[:1])
+        self.index.commit()
+        before = self.index.search('payment annex')
+
+        thread = self.index.merge(background=True)
+        thread.join()
+
+        self.assertEqual(len(self.index.segments), 1)
+        self.assertEqual(self.index.search('payment annex'), before)
+        self.assertEqual(len(os.listdir(self.path)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
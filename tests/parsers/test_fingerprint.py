@@ -0,0 +1,75 @@
+import unittest
+import os
+import tempfile
+from tulit.parsers.fingerprint import normalize_text, fingerprint, article_fingerprint, FingerprintIndex
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text("  Article\n 1\t text  "), "Article 1 text")
+        self.assertEqual(normalize_text(None), "")
+
+    def test_fingerprint_ignores_whitespace(self):
+        self.assertEqual(fingerprint("Member States shall ensure"), fingerprint("Member  States\nshall ensure "))
+        self.assertNotEqual(fingerprint("Member States shall ensure"), fingerprint("Member States may ensure"))
+        self.assertEqual(len(fingerprint("text")), 16)
+
+    def test_article_fingerprint(self):
+        formex_article = {'eId': '001', 'article_text': 'Some text.'}
+        akn_article = {'eId': 'art_1', 'article_text': [
+            {'eId': 'art_1__para_1', 'text': 'First.'},
+            {'eId': 'art_1__para_2', 'text': 'Second.'},
+        ]}
+        swapped = {'eId': 'art_1', 'article_text': list(reversed(akn_article['article_text']))}
+
+        self.assertEqual(article_fingerprint(formex_article), fingerprint('Some text.'))
+        self.assertNotEqual(article_fingerprint(akn_article), article_fingerprint(swapped))
+
+
+class TestFingerprintIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FingerprintIndex()
+        self.articles = [
+            {'eId': 'art_1', 'article_text': 'First article.'},
+            {'eId': 'art_2', 'article_text': 'Second article.'},
+        ]
+
+    def test_update_and_diff(self):
+        changes = self.index.update('32014L0092', self.articles)
+        self.assertEqual(changes['added'], ['art_1', 'art_2'])
+
+        new_articles = [
+            {'eId': 'art_1', 'article_text': 'First  article.'},
+            {'eId': 'art_3', 'article_text': 'Third article.'},
+        ]
+        changes = self.index.diff('32014L0092', new_articles)
+        self.assertEqual(changes, {
+            'added': ['art_3'],
+            'removed': ['art_2'],
+            'changed': [],
+            'unchanged': ['art_1'],
+        })
+
+    def test_changed_articles(self):
+        self.index.update('32014L0092', self.articles)
+        new_articles = [
+            {'eId': 'art_1', 'article_text': 'First article.'},
+            {'eId': 'art_2', 'article_text': 'Second article, amended.'},
+        ]
+        changed = self.index.changed_articles('32014L0092', new_articles)
+        self.assertEqual([article['eId'] for article in changed], ['art_2'])
+
+    def test_save_and_load(self):
+        self.index.update('32014L0092', self.articles)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'fingerprints.json')
+            self.index.save(path)
+            loaded = FingerprintIndex.load(path)
+        self.assertEqual(loaded.documents, self.index.documents)
+        self.assertEqual(loaded.document_fingerprint('32014L0092'), self.index.document_fingerprint('32014L0092'))
+        self.assertIsNone(loaded.document_fingerprint('unknown'))
+
+
+if __name__ == "__main__":
+    unittest.main()
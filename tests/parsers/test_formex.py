@@ -137,12 +137,14 @@ class TestFormex4Parser(unittest.TestCase):
             {
                 "eId": "001",
                 "article_num": "Article 1",
-                "article_text": "Annex I to Regulation (EC) No 1484/95 is replaced by the Annex to this Regulation."
+                "article_text": "Annex I to Regulation (EC) No 1484/95 is replaced by the Annex to this Regulation.",
+                "fingerprint": "67014b62d7b386b0"
             },
             {
                 "eId": "002",
                 "article_num": "Article 2",
-                "article_text": "This Regulation shall enter into force on the day of its publication in the Official Journal of the European Union."
+                "article_text": "This Regulation shall enter into force on the day of its publication in the Official Journal of the European Union.",
+                "fingerprint": "ea05cb077d1833f6"
             }
         ]
         
@@ -0,0 +1,54 @@
+import unittest
+from tulit.parsers.references import extract_references, to_celex, CitationGraph, CitationGraphBuilder
+
+
+class TestExtractReferences(unittest.TestCase):
+
+    def test_to_celex(self):
+        self.assertEqual(to_celex('Regulation', 2011, 1319), '32011R1319')
+        self.assertEqual(to_celex('Directive', 95, 46), '31995L0046')
+
+    def test_extract_references(self):
+        text = (
+            "Having regard to Regulation (EU) No 1319/2011, to Directive 2008/98/EC, "
+            "to Regulation (EU) 2016/679, to Council Decision No 1234/2011/EU, "
+            "to Council Framework Decision 2008/977/JHA and to Directive 95/46/EC."
+        )
+        references = extract_references(text)
+        self.assertEqual(
+            [reference['celex'] for reference in references],
+            ['32011R1319', '32008L0098', '32016R0679', '32011D1234', '32008F0977', '31995L0046']
+        )
+        self.assertEqual(references[0]['text'], 'Regulation (EU) No 1319/2011')
+        self.assertEqual(text[references[1]['start']:references[1]['end']], 'Directive 2008/98/EC')
+
+    def test_extract_references_empty(self):
+        self.assertEqual(extract_references(None), [])
+        self.assertEqual(extract_references("This Regulation shall enter into force."), [])
+
+
+class TestCitationGraph(unittest.TestCase):
+    def setUp(self):
+        builder = CitationGraphBuilder()
+        builder.add_text('32014L0092', 'Directive 2008/98/EC and Regulation (EU) No 1319/2011')
+        builder.add_text('32008L0098', 'Regulation (EU) No 1319/2011')
+        self.graph = builder.build()
+
+    def test_cites(self):
+        self.assertEqual(sorted(self.graph.cites('32014L0092')), ['32008L0098', '32011R1319'])
+        self.assertEqual(self.graph.cites('32011R1319'), [])
+        self.assertEqual(self.graph.cites('unknown'), [])
+
+    def test_cited_by(self):
+        self.assertEqual(sorted(self.graph.cited_by('32011R1319')), ['32008L0098', '32014L0092'])
+        self.assertEqual(self.graph.in_degree('32011R1319'), 2)
+        self.assertEqual(self.graph.out_degree('32014L0092'), 2)
+
+    def test_reachable(self):
+        graph = CitationGraph.from_edges({'A': ['B'], 'B': ['C'], 'C': ['A']})
+        self.assertEqual(graph.reachable('A'), {'B': 1, 'C': 2})
+        self.assertEqual(graph.reachable('A', max_depth=1), {'B': 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from tulit.parsers.sentences import SentenceSegmenter
+
+
+ARTICLES = [
+    {'eId': 'art_1', 'article_text': [
+        {'eId': 'art_1__para_1', 'text': 'This Directive lays down rules. It applies to payment accounts.'},
+        {'eId': 'art_1__para_2', 'text': 'Member States shall comply.'},
+    ]},
+    {'eId': '002', 'article_text': 'This Regulation shall enter into force. It shall apply from 1 January.'},
+]
+
+
+class TestSentenceSegmenter(unittest.TestCase):
+    def setUp(self):
+        self.segmenter = SentenceSegmenter(model=None, batch_size=2)
+
+    def test_segment_articles(self):
+        sentences = self.segmenter.segment_articles(ARTICLES)
+        self.assertEqual(
+            [(sentence['eId'], sentence['sentence'], sentence['text']) for sentence in sentences],
+            [
+                ('art_1__para_1', 0, 'This Directive lays down rules.'),
+                ('art_1__para_1', 1, 'It applies to payment accounts.'),
+                ('art_1__para_2', 0, 'Member States shall comply.'),
+                ('002', 0, 'This Regulation shall enter into force.'),
+                ('002', 1, 'It shall apply from 1 January.'),
+            ]
+        )
+        self.assertEqual(sentences[1]['article_eId'], 'art_1')
+
+    def test_offsets(self):
+        text = ARTICLES[0]['article_text'][0]['text']
+        sentences = self.segmenter.segment_articles(ARTICLES[:1])
+        for sentence in sentences[:2]:
+            self.assertEqual(text[sentence['start']:sentence['end']], sentence['text'])
+
+    def test_fallback(self):
+        segmenter = SentenceSegmenter(model='not_a_spacy_model')
+        self.assertIn('sentencizer', segmenter.nlp.pipe_names)
+
+        segmenter = SentenceSegmenter(model='not_a_spacy_model', fallback=False)
+        with self.assertRaises(OSError):
+            segmenter.nlp
+
+
+if __name__ == "__main__":
+    unittest.main()
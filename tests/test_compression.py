@@ -0,0 +1,90 @@
+import unittest
+import os
+import gzip
+import shutil
+import tempfile
+from unittest.mock import Mock
+from tulit import compression
+from tulit.compression import compressed_path, detect_compression, open_reader, open_text, open_writer, compress_file, strip_compression_extension
+from tulit.download.download import DocumentDownloader
+from tulit.parallel import find_document_files
+from tulit.parsers.formex import Formex4Parser
+from tulit.parsers.html import HTMLParser
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "formex")
+FORMEX_DIR = os.path.join(DATA_DIR, "c008bcb6-e7ec-11ee-9ea8-01aa75ed71a1.0006.02", "DOC_1")
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_paths(self):
+        self.assertEqual(compressed_path('DOC_1.xml', 'gzip'), 'DOC_1.xml.gz')
+        self.assertEqual(compressed_path('DOC_1.xml', None), 'DOC_1.xml')
+        self.assertEqual(strip_compression_extension('DOC_1.xml.zst'), 'DOC_1.xml')
+        with self.assertRaises(ValueError):
+            compressed_path('DOC_1.xml', 'bzip2')
+
+    def test_roundtrip(self):
+        path = os.path.join(self.tmp.name, 'DOC_1.xml.gz')
+        with open_writer(path, 'gzip') as f:
+            f.write('<ACT>é</ACT>'.encode('utf-8'))
+        with open_reader(path) as f:
+            self.assertEqual(f.read(), '<ACT>é</ACT>'.encode('utf-8'))
+        with open_text(path) as f:
+            self.assertEqual(f.read(), '<ACT>é</ACT>')
+
+    def test_detect_magic_number(self):
+        path = os.path.join(self.tmp.name, 'DOC_1.xml')
+        with gzip.open(path, 'wb') as f:
+            f.write(b'<ACT/>')
+        self.assertEqual(detect_compression(path), 'gzip')
+        with open_text(path) as f:
+            self.assertEqual(f.read(), '<ACT/>')
+
+    @unittest.skipIf(compression.zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        path = compress_file(shutil.copy(os.path.join(FORMEX_DIR, 'L_202400903EN.000101.fmx.xml'), self.tmp.name), 'zstd')
+        self.assertTrue(path.endswith('.zst'))
+        parser = Formex4Parser()
+        parser.parse(path)
+        self.assertEqual(len(parser.articles), 23)
+
+    def test_parse_compressed_formex(self):
+        folder = shutil.copytree(FORMEX_DIR, os.path.join(self.tmp.name, 'DOC_1'))
+        for filename in os.listdir(folder):
+            compress_file(os.path.join(folder, filename), 'gzip')
+        files = find_document_files(folder)
+        self.assertEqual([os.path.basename(file) for file in files], ['L_202400903EN.000101.fmx.xml.gz', 'L_202400903EN.002601.fmx.xml.gz'])
+
+        parser = Formex4Parser()
+        parser.parse(files[0])
+        self.assertEqual(len(parser.articles), 23)
+
+    def test_parse_compressed_html(self):
+        path = os.path.join(self.tmp.name, 'DOC_1.html.gz')
+        with open_writer(path, 'gzip') as f:
+            f.write(b'<html><head><meta name="title" content="Act"/></head><body></body></html>')
+        parser = HTMLParser()
+        parser.get_root(path)
+        self.assertEqual(parser.root.find('meta')['content'], 'Act')
+
+    def test_download_compressed(self):
+        response = Mock()
+        response.headers = {'Content-Type': 'application/xml'}
+        response.iter_content.return_value = [b'<ACT>', b'</ACT>']
+        downloader = DocumentDownloader(download_dir=self.tmp.name, log_dir=os.path.join(self.tmp.name, 'logs'), compression='gzip')
+
+        path = downloader.handle_response(response, 'abc.0006.04/DOC_1')
+        self.assertEqual(path, os.path.join(self.tmp.name, 'abc.0006.04', 'DOC_1.xml.gz'))
+        with gzip.open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'<ACT></ACT>')
+        self.assertEqual(downloader.existing_path('abc.0006.04/DOC_1'), path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import re
+import shutil
+import tempfile
+from datetime import date, timedelta
+from urllib.parse import urlparse
+
+from tulit.harvest import OJHarvester, ACTS_QUERY
+from tulit.download.standin import StandInServer
+
+
+class TestOJHarvester(unittest.TestCase):
+    def setUp(self):
+        self.checkpoint_dir = tempfile.mkdtemp()
+        # Two acts a day in January 2024, twelve on the 10th, and one act dated on two days
+        self.acts = []
+        day = date(2024, 1, 1)
+        while day <= date(2024, 1, 31):
+            count = 12 if day == date(2024, 1, 10) else 2
+            for i in range(count):
+                self.acts.append((day, f"http://example.org/work/{day.isoformat()}-{i:02d}"))
+            day += timedelta(days=1)
+        self.acts.append((date(2024, 1, 20), "http://example.org/work/2024-01-05-00"))
+        self.queries = []
+
+    def tearDown(self):
+        shutil.rmtree(self.checkpoint_dir)
+
+    def results(self, query):
+        self.queries.append(query)
+        start, end = (date.fromisoformat(value) for value in re.findall(r'"(\d{4}-\d{2}-\d{2})"', query))
+        rows = sorted(work for day, work in self.acts if start <= day < end)
+        offsets = re.findall(r'OFFSET (\d+)', query)
+        offset = int(offsets[-1]) if offsets else 0
+        limit = int(re.findall(r'LIMIT (\d+)', query)[-1])
+        bindings = [{'work': {'type': 'uri', 'value': work}} for work in rows[offset:offset + limit]]
+        return {'head': {'vars': ['work']}, 'results': {'bindings': bindings}}
+
+    def test_windows(self):
+        harvester = OJHarvester(window_days=7)
+        windows = harvester.windows(date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(len(windows), 5)
+        self.assertEqual(windows[0], (date(2024, 1, 1), date(2024, 1, 8)))
+        self.assertEqual(windows[-1], (date(2024, 1, 29), date(2024, 2, 1)))
+
+    def test_harvest(self):
+        with StandInServer(sparql_results=self.results) as server:
+            harvester = OJHarvester(endpoint=server.sparql_endpoint, window_days=16, max_results=10, max_workers=3, checkpoint_dir=self.checkpoint_dir)
+            results = harvester.harvest(date(2024, 1, 1), date(2024, 1, 31))
+
+        works = [binding['work']['value'] for binding in results]
+        # Each act once, whatever the number of days it is dated on
+        self.assertEqual(len(works), len(set(works)))
+        self.assertEqual(set(works), {work for day, work in self.acts})
+        self.assertEqual(works[0], "http://example.org/work/2024-01-01-00")
+        self.assertGreater(harvester.stats['bisections'], 0)
+        # The 10th alone holds more than max_results acts, and is paged through
+        self.assertTrue(any('OFFSET 10' in query for query in self.queries))
+
+        # A second harvest resumes from the checkpoints, with the endpoint on the same port
+        port = urlparse(server.url).port
+        with StandInServer(sparql_results=self.results, port=port) as server:
+            self.assertEqual(harvester.endpoint, server.sparql_endpoint)
+            self.assertEqual(harvester.harvest(date(2024, 1, 1), date(2024, 1, 31)), results)
+            self.assertEqual(server.stats['requests'], 0)
+        self.assertEqual(harvester.stats['queries'], 0)
+        self.assertGreater(harvester.stats['resumed'], 0)
+
+        # Another threshold, query or endpoint does not resume from the checkpoints
+        with StandInServer(sparql_results=self.results) as server:
+            other = OJHarvester(endpoint=server.sparql_endpoint, window_days=16, max_results=20, checkpoint_dir=self.checkpoint_dir)
+            self.assertEqual(other.harvest(date(2024, 1, 1), date(2024, 1, 31)), results)
+            self.assertEqual(other.stats['resumed'], 0)
+            self.assertGreater(server.stats['requests'], 0)
+        self.assertNotEqual(OJHarvester(query=ACTS_QUERY + '\n').fingerprint(), OJHarvester(query=ACTS_QUERY.replace('?date', '?published')).fingerprint())
+
+    def test_query(self):
+        query = ACTS_QUERY.format(start='2024-01-01', end='2024-02-01')
+        self.assertIn('FILTER(?date >= "2024-01-01"^^xsd:date && ?date < "2024-02-01"^^xsd:date)', query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+import os
+from tulit.parallel import get_language_results, find_document_files, main_document, parse_document, align_provisions
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "formex", "c008bcb6-e7ec-11ee-9ea8-01aa75ed71a1.0006.02", "DOC_1")
+
+
+def binding(language, item):
+    return {
+        'cellarURIs': {'type': 'uri', 'value': f'http://publications.europa.eu/resource/cellar/abc.0006.02/{item}'},
+        'format': {'type': 'typed-literal', 'value': 'fmx4'},
+        'langCode': {'type': 'typed-literal', 'value': language},
+    }
+
+
+class TestParallel(unittest.TestCase):
+
+    @patch('tulit.parallel.get_results_table')
+    def test_get_language_results(self, mock_results):
+        mock_results.return_value = {'head': {}, 'results': {'bindings': [
+            binding('ENG', 'DOC_1'), binding('FRA', 'DOC_1'), binding('FRA', 'DOC_2')
+        ]}}
+        results = get_language_results('32024R0903', languages=['ENG', 'FRA'])
+
+        query = mock_results.call_args[0][0]
+        self.assertIn('<http://publications.europa.eu/resource/celex/32024R0903>', query)
+        self.assertIn('IN ("ENG", "FRA")', query)
+        self.assertEqual(sorted(results), ['ENG', 'FRA'])
+        self.assertEqual(len(results['FRA']['results']['bindings']), 2)
+
+    def test_find_document_files(self):
+        files = [os.path.basename(file) for file in find_document_files(DATA_DIR)]
+        self.assertEqual(files, ['L_202400903EN.000101.fmx.xml', 'L_202400903EN.002601.fmx.xml'])
+        self.assertEqual(find_document_files(None), [])
+
+    def test_main_document(self):
+        paths = [None, '/data/abc.0006.02/DOC_10', '/data/abc.0006.02/DOC_2.xml', '/data/abc.0006.02/DOC_1/']
+        self.assertEqual(main_document(paths), '/data/abc.0006.02/DOC_1/')
+        self.assertEqual(main_document(['/data/annex.xml', '/data/act.xml']), '/data/annex.xml')
+        self.assertIsNone(main_document([None]))
+
+    def test_parse_document(self):
+        articles = parse_document('fmx4', DATA_DIR)
+        self.assertEqual(len(articles), 23)
+        self.assertEqual(articles[0]['eId'], '001')
+
+    def test_align_provisions(self):
+        articles = {
+            'ENG': [{'eId': 'art_1', 'article_num': 'Article 1', 'article_text': [
+                {'eId': 'art_1__para_1', 'text': 'Subject matter'},
+                {'eId': 'art_1__para_2', 'text': 'Scope'},
+            ]}],
+            'DEU': [{'eId': 'art_1', 'article_num': 'Artikel 1', 'article_text': [
+                {'eId': 'art_1__para_1', 'text': 'Gegenstand'},
+            ]}],
+        }
+        aligned = align_provisions(articles)
+        self.assertEqual(aligned['art_1__para_1'], {'ENG': 'Subject matter', 'DEU': 'Gegenstand'})
+        self.assertEqual(aligned['art_1__para_2'], {'ENG': 'Scope'})
+
+        aligned = align_provisions(articles, key='article_num')
+        self.assertEqual(aligned, {'1': {'ENG': 'Subject matter Scope', 'DEU': 'Gegenstand'}})
+
+
+if __name__ == "__main__":
+    unittest.main()
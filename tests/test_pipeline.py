@@ -0,0 +1,59 @@
+import unittest
+import os
+import threading
+from tulit.pipeline import Pipeline, parse_file
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data", "formex", "c008bcb6-e7ec-11ee-9ea8-01aa75ed71a1.0006.02", "DOC_1")
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_parse_file(self):
+        parsed = parse_file('fmx4', DATA_DIR)
+        self.assertEqual(len(parsed['articles']), 23)
+        self.assertIn('recitals', parsed)
+        self.assertIsNone(parse_file('fmx4', None))
+
+    def test_run(self):
+        downloaded = []
+
+        def download(item):
+            downloaded.append(item)
+            if item == 'missing':
+                return None
+            if item == 'broken':
+                raise ValueError('connection reset')
+            return DATA_DIR
+
+        pipeline = Pipeline(download, format='fmx4', download_workers=2, parse_workers=2, queue_size=1)
+        records = list(pipeline.run(['a', 'missing', 'b', 'broken', 'c']))
+
+        self.assertEqual(sorted(record['item'] for record in records), ['a', 'b', 'broken', 'c', 'missing'])
+        for record in records:
+            if record['item'] in ('missing', 'broken'):
+                self.assertIsNone(record['result'])
+                self.assertIsNotNone(record['error'])
+            else:
+                self.assertIsNone(record['error'])
+                self.assertEqual(len(record['result']['articles']), 23)
+
+    def test_backpressure(self):
+        downloaded = []
+        lock = threading.Lock()
+
+        def download(item):
+            with lock:
+                downloaded.append(item)
+            return DATA_DIR
+
+        pipeline = Pipeline(download, format='fmx4', download_workers=1, parse_workers=1, queue_size=1)
+        records = pipeline.run(range(100))
+        next(records)
+        records.close()
+
+        # Downloads stop when the queue and the parsers are full
+        self.assertLess(len(downloaded), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
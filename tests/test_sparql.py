@@ -1,8 +1,16 @@
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
 import json
-from tulit.sparql import send_sparql_query, get_results_table
+from tulit.sparql import send_sparql_query, get_results_table, normalize_query, SparqlCache, build_manifestations_query, get_manifestations, paginate_query, iter_results, iter_bindings, decode_columns, columns_to_frame, get_results_frame
+import io
+import pandas as pd
+from tulit.download.cellar import CellarDownloader
+import re
+import sys
+from tulit.download.standin import StandInServer
 import os
+import time
+import tempfile
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "./metadata/queries")
 
@@ -22,5 +30,204 @@ class TestSendSparqlQuery(unittest.TestCase):
         #print(expected_results)
         self.assertEqual(response, expected_results)
 
+class TestSparqlCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SparqlCache(self.tmp.name)
+        self.results = {'head': {'vars': ['celex']}, 'results': {'bindings': [{'celex': {'type': 'literal', 'value': '32024R0903'}}]}}
+        self.server = StandInServer(sparql_results=self.results).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_normalize_query(self):
+        query = """PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>  # comment
+            SELECT   ?work
+            WHERE { ?work cdm:title "a  #  b" . }"""
+        self.assertEqual(normalize_query(query), 'PREFIX cdm: <http://publications.europa.eu/ontology/cdm#> SELECT ?work WHERE { ?work cdm:title "a  #  b" . }')
+
+    def test_cached(self):
+        endpoint = self.server.sparql_endpoint
+        self.assertEqual(get_results_table('SELECT ?celex WHERE {}', endpoint=endpoint, cache=self.cache), self.results)
+        # Equivalent queries are answered from the cache
+        self.assertEqual(get_results_table('SELECT  ?celex\nWHERE {}  # again', endpoint=endpoint, cache=self.cache), self.results)
+        self.assertEqual(self.server.stats['requests'], 1)
+
+        get_results_table('SELECT ?celex WHERE {}', endpoint=endpoint, cache=self.cache, refresh=True)
+        self.assertEqual(self.server.stats['requests'], 2)
+
+    def test_bindings(self):
+        endpoint = self.server.sparql_endpoint
+        path = os.path.join(DATA_DIR, "formex_query.rq")
+        send_sparql_query(path, celex='32024R0903', endpoint=endpoint, cache=self.cache)
+        send_sparql_query(path, celex='32024R0903', endpoint=endpoint, cache=self.cache)
+        send_sparql_query(path, celex='32011R0182', endpoint=endpoint, cache=self.cache)
+        self.assertEqual(self.server.stats['requests'], 2)
+
+    def test_ttl(self):
+        self.cache.set('SELECT ?celex WHERE {}', self.results)
+        self.assertEqual(self.cache.get('SELECT ?celex WHERE {}'), self.results)
+        self.cache.ttl = 0
+        time.sleep(0.01)
+        self.assertIsNone(self.cache.get('SELECT ?celex WHERE {}'))
+
+    def test_eviction(self):
+        self.cache.max_size = 2 * len(json.dumps(self.results))
+        for i in range(3):
+            self.cache.set(f'SELECT ?celex WHERE {{ {i} }}', self.results)
+            time.sleep(0.01)
+        # The least recently used entry is evicted
+        self.assertIsNone(self.cache.get('SELECT ?celex WHERE { 0 }'))
+        self.assertIsNotNone(self.cache.get('SELECT ?celex WHERE { 2 }'))
+
+def manifestations_results(query):
+    """
+    Emulates the endpoint: two items in one English Formex manifestation per CELEX number of the VALUES block.
+    """
+    bindings = []
+    for celex in re.findall(r'resource/celex/([^>]+)>', query):
+        if celex.startswith('0'):
+            continue
+        for item in (1, 2):
+            bindings.append({
+                'celex': {'type': 'uri', 'value': f"http://publications.europa.eu/resource/celex/{celex}"},
+                'cellarURIs': {'type': 'uri', 'value': f"http://publications.europa.eu/resource/cellar/{celex}.0006.02/DOC_{item}"},
+                'manif': {'type': 'uri', 'value': f"http://publications.europa.eu/resource/cellar/{celex}.0006.02"},
+                'expr': {'type': 'uri', 'value': f"http://publications.europa.eu/resource/cellar/{celex}.0006"},
+                'format': {'type': 'literal', 'value': 'fmx4'},
+                'langCode': {'type': 'literal', 'value': 'ENG'},
+            })
+    return {'head': {'vars': []}, 'results': {'bindings': bindings}}
+
+
+class TestManifestations(unittest.TestCase):
+    def test_build_query(self):
+        query = build_manifestations_query(['32024R0903', '32011R0182'], formats=['fmx4'], languages=['ENG', 'FRA'])
+        self.assertIn('VALUES ?celex { <http://publications.europa.eu/resource/celex/32024R0903> <http://publications.europa.eu/resource/celex/32011R0182> }', query)
+        self.assertIn('FILTER(str(?format) IN ("fmx4"))', query)
+        self.assertIn('FILTER(str(?langCode) IN ("ENG", "FRA"))', query)
+        self.assertNotIn('FILTER', build_manifestations_query(['32024R0903']))
+        with self.assertRaises(ValueError):
+            build_manifestations_query(['32024R0903> } DROP ALL {'])
+
+    def test_batches(self):
+        celex_numbers = [f"32024R{i:04d}" for i in range(1, 11)] + ['00000R0000', '32024R0001']
+        with StandInServer(sparql_results=manifestations_results) as server:
+            manifestations = get_manifestations(celex_numbers, batch_size=4, max_workers=2, endpoint=server.sparql_endpoint)
+            # 11 distinct numbers in batches of 4
+            self.assertEqual(server.stats['requests'], 3)
+
+        self.assertEqual(list(manifestations), list(dict.fromkeys(celex_numbers)))
+        self.assertEqual(manifestations['00000R0000'], [])
+        self.assertEqual(manifestations['32024R0003'], [{
+            'manif': 'http://publications.europa.eu/resource/cellar/32024R0003.0006.02',
+            'expr': 'http://publications.europa.eu/resource/cellar/32024R0003.0006',
+            'format': 'fmx4',
+            'language': 'ENG',
+            'items': [f'http://publications.europa.eu/resource/cellar/32024R0003.0006.02/DOC_{i}' for i in (1, 2)]
+        }])
+        cellar_ids = CellarDownloader(download_dir='./tests/data', log_dir='./tests/logs').get_cellar_ids_from_manifestations(manifestations)
+        self.assertEqual(cellar_ids[:2], ['32024R0001.0006.02/DOC_1', '32024R0001.0006.02/DOC_2'])
+        self.assertEqual(len(cellar_ids), 20)
+
+class TestIterResults(unittest.TestCase):
+    query = "PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>\nSELECT ?work WHERE { ?work a cdm:work }\nORDER BY ?work"
+
+    def setUp(self):
+        self.rows = [{'work': {'type': 'uri', 'value': f"http://example.org/work/{i:03d}"}} for i in range(25)]
+        self.queries = []
+
+    def results(self, query):
+        self.queries.append(query)
+        offset = int(re.search(r'OFFSET (\d+)', query).group(1))
+        limit = int(re.search(r'LIMIT (\d+)', query).group(1))
+        return {'head': {'vars': ['work']}, 'results': {'bindings': self.rows[offset:offset + limit]}}
+
+    def test_paginate_query(self):
+        query = paginate_query(self.query, 10, 20)
+        self.assertTrue(query.startswith("PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>\nSELECT * WHERE {"))
+        self.assertTrue(query.endswith("OFFSET 20\nLIMIT 10"))
+        with self.assertRaises(ValueError):
+            paginate_query("SELECT ?work WHERE { ?work a ?type }", 10)
+        self.assertIn("ORDER BY ?work", paginate_query("SELECT ?work WHERE { ?work a ?type }", 10, order_by='?work'))
+
+    def test_pages(self):
+        with StandInServer(sparql_results=self.results) as server:
+            results = iter_results(self.query, page_size=10, endpoint=server.sparql_endpoint)
+            self.assertEqual(next(results), self.rows[0])
+            # The second page is prefetched while the first one is consumed
+            results_list = [self.rows[0]] + list(results)
+        self.assertEqual(results_list, self.rows)
+        self.assertEqual(len(self.queries), 3)
+
+    def test_limit_and_offset(self):
+        with StandInServer(sparql_results=self.results) as server:
+            results = list(iter_results(f"{self.query}\nLIMIT 12 OFFSET 5", page_size=10, endpoint=server.sparql_endpoint, prefetch=False))
+        self.assertEqual(results, self.rows[5:17])
+        self.assertIn("OFFSET 15\nLIMIT 2", self.queries[-1])
+
+    def test_unordered(self):
+        with self.assertRaises(ValueError):
+            list(iter_results("SELECT ?work WHERE { ?work a ?type }", endpoint='http://127.0.0.1:9'))
+
+class TestColumnarResults(unittest.TestCase):
+    def setUp(self):
+        bindings = []
+        for i in range(6):
+            language = 'ENG' if i % 2 == 0 else 'FRA'
+            binding = {
+                'cellarURIs': {'type': 'uri', 'value': f"http://publications.europa.eu/resource/cellar/abc.000{i}.02/DOC_1"},
+                'format': {'type': 'typed-literal', 'datatype': 'http://www.w3.org/2001/XMLSchema#string', 'value': 'fmx4' if i < 4 else 'xhtml'},
+                'langCode': {'type': 'literal', 'value': language},
+                'pages': {'type': 'typed-literal', 'datatype': 'http://www.w3.org/2001/XMLSchema#integer', 'value': str(i * 10)},
+                'date': {'type': 'typed-literal', 'datatype': 'http://www.w3.org/2001/XMLSchema#date', 'value': f"2024-01-0{i + 1}"},
+            }
+            if i != 3:
+                binding['title'] = {'type': 'literal', 'xml:lang': 'en', 'value': f"Règlement {i} — “quoted”"}
+            bindings.append(binding)
+        self.results = {'head': {'link': [], 'vars': ['cellarURIs', 'format', 'langCode', 'pages', 'date', 'title', 'unbound']}, 'results': {'distinct': False, 'ordered': True, 'bindings': bindings}}
+        self.payload = json.dumps(self.results, indent=1, ensure_ascii=False).encode('utf-8')
+
+    def test_iter_bindings(self):
+        head = {}
+        # Small chunks split the multi-byte characters and the bindings
+        bindings = list(iter_bindings(io.BytesIO(self.payload), head, chunk_size=7))
+        self.assertEqual(bindings, self.results['results']['bindings'])
+        self.assertEqual(head['vars'], self.results['head']['vars'])
+        self.assertEqual(list(iter_bindings(io.BytesIO(b'{"head": {}, "boolean": true}'))), [])
+        with self.assertRaises(ValueError):
+            list(iter_bindings(io.BytesIO(self.payload[:-40]), chunk_size=16))
+
+    def test_decode_columns(self):
+        columns, kinds = decode_columns(io.BytesIO(self.payload), chunk_size=11)
+        self.assertEqual(list(columns), self.results['head']['vars'])
+        self.assertEqual(columns['title'][3], None)
+        self.assertEqual(columns['unbound'], [None] * 6)
+        self.assertEqual(kinds['cellarURIs'], {'uri'})
+        # URIs are interned
+        self.assertIs(columns['cellarURIs'][0], sys.intern("http://publications.europa.eu/resource/cellar/abc.0000.02/DOC_1"))
+        self.assertEqual(decode_columns(self.results), (columns, kinds))
+
+    def test_frame(self):
+        frame = columns_to_frame(*decode_columns(io.BytesIO(self.payload)))
+        self.assertEqual(len(frame), 6)
+        self.assertEqual(frame['cellarURIs'].dtype, 'category')
+        self.assertEqual(frame['format'].dtype, 'category')
+        self.assertEqual(frame['pages'].tolist(), [0, 10, 20, 30, 40, 50])
+        self.assertEqual(frame['date'].iloc[1], pd.Timestamp('2024-01-02'))
+        self.assertTrue(pd.isna(frame['title'].iloc[3]))
+
+        downloader = CellarDownloader(download_dir='./tests/data', log_dir='./tests/logs')
+        self.assertEqual(downloader.get_cellar_ids_from_frame(frame, format='fmx4'), downloader.get_cellar_ids_from_json_results(self.results, format='fmx4'))
+        self.assertEqual(downloader.get_cellar_ids_from_frame(frame, format='fmx4', language='FRA'), ['abc.0001.02/DOC_1', 'abc.0003.02/DOC_1'])
+
+    def test_get_results_frame(self):
+        with StandInServer(sparql_results=self.results) as server:
+            frame = get_results_frame("SELECT * WHERE { ?s ?p ?o }", endpoint=server.sparql_endpoint, chunk_size=64)
+        self.assertEqual(list(frame.columns), self.results['head']['vars'])
+        self.assertEqual(frame['langCode'].value_counts()['ENG'], 3)
+
 if __name__ == "__main__":
     unittest.main()
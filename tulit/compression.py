@@ -0,0 +1,197 @@
+"""
+Compressed storage of documents.
+
+Downloaded documents can be stored compressed with gzip, or with zstd if the optional
+`zstandard` package is installed. Compressed files keep their original name with an
+additional '.gz' or '.zst' extension, and are read back with streaming decompression,
+so the parsers never hold both the compressed and the decompressed document in memory.
+"""
+
+import io
+import os
+import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Extension added to the name of the files compressed with each method
+EXTENSIONS = {'gzip': 'gz', 'zstd': 'zst'}
+
+# Leading bytes of the files compressed with each method
+MAGIC_NUMBERS = {'gzip': b'\x1f\x8b', 'zstd': b'\x28\xb5\x2f\xfd'}
+
+
+def _check(compression):
+    if compression not in EXTENSIONS:
+        raise ValueError(f"Unknown compression {compression!r}, expected one of {list(EXTENSIONS)}")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstd compression requires the zstandard package: pip install zstandard")
+
+
+def compressed_path(path, compression):
+    """
+    Returns the path of the compressed version of a file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the uncompressed file.
+    compression : str or None
+        'gzip', 'zstd', or None for no compression.
+
+    Returns
+    -------
+    str
+        The path with the extension of the compression method added.
+    """
+    if compression is None:
+        return path
+    _check(compression)
+    return f"{path}.{EXTENSIONS[compression]}"
+
+
+def strip_compression_extension(path):
+    """
+    Removes the extension of a compression method from a path.
+
+    Parameters
+    ----------
+    path : str
+        Path of a file, compressed or not.
+
+    Returns
+    -------
+    str
+        The path of the uncompressed file, e.g. 'DOC_1.xml' for 'DOC_1.xml.gz'.
+    """
+    for extension in EXTENSIONS.values():
+        if path.endswith(f".{extension}"):
+            return path[:-len(extension) - 1]
+    return path
+
+
+def detect_compression(path):
+    """
+    Detects the compression method of a file from its extension, or else from its leading bytes.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+
+    Returns
+    -------
+    str or None
+        'gzip', 'zstd', or None if the file is not compressed.
+    """
+    for compression, extension in EXTENSIONS.items():
+        if path.endswith(f".{extension}"):
+            return compression
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    for compression, magic in MAGIC_NUMBERS.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def open_reader(path):
+    """
+    Opens a file for reading, decompressing it on the fly if needed.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file, compressed or not.
+
+    Returns
+    -------
+    file object
+        Binary stream of the decompressed content.
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, 'rb')
+    _check(compression)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def open_text(path, encoding='utf-8'):
+    """
+    Opens a file for reading as text, decompressing it on the fly if needed.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file, compressed or not.
+    encoding : str, optional
+        Encoding of the content.
+
+    Returns
+    -------
+    file object
+        Text stream of the decompressed content.
+    """
+    if detect_compression(path) is None:
+        return open(path, 'r', encoding=encoding)
+    return io.TextIOWrapper(open_reader(path), encoding=encoding)
+
+
+def open_writer(path, compression=None, level=None):
+    """
+    Creates a file for writing, compressing the content on the fly.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file. It must not exist.
+    compression : str, optional
+        'gzip', 'zstd', or None for no compression.
+    level : int, optional
+        Compression level. Defaults to 6 for gzip and 3 for zstd.
+
+    Returns
+    -------
+    file object
+        Binary stream to write the uncompressed content to.
+    """
+    if compression is None:
+        return open(path, 'xb')
+    _check(compression)
+    if compression == 'gzip':
+        return gzip.open(path, 'xb', compresslevel=6 if level is None else level)
+    return zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(open(path, 'xb'), closefd=True)
+
+
+def compress_file(path, compression, level=None):
+    """
+    Replaces a file by its compressed version.
+
+    Parameters
+    ----------
+    path : str
+        Path of the uncompressed file.
+    compression : str
+        'gzip' or 'zstd'.
+    level : int, optional
+        Compression level.
+
+    Returns
+    -------
+    str
+        Path of the compressed file.
+    """
+    target = compressed_path(path, compression)
+    with open(path, 'rb') as source, open_writer(target, compression, level) as destination:
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            destination.write(chunk)
+    os.remove(path)
+    return target
+
@@ -0,0 +1,136 @@
+"""
+Local cache of HTTP validators for downloaded documents.
+
+For every downloaded URL the cache stores its ETag and Last-Modified headers,
+the hash of its content and the path where it was saved. The downloaders use it
+to send conditional requests, to skip rewriting documents whose content did not
+change, and to serve documents without any network access in offline mode.
+"""
+
+import os
+import json
+import time
+import hashlib
+
+import requests
+
+
+class DocumentUnavailable(requests.ConnectionError):
+    """
+    Raised when a document is not available locally and cannot be requested, e.g. in
+    offline mode or when replaying recorded responses. It is never retried.
+    """
+
+
+class HTTPCache:
+    """
+    Cache of HTTP validators, with one small JSON entry per URL.
+
+    Attributes
+    ----------
+    cache_dir : str
+        Directory where the entries are stored.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        Initializes the cache.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Directory where the entries are stored. It is created if it does not exist.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, url):
+        """
+        Returns the cache entry of a URL.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+
+        Returns
+        -------
+        dict or None
+            Dictionary with the keys 'url', 'etag', 'last_modified', 'content_type',
+            'content_hash', 'path', 'extraction' and 'updated', or None if the URL is not cached.
+        """
+        entry_path = self._entry_path(url)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, url, response, content_hash, path, extraction=None):
+        """
+        Stores the validators of a response and the path of its saved content.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        response : requests.Response
+            The response whose content was saved.
+        content_hash : str
+            SHA-256 hash of the content.
+        path : str
+            Path where the content was saved.
+        extraction : str, optional
+            Signature of the filter the members of a zip archive were extracted with, see `MemberFilter.signature`.
+        """
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type'),
+            'content_hash': content_hash,
+            'path': path,
+            'extraction': extraction,
+            'updated': time.time()
+        }
+        entry_path = self._entry_path(url)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        with open(f"{entry_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(f"{entry_path}.tmp", entry_path)
+
+    def conditional_headers(self, url, extraction=None):
+        """
+        Returns the headers making a request conditional on the cached validators.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+        extraction : str, optional
+            Signature of the current filter of zip archives.
+
+        Returns
+        -------
+        dict
+            'If-None-Match' and/or 'If-Modified-Since' headers. Empty if the URL is
+            not cached, if its saved content no longer exists, or if it is a folder
+            extracted from a zip archive with another filter.
+        """
+        entry = self.get(url)
+        if entry is None or not entry.get('path') or not os.path.exists(entry['path']):
+            return {}
+        if os.path.isdir(entry['path']) and entry.get('extraction') != extraction:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
@@ -2,12 +2,14 @@ import logging
 
 import requests
 import json
+import pandas as pd
+from tulit.download.cache import DocumentUnavailable
 from tulit.download.download import DocumentDownloader
 
 class CellarDownloader(DocumentDownloader):
     
-    def __init__(self, download_dir, log_dir):
-        super().__init__(download_dir, log_dir)
+    def __init__(self, download_dir, log_dir, **kwargs):
+        super().__init__(download_dir, log_dir, **kwargs)
         self.endpoint = 'http://publications.europa.eu/resource/cellar/'
    
 
@@ -36,11 +38,11 @@ class CellarDownloader(DocumentDownloader):
         Raises
         ------
         requests.RequestException
-            If there is an error sending the request.
+            If there is an error sending the request, or the server answers with an error status.
 
         See Also
         --------
-        requests : The underlying library used for making HTTP requests.
+        DocumentDownloader.request : Sends the request through the pooled session.
 
         """
         try:
@@ -50,12 +52,14 @@ class CellarDownloader(DocumentDownloader):
                 'Content-Type': "application/x-www-form-urlencoded",
                 'Host': "publications.europa.eu"
             }
-            response = requests.request("GET", url, headers=headers)
+            response = self.request("GET", url, headers=headers, stream=True, cached=True)
             response.raise_for_status()
             return response
         except requests.RequestException as e:
+            if isinstance(e, requests.HTTPError) and e.response is not None:
+                e.response.close()
             logging.error(f"Error sending GET request: {e}")
-            return None
+            raise
              
     def build_request_url(self, params):
         """
@@ -111,45 +115,141 @@ class CellarDownloader(DocumentDownloader):
 
         return cellar_ids
 
-    def download(self, results, format=None):
+    def get_cellar_ids_from_frame(self, results, format=None, language=None):
+        """
+        Extract CELLAR ids from results decoded into a DataFrame.
+
+        Parameters
+        ----------
+        results : pandas.DataFrame
+            The results of the CELLAR SPARQL query, as returned by `tulit.sparql.get_results_frame`.
+        format : str, optional
+            The format of the documents to keep. All formats are kept if None.
+        language : str, optional
+            The language code of the documents to keep, in the 'langCode' column. All languages are kept if None.
+
+        Returns
+        -------
+        list
+            A list of CELLAR ids.
+        """
+        mask = pd.Series(True, index=results.index)
+        if format is not None:
+            mask &= results['format'] == format
+        if language is not None:
+            mask &= results['langCode'] == language
+        uris = results.loc[mask, 'cellarURIs'].astype(str)
+        return uris.str.split("cellar/", n=1).str[1].tolist()
+
+    def get_cellar_ids_from_manifestations(self, manifestations):
+        """
+        Extract CELLAR ids from the manifestations of CELEX numbers.
+
+        Parameters
+        ----------
+        manifestations : dict
+            CELEX numbers mapped to their manifestations, as returned by `tulit.sparql.get_manifestations`.
+            The formats and languages are already filtered by the query.
+
+        Returns
+        -------
+        list
+            A list of CELLAR ids, in the order of the CELEX numbers.
+        """
+        return [
+            item.split("cellar/")[1]
+            for entries in manifestations.values()
+            for manifestation in entries
+            for item in manifestation['items']
+        ]
+
+    def download_item(self, cellar_id):
+        """
+        Downloads a single CELLAR item.
+
+        Parameters
+        ----------
+        cellar_id : str
+            The CELLAR id of the item, e.g. 'e115172d-3ab3-4b14-b0a4-dfdcc9871793.0006.04/DOC_1'.
+
+        Returns
+        -------
+        str or None
+            Path to the downloaded document, or None if the item does not exist (or is not available offline)
+            or its content type is not supported.
+
+        Raises
+        ------
+        requests.RequestException
+            If the request failed for any other reason than a missing item.
+        OSError
+            If the document could not be saved.
+        """
+        # Build the request URL
+        url = self.build_request_url(params={'cellar': cellar_id})
+
+        with self.host_slot(url):
+            # Send the GET request
+            try:
+                response = self.fetch_content(url)
+            except requests.RequestException as e:
+                if self._not_found(e):
+                    return None
+                raise
+            # Handle the response
+            return self.handle_response(response=response, filename=cellar_id)
+
+    @staticmethod
+    def _not_found(error):
+        """
+        Checks whether a request failed because the item does not exist, or is not available offline.
+        """
+        if isinstance(error, DocumentUnavailable):
+            return True
+        response = getattr(error, 'response', None)
+        return isinstance(error, requests.HTTPError) and response is not None and response.status_code in (404, 410)
+
+    def download(self, results, format=None, max_workers=1, job=None, skip_existing=False):
         """
         Sends a REST query to the specified source APIs and downloads the documents
         corresponding to the given results.
 
         Parameters
         ----------
-        results : dict
-            A dictionary containing the JSON results from the APIs.
+        results : dict or pandas.DataFrame
+            A dictionary containing the JSON results from the APIs, or the results decoded into a DataFrame.
         format : str, optional
             The format of the documents to download.        
+        max_workers : int, optional
+            Number of documents downloaded concurrently. The number of concurrent
+            downloads from a single host is further capped by max_per_host.
+        job : str, optional
+            Name of a resumable job. If set, the state of every document is recorded in a
+            manifest in the log directory, and running the same job again only downloads
+            the documents that are missing or failed. See `DocumentDownloader.job_status`.
+        skip_existing : bool, optional
+            Whether documents already in the download directory, or in the content store, are not downloaded again.
 
         Returns
         -------
         list
-            A list of paths to the downloaded documents.
+            A list of paths to the downloaded documents, in the order of the results.
+            The path of a document that could not be downloaded is None.
         """
         
-        cellar_ids = self.get_cellar_ids_from_json_results(results, format=format)
-        
-        try:
-            document_paths = []
-            
-            for id in cellar_ids:
-                # Build the request URL
-                url = self.build_request_url(params={'cellar': id})
-                
-                # Send the GET request
-                response = self.fetch_content(url)
-                # Handle the response
-                file_path = self.handle_response(response=response, filename=id)
-                # Append the file path to the list
-                document_paths.append(file_path)
-                
-            return document_paths
-
-        except Exception as e:
-            logging.error(f"Error processing range: {e}")
-        
+        if isinstance(results, pd.DataFrame):
+            cellar_ids = self.get_cellar_ids_from_frame(results, format=format)
+        else:
+            cellar_ids = self.get_cellar_ids_from_json_results(results, format=format)
+
+        # Duplicate ids are fetched only once
+        unique_ids = list(dict.fromkeys(cellar_ids))
+        download_item = self.download_item
+        if skip_existing:
+            download_item = lambda cellar_id: self.existing_path(cellar_id) or self.download_item(cellar_id)
+        paths = dict(zip(unique_ids, self.download_items(download_item, unique_ids, max_workers=max_workers, job=job)))
+
+        document_paths = [paths[id] for id in cellar_ids]
         return document_paths
       
     
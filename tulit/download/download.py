@@ -1,14 +1,33 @@
 import os
 import io
+import glob
+import shutil
+import hashlib
 import logging
-import zipfile
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
+from tulit.compression import compressed_path, compress_file, open_writer
+from tulit.download.cache import HTTPCache, DocumentUnavailable
+from tulit.download.extract import extract_members
+from tulit.download.manifest import JobManifest
+from tulit.download.store import ContentStore, file_hash, file_extension
+from tulit.download.throttle import RetryPolicy, AdaptiveLimiter, THROTTLE_STATUSES, retry_after_seconds
 
 class DocumentDownloader:
     """	
     A generic document downloader class.
+
+    All the requests of a downloader go through a pooled `requests.Session`, so that
+    TCP and TLS connections are kept alive and reused across calls.
     """	
-    def __init__(self, download_dir, log_dir):
+    def __init__(self, download_dir, log_dir, pool_size=10, keep_alive=True, timeout=(10, 120), session=None, max_per_host=None, chunk_size=1024 * 1024, progress_callback=None, cache_dir=None, offline=False, retry=None, adaptive=True, compression=None, store_dir=None, zip_filter=None):
         """
         Initializes the downloader with directories for downloads and logs.
         
@@ -18,11 +37,417 @@ class DocumentDownloader:
             Directory where downloaded files will be saved.
         log_dir : str
             Directory where log files will be saved.
+        pool_size : int, optional
+            Maximum number of connections kept open for each host.
+        keep_alive : bool, optional
+            Whether connections are kept open between requests.
+        timeout : float or tuple, optional
+            Connect and read timeouts in seconds, applied to every request.
+        session : requests.Session, optional
+            Session to share with other downloaders. A new pooled session is created if None.
+        max_per_host : int, optional
+            Maximum number of documents downloaded at the same time from a single host. Unlimited if None.
+        chunk_size : int, optional
+            Size in bytes of the chunks in which response bodies are streamed to disk.
+        progress_callback : callable, optional
+            Function called after each chunk with the filename, the number of bytes
+            written so far and the expected total number of bytes (None if unknown).
+        cache_dir : str, optional
+            Directory of the HTTP cache. If set, documents are requested conditionally on
+            their cached ETag and Last-Modified headers, and unchanged documents are not rewritten.
+        offline : bool, optional
+            If True, documents are served from the HTTP cache only, without any network access.
+        retry : RetryPolicy, optional
+            Policy retrying failed requests. Defaults to three retries with exponential backoff and jitter.
+        adaptive : bool, optional
+            Whether the number of requests sent at the same time to a host adapts to the
+            throttling (429, 503) and the latency of the host. The number starts at 4 (or
+            pool_size if lower) and grows up to pool_size.
+        compression : str, optional
+            If 'gzip' or 'zstd', documents are stored compressed, with the extension '.gz' or '.zst'
+            added to their name. The parsers read them transparently.
+        store_dir : str, optional
+            Directory of a content-addressed store. If set, every downloaded file is stored once
+            by the hash of its content, and the files in the download directory are hard links to it.
+        zip_filter : MemberFilter, optional
+            Selection of the members extracted from zip archives, e.g. MemberFilter('*.fmx.xml').
+            All the members are extracted if None.
         """
         self.download_dir = download_dir
         self.log_dir = log_dir
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.cache = HTTPCache(cache_dir) if cache_dir is not None else None
+        self.offline = offline
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.adaptive = adaptive
+        self.compression = compression
+        # Fail early if the compression method is unknown or unavailable
+        compressed_path('', compression)
+        self.store = ContentStore(store_dir) if store_dir is not None else None
+        self.zip_filter = zip_filter
+        self.extraction_stats = {'extracted': 0, 'skipped': 0, 'extracted_bytes': 0, 'skipped_bytes': 0}
+        self._limiters = {}
+        self.session = session if session is not None else self._create_session()
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
         self._ensure_directories()
 
+    def _create_session(self):
+        """
+        Creates a session whose connection pool holds up to pool_size connections per host.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def request(self, method, url, cached=False, **kwargs):
+        """
+        Sends a request through the pooled session.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method, e.g. 'GET'.
+        url : str
+            The URL to send the request to.
+        cached : bool, optional
+            Whether the response is a document going through the HTTP cache. If a cache is
+            configured, the request is made conditional on the cached validators, or answered
+            from the cache in offline mode.
+        **kwargs
+            Additional arguments passed to `requests.Session.request`.
+
+        Returns
+        -------
+        requests.Response
+            The response from the server. A 304 (Not Modified) response means that the cached document is up to date.
+
+        Raises
+        ------
+        DocumentUnavailable
+            In offline mode, if the document is not in the cache or the request does not go through the cache.
+
+        Notes
+        -----
+        Failed requests are retried according to the retry policy, and the requests sent
+        to a host wait for a slot of its adaptive limiter. The last response is returned
+        when the retries are exhausted. With stream=True, the slot is held until the body
+        is read to the end or the response is closed, so callers must close the responses
+        they do not read.
+        """
+        if cached and self.cache is not None:
+            if self.offline:
+                return self._cached_response(url)
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(self.cache.conditional_headers(url, self._extraction_signature()))
+            kwargs['headers'] = headers
+        elif self.offline:
+            raise DocumentUnavailable(f"Cannot request {url} in offline mode")
+
+        kwargs.setdefault('timeout', self.timeout)
+        limiter = self.limiter(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            ticket = limiter.acquire() if limiter is not None else None
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+                latency = time.monotonic() - start
+            except requests.RequestException as e:
+                if limiter is not None:
+                    limiter.release(ticket)
+                if not self.retry.should_retry(attempt, error=e):
+                    raise
+                delay = self.retry.delay(attempt)
+                logging.warning(f"Retrying {url} in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+                continue
+
+            status = response.status_code
+            if not self.retry.should_retry(attempt, response=response):
+                if limiter is not None:
+                    if kwargs.get('stream'):
+                        # The body is still to be transferred: the slot is held until it is consumed or closed
+                        self._hold_slot(response, limiter, ticket, status, latency)
+                    else:
+                        limiter.release(ticket, status, latency)
+                break
+            if limiter is not None:
+                limiter.release(ticket, status, latency)
+            delay = self.retry.delay(attempt, response)
+            if limiter is not None and status in THROTTLE_STATUSES and retry_after_seconds(response) is not None:
+                # The whole host asked to slow down, not only this request
+                limiter.pause(delay)
+            logging.warning(f"Retrying {url} in {delay:.1f}s after status {status}")
+            response.close()
+            time.sleep(delay)
+
+        if cached and self.cache is not None:
+            response.cache_url = url
+        return response
+
+    @staticmethod
+    def _hold_slot(response, limiter, ticket, status, latency):
+        """
+        Releases the limiter slot of a streamed response once its body is read to the end or the response is closed.
+
+        The latency reported to the limiter is the time until the headers were received, so
+        that the transfer of a large body is not taken as a sign of congestion.
+        """
+        once = threading.Lock()
+
+        def release():
+            if once.acquire(blocking=False):
+                limiter.release(ticket, status, latency)
+
+        close = response.close
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+        response.close = close_and_release
+
+        # urllib3 releases the connection when the body has been read to the end
+        raw = getattr(response, 'raw', None)
+        release_conn = getattr(raw, 'release_conn', None)
+        if callable(release_conn):
+            def release_conn_and_slot():
+                try:
+                    release_conn()
+                finally:
+                    release()
+            raw.release_conn = release_conn_and_slot
+        # Responses dropped without being read nor closed release their slot when collected
+        weakref.finalize(response, release)
+
+    def _cached_response(self, url):
+        """
+        Builds a 304 (Not Modified) response for a URL whose document is in the cache.
+        """
+        entry = self.cache.get(url)
+        if entry is None or not entry.get('path') or not os.path.exists(entry['path']):
+            raise DocumentUnavailable(f"{url} is not available in the cache (offline mode)")
+        response = requests.Response()
+        response.status_code = 304
+        response.url = url
+        response.headers['Content-Type'] = entry.get('content_type') or ''
+        response.raw = io.BytesIO()
+        response.cache_url = url
+        return response
+
+    def limiter(self, url):
+        """
+        Returns the adaptive limiter of the host of a URL.
+
+        Parameters
+        ----------
+        url : str
+            The requested URL.
+
+        Returns
+        -------
+        AdaptiveLimiter or None
+            The limiter of the host, or None if adaptive rate control is disabled.
+        """
+        if not self.adaptive:
+            return None
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._limiters:
+                # The limit starts below pool_size, and grows towards it while the host keeps up
+                self._limiters[host] = AdaptiveLimiter(maximum=self.pool_size)
+            return self._limiters[host]
+
+    @contextmanager
+    def host_slot(self, url):
+        """
+        Context manager holding one of the max_per_host download slots of the host of a URL.
+
+        Parameters
+        ----------
+        url : str
+            The URL about to be downloaded.
+        """
+        if not self.max_per_host:
+            yield
+            return
+        host = urlparse(url).netloc
+        with self._host_lock:
+            semaphore = self._host_semaphores.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+        with semaphore:
+            yield
+
+    def map_concurrent(self, func, items, max_workers=1):
+        """
+        Applies a function to a list of items in a pool of threads.
+
+        Parameters
+        ----------
+        func : callable
+            The function to apply, typically downloading a single document.
+        items : list
+            The items to process.
+        max_workers : int, optional
+            Number of threads. The items are processed sequentially if 1.
+            Values above pool_size open connections that are not kept in the pool.
+
+        Returns
+        -------
+        list
+            The results of the function, in the order of the items.
+        """
+        if max_workers is None or max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, items))
+
+    def manifest(self, job):
+        """
+        Opens the manifest of a batch download job, stored in the log directory.
+
+        Parameters
+        ----------
+        job : str
+            Name of the job.
+
+        Returns
+        -------
+        JobManifest
+            The manifest of the job.
+        """
+        return JobManifest(os.path.join(self.log_dir, 'jobs.sqlite'), job)
+
+    def download_items(self, func, items, max_workers=1, job=None, key=str, errors=None):
+        """
+        Downloads a list of items, optionally as a resumable job.
+
+        If a job name is given, the state of every item is recorded in the job manifest.
+        When the same job is run again, items already downloaded are not requested again,
+        while failed and pending items are retried.
+
+        Parameters
+        ----------
+        func : callable
+            Function downloading one item and returning its path. It returns None or raises an exception on failure.
+        items : list
+            The items to download.
+        max_workers : int, optional
+            Number of items downloaded concurrently.
+        job : str, optional
+            Name of the job. No manifest is kept if None.
+        key : callable, optional
+            Function returning the identifier of an item in the manifest.
+        errors : dict, optional
+            Dictionary filled with the identifiers of the failed items mapped to their errors.
+
+        Returns
+        -------
+        list
+            The paths of the downloaded items, in the order of the items (None for failed items).
+        """
+        manifest = self.manifest(job) if job is not None else None
+        try:
+            keys = [key(item) for item in items]
+            completed = {}
+            if manifest is not None:
+                manifest.register(keys)
+                completed = manifest.completed()
+            todo = [item for item, item_key in zip(items, keys) if item_key not in completed]
+
+            def run(item):
+                item_key = key(item)
+                try:
+                    path = func(item)
+                    error = None if path is not None else f"{item_key} could not be downloaded"
+                except Exception as e:
+                    logging.error(f"Error downloading {item_key}: {e}")
+                    path, error = None, str(e)
+                if error is not None and errors is not None:
+                    errors[item_key] = error
+                if manifest is not None:
+                    if error is None:
+                        manifest.complete(item_key, path)
+                    else:
+                        manifest.fail(item_key, error)
+                return path
+
+            paths = dict(zip([key(item) for item in todo], self.map_concurrent(run, todo, max_workers=max_workers)))
+            return [completed[item_key] if item_key in completed else paths[item_key] for item_key in keys]
+        finally:
+            if manifest is not None:
+                manifest.close()
+
+    def job_status(self, job):
+        """
+        Reports the progress of a batch download job.
+
+        Parameters
+        ----------
+        job : str
+            Name of the job.
+
+        Returns
+        -------
+        dict
+            See `JobManifest.status`.
+        """
+        manifest = self.manifest(job)
+        try:
+            return manifest.status()
+        finally:
+            manifest.close()
+
+    def connection_stats(self):
+        """
+        Returns statistics on the reuse of pooled connections.
+
+        Returns
+        -------
+        dict
+            Dictionary with the keys:
+            - 'requests': Number of requests sent through the open connection pools
+            - 'connections': Number of connections opened by these pools
+            - 'reused': Number of requests sent over an already open connection
+        """
+        stats = {'requests': 0, 'connections': 0}
+        for adapter in set(self.session.adapters.values()):
+            poolmanager = getattr(adapter, 'poolmanager', None)
+            if poolmanager is None:
+                continue
+            for key in poolmanager.pools.keys():
+                pool = poolmanager.pools.get(key)
+                if pool is not None:
+                    stats['requests'] += pool.num_requests
+                    stats['connections'] += pool.num_connections
+        stats['reused'] = max(stats['requests'] - stats['connections'], 0)
+        return stats
+
+    def close(self):
+        """
+        Closes the session and its pooled connections, and the content store.
+        """
+        self.session.close()
+        if self.store is not None:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _ensure_directories(self):
         """
         Ensure that the download and log directories exist.
@@ -32,6 +457,35 @@ class DocumentDownloader:
         if not os.path.exists(self.log_dir):
             os.makedirs(self.log_dir)
     
+    def existing_path(self, filename):
+        """
+        Returns the path of a document already saved under a filename.
+
+        Parameters
+        ----------
+        filename : str
+            The filename passed to `handle_response`, without extension.
+
+        Returns
+        -------
+        str or None
+            The folder extracted from a zip file or the file saved with any extension, or None if there is none.
+
+        Notes
+        -----
+        With a content store, the check is a lookup in its index, and documents missing from
+        the download directory are restored from the store without being downloaded again.
+        """
+        target_path = os.path.join(self.download_dir, filename)
+        if self.store is not None and self.store.contains(filename):
+            path = self._materialize(filename, target_path)
+            if path is not None:
+                return path
+        if os.path.isdir(target_path):
+            return target_path
+        matches = sorted(glob.glob(f"{glob.escape(target_path)}.*"))
+        return os.path.normpath(matches[0]) if matches else None
+
     def handle_response(self, response, filename):
         """
         Handle a server response by saving or extracting its content.
@@ -50,6 +504,16 @@ class DocumentDownloader:
         str or None
             Path to the saved file or None if the response couldn't be processed.
         """
+        cache_url = getattr(response, 'cache_url', None) if self.cache is not None else None
+        if cache_url is not None and response.status_code == 304:
+            # Not modified: the document saved on the previous download is still current
+            response.close()
+            entry = self.cache.get(cache_url)
+            if entry is not None and entry.get('path') and os.path.exists(entry['path']):
+                return entry['path']
+            logging.warning(f"Document {filename} was not modified, but it is missing from the cache")
+            return None
+
         content_type = response.headers.get('Content-Type', '')
         
         # The return file is usually either a zip file, or a file with the name DOC_* inside a folder named as the cellar_id
@@ -57,21 +521,195 @@ class DocumentDownloader:
         os.makedirs(os.path.dirname(target_path), exist_ok=True)
 
         if 'zip' in content_type:
-            self.extract_zip(response, target_path)
+            # Extract in a temporary folder, then move it in place so readers never see a partial folder
+            tmp_path = self._temporary_path(target_path)
+            os.makedirs(tmp_path)
+            try:
+                content_hash = self.extract_zip(response, tmp_path)
+                if content_hash is None:
+                    # A corrupt or truncated archive must not replace a folder extracted before
+                    response.close()
+                    return None
+                if not self._is_unchanged(cache_url, content_hash, target_path, self._extraction_signature()):
+                    entries = self._finalize_folder(tmp_path)
+                    self._publish(tmp_path, target_path)
+                    if self.store is not None and content_hash is not None:
+                        self.store.record(filename, entries)
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            self._update_cache(cache_url, response, content_hash, target_path, self._extraction_signature())
             return target_path
         else:
             extension = self.get_extension_from_content_type(content_type)
             if not extension:
                 logging.warning(f"Unknown content type for ID {filename}: {content_type}")
+                response.close()
                 return None
 
-            file_path = f"{target_path}.{extension}"
+            file_path = compressed_path(f"{target_path}.{extension}", self.compression)
             file_path = os.path.normpath(file_path)
             
-            with open(file_path, mode='wb+') as f:
-                f.write(response.content)            
+            # Write to a temporary file, then rename it so readers never see a partial file
+            tmp_path = self._temporary_path(file_path)
+            try:
+                content_hash = self._stream_to_file(response, tmp_path, filename, compression=self.compression)
+                # Unchanged documents are not rewritten
+                if not self._is_unchanged(cache_url, content_hash, file_path):
+                    if self.store is not None:
+                        # Identical content downloaded under another id is stored only once
+                        extension = file_path[len(os.path.normpath(target_path)) + 1:]
+                        self.store.link(self.store.put(tmp_path, content_hash, extension), file_path)
+                        self.store.record(filename, [('', content_hash, extension)])
+                    else:
+                        os.replace(tmp_path, file_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._update_cache(cache_url, response, content_hash, file_path)
                 
             return file_path
+
+    def _is_unchanged(self, cache_url, content_hash, path, extraction=None):
+        """
+        Checks whether a downloaded content is the one already saved at path, according to the cache.
+        An archive is only unchanged if it was extracted with the same filter.
+        """
+        if cache_url is None or content_hash is None or not os.path.exists(path):
+            return False
+        entry = self.cache.get(cache_url)
+        return (
+            entry is not None and entry.get('content_hash') == content_hash and entry.get('path') == path
+            and entry.get('extraction') == extraction
+        )
+
+    def _update_cache(self, cache_url, response, content_hash, path, extraction=None):
+        """
+        Stores the validators of a saved response in the cache.
+        """
+        if cache_url is not None and content_hash is not None:
+            self.cache.set(cache_url, response, content_hash, path, extraction)
+
+    def _extraction_signature(self):
+        """
+        Returns the signature of the filter of zip archives, or None if all members are extracted.
+        """
+        return self.zip_filter.signature() if self.zip_filter is not None else None
+
+    def _stream_to_file(self, response, path, filename=None, compression=None):
+        """
+        Streams the body of a response to a file, chunk by chunk, so that memory use does not depend on its size.
+
+        Parameters
+        ----------
+        response : requests.Response
+            The HTTP response object, preferably requested with stream=True.
+        path : str
+            Path of the file to write. It must not exist.
+        filename : str, optional
+            Name of the document, passed to the progress callback.
+        compression : str, optional
+            Compression method of the file, 'gzip' or 'zstd'. The file is not compressed if None.
+
+        Returns
+        -------
+        str
+            SHA-256 hash of the content, before compression.
+        """
+        total = response.headers.get('Content-Length')
+        total = int(total) if total and str(total).isdigit() else None
+        written = 0
+        digest = hashlib.sha256()
+        try:
+            with open_writer(path, compression) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+                    if self.progress_callback is not None:
+                        self.progress_callback(filename or path, written, total)
+        finally:
+            response.close()
+        return digest.hexdigest()
+
+    def _finalize_folder(self, folder_path):
+        """
+        Compresses the files of an extracted folder and moves them to the content store, as configured.
+
+        Parameters
+        ----------
+        folder_path : str
+            The extracted folder. Its files are replaced in place by their compressed versions or by hard links to the store.
+
+        Returns
+        -------
+        list of tuple
+            The (name, hash, extension) entries of the files, for the content store. Empty without a store.
+        """
+        entries = []
+        for root, _, filenames in os.walk(folder_path):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, folder_path)
+                # Hash before compressing, as compressed files embed their time of creation
+                content_hash = file_hash(path) if self.store is not None else None
+                if self.compression is not None:
+                    path = compress_file(path, self.compression)
+                    name = compressed_path(name, self.compression)
+                if self.store is not None:
+                    extension = file_extension(name)
+                    self.store.link(self.store.put(path, content_hash, extension), path)
+                    entries.append((name, content_hash, extension))
+        return entries
+
+    def _materialize(self, id, target_path):
+        """
+        Restores a document of the content store in the download directory, if it is missing.
+
+        Returns
+        -------
+        str or None
+            Path of the document, or None if its objects are missing from the store.
+        """
+        entries = self.store.get(id)
+        if not all(os.path.exists(object_path) for _, object_path in entries):
+            return None
+        if len(entries) == 1 and entries[0][0] == '':
+            object_path = entries[0][1]
+            file_path = f"{target_path}.{os.path.basename(object_path).partition('.')[2]}"
+            if not os.path.exists(file_path):
+                self.store.link(object_path, file_path)
+            return os.path.normpath(file_path)
+        if not os.path.isdir(target_path):
+            tmp_path = self._temporary_path(target_path)
+            try:
+                for name, object_path in entries:
+                    self.store.link(object_path, os.path.join(tmp_path, name))
+                self._publish(tmp_path, target_path)
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        return target_path
+
+    @staticmethod
+    def _temporary_path(path):
+        """
+        Returns a unique hidden path next to path, used to write its content before renaming it.
+        """
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex[:12]}.tmp")
+
+    def _publish(self, tmp_path, target_path):
+        """
+        Atomically replaces target_path with the folder tmp_path.
+        """
+        if os.path.isdir(target_path):
+            # Folders cannot be replaced in one step: move the old one aside first
+            old_path = self._temporary_path(target_path)
+            os.replace(target_path, old_path)
+            os.replace(tmp_path, target_path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, target_path)
         
     def get_extension_from_content_type(self, content_type):
         """
@@ -101,9 +739,12 @@ class DocumentDownloader:
                 return mapped_ext
 
     # Function to download a zip file and extract it
-    def extract_zip(self, response: requests.Response, folder_path: str):
+    def extract_zip(self, response: requests.Response, folder_path: str, report=None):
         """
         Extracts the content of a zip file.
+
+        The archive is streamed to a temporary file next to the folder and extracted from there,
+        so it is never held in memory. Only the members selected by zip_filter are extracted.
         
         Parameters
         ----------
@@ -111,10 +752,29 @@ class DocumentDownloader:
             The HTTP response object.
         folder_path : str
             Directory where the zip file will be extracted.
+        report : dict, optional
+            Dictionary updated with the extraction report, see `extract_members`.
+
+        Returns
+        -------
+        str or None
+            SHA-256 hash of the archive, or None if it could not be downloaded or extracted.
         """
+        zip_path = f"{self._temporary_path(folder_path)}.zip"
         try:
-            z = zipfile.ZipFile(io.BytesIO(response.content))
-            z.extractall(folder_path)
+            content_hash = self._stream_to_file(response, zip_path, os.path.basename(folder_path))
+            extraction = extract_members(zip_path, folder_path, self.zip_filter, chunk_size=self.chunk_size)
+            if extraction['skipped']:
+                logging.info(f"Skipped {extraction['skipped']} members ({extraction['skipped_bytes']} bytes) of {os.path.basename(folder_path)}: {extraction['skipped_members']}")
+            with self._host_lock:
+                for key in self.extraction_stats:
+                    self.extraction_stats[key] += extraction[key]
+            if report is not None:
+                report.update(extraction)
+            return content_hash
         except Exception as e:
             logging.error(f"Error downloading zip: {e}")
-
+            return None
+        finally:
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
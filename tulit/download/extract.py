@@ -0,0 +1,193 @@
+"""
+Selective extraction of zip archives.
+
+CELLAR archives often contain files that are never read, such as PDF renditions,
+images or tables of contents. A `MemberFilter` selects the members to extract by
+name pattern, content type or any predicate, and guards against zip bombs with
+limits on the size of each member, on the total size, and on the compression ratio.
+`extract_members` decompresses only the selected members and reports the bytes
+extracted and skipped.
+"""
+
+import os
+import json
+import fnmatch
+import mimetypes
+import zipfile
+
+
+class MemberFilter:
+    """
+    Selection of the members of a zip archive to extract.
+
+    A member is extracted if it matches any of the patterns or content types (or if none
+    is given), satisfies the predicate, and is within the size limits.
+
+    Attributes
+    ----------
+    patterns : list of str
+        Glob patterns matched against the names of the members, e.g. '*.fmx.xml'.
+    content_types : list of str
+        Content types guessed from the names of the members, e.g. 'application/xml'.
+    predicate : callable or None
+        Function taking a `zipfile.ZipInfo` and returning True for the members to extract.
+    max_member_size : int or None
+        Maximum uncompressed size in bytes of a member.
+    max_total_size : int or None
+        Maximum total uncompressed size in bytes of the extracted members.
+    max_ratio : float or None
+        Maximum ratio between the uncompressed and the compressed size of a member.
+    """
+
+    def __init__(self, patterns=None, content_types=None, predicate=None, max_member_size=None, max_total_size=None, max_ratio=None):
+        """
+        Initializes the filter.
+
+        Parameters
+        ----------
+        patterns : str or list of str, optional
+            Glob patterns matched against the names of the members.
+        content_types : str or list of str, optional
+            Content types of the members to extract.
+        predicate : callable, optional
+            Function taking a `zipfile.ZipInfo` and returning True for the members to extract.
+        max_member_size : int, optional
+            Maximum uncompressed size in bytes of a member.
+        max_total_size : int, optional
+            Maximum total uncompressed size in bytes of the extracted members.
+        max_ratio : float, optional
+            Maximum compression ratio of a member.
+        """
+        self.patterns = [patterns] if isinstance(patterns, str) else list(patterns or [])
+        self.content_types = [content_types] if isinstance(content_types, str) else list(content_types or [])
+        self.predicate = predicate
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_ratio = max_ratio
+
+    def signature(self):
+        """
+        Returns a description of the filter, which changes whenever it selects other members.
+
+        Returns
+        -------
+        str
+            JSON description of the patterns, content types, predicate and limits.
+        """
+        predicate = None
+        if self.predicate is not None:
+            predicate = f"{getattr(self.predicate, '__module__', '')}.{getattr(self.predicate, '__qualname__', repr(self.predicate))}"
+        return json.dumps([
+            sorted(self.patterns), sorted(self.content_types), predicate,
+            self.max_member_size, self.max_total_size, self.max_ratio
+        ])
+
+    def skip_reason(self, info):
+        """
+        Returns why a member is not extracted, or None if it is.
+
+        Parameters
+        ----------
+        info : zipfile.ZipInfo
+            The member.
+
+        Returns
+        -------
+        str or None
+            'filtered', 'too large' or 'compression ratio', or None if the member is extracted.
+        """
+        if self.patterns or self.content_types:
+            name = info.filename.rsplit('/', 1)[-1]
+            matches = any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+            if not matches and self.content_types:
+                matches = mimetypes.guess_type(name)[0] in self.content_types
+            if not matches:
+                return 'filtered'
+        if self.predicate is not None and not self.predicate(info):
+            return 'filtered'
+        if self.max_member_size is not None and info.file_size > self.max_member_size:
+            return 'too large'
+        if self.max_ratio is not None and info.file_size > self.max_ratio * max(info.compress_size, 1):
+            return 'compression ratio'
+        return None
+
+
+def _safe_path(folder_path, name):
+    """
+    Returns the path where a member is extracted, or None if it would be outside the folder.
+    """
+    path = os.path.normpath(os.path.join(folder_path, name))
+    if os.path.isabs(name) or not path.startswith(os.path.normpath(folder_path) + os.sep):
+        return None
+    return path
+
+
+def extract_members(zip_path, folder_path, member_filter=None, chunk_size=1024 * 1024):
+    """
+    Extracts the members of a zip archive selected by a filter.
+
+    The members are decompressed in chunks, and the number of bytes written is checked
+    against the declared sizes and the limits of the filter, so that archives lying about
+    the size of their members cannot fill the disk.
+
+    Parameters
+    ----------
+    zip_path : str
+        Path of the zip archive.
+    folder_path : str
+        Folder where the members are extracted.
+    member_filter : MemberFilter, optional
+        Selection of the members. All the members are extracted if None.
+    chunk_size : int, optional
+        Size in bytes of the chunks in which the members are decompressed.
+
+    Returns
+    -------
+    dict
+        Report with the keys 'extracted' and 'skipped' (numbers of members), 'extracted_bytes'
+        and 'skipped_bytes' (uncompressed sizes), and 'skipped_members' (list of (name, reason) tuples).
+    """
+    member_filter = member_filter or MemberFilter()
+    report = {'extracted': 0, 'skipped': 0, 'extracted_bytes': 0, 'skipped_bytes': 0, 'skipped_members': []}
+
+    def skip(info, reason):
+        report['skipped'] += 1
+        report['skipped_bytes'] += info.file_size
+        report['skipped_members'].append((info.filename, reason))
+
+    with zipfile.ZipFile(zip_path) as z:
+        for info in z.infolist():
+            if info.is_dir():
+                continue
+            reason = member_filter.skip_reason(info)
+            path = _safe_path(folder_path, info.filename)
+            if reason is None and path is None:
+                reason = 'unsafe path'
+            if reason is None and member_filter.max_total_size is not None and report['extracted_bytes'] + info.file_size > member_filter.max_total_size:
+                reason = 'total size limit'
+            if reason is not None:
+                skip(info, reason)
+                continue
+
+            # The declared size is only trusted up to the limits
+            limit = info.file_size
+            if member_filter.max_member_size is not None:
+                limit = min(limit, member_filter.max_member_size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            written = 0
+            with z.open(info) as source, open(path, 'wb') as destination:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > limit:
+                        break
+                    destination.write(chunk)
+            if written > limit:
+                os.remove(path)
+                skip(info, 'size mismatch')
+                continue
+            report['extracted'] += 1
+            report['extracted_bytes'] += written
+    return report
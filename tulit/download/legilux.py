@@ -1,10 +1,26 @@
-import requests
 from tulit.download.download import DocumentDownloader
+import logging
+import requests
+
+# Authority table of the types of documents published on Legilux
+RESOURCE_TYPE = "http://data.legilux.public.lu/resource/authority/resource-type/"
+
+ENUMERATION_QUERY = """PREFIX jolux: <http://data.legilux.public.lu/resource/ontology/jolux#>
+SELECT DISTINCT ?act WHERE {{
+    ?act a jolux:Act ;
+        jolux:typeDocument ?type ;
+        jolux:dateDocument ?date .
+    VALUES ?type {{ {types} }}
+    FILTER (YEAR(?date) >= {start} && YEAR(?date) <= {end})
+}}
+ORDER BY ?act"""
+
 
 class LegiluxDownloader(DocumentDownloader):
-    def __init__(self, download_dir, log_dir):
-        super().__init__(download_dir, log_dir)
+    def __init__(self, download_dir, log_dir, **kwargs):
+        super().__init__(download_dir, log_dir, **kwargs)
         #self.endpoint = "https://legilux.public.lu/eli/etat/leg/loi"
+        self.sparql_endpoint = "https://data.legilux.public.lu/sparqlendpoint"
 
     def build_request_url(self, eli) -> str:
         """
@@ -18,21 +34,167 @@ class LegiluxDownloader(DocumentDownloader):
         Fetch the content of the document.
         """
         headers = {"Accept": "application/xml"}
-        response = requests.get(url, headers=headers)
+        response = self.request("GET", url, headers=headers, stream=True, cached=True)
         return response
 
-    def download(self, eli):
-        file_paths = []
+    @staticmethod
+    def eli_filename(eli):
+        """
+        Returns the filename, without extension, of the document of an ELI.
+
+        Parameters
+        ----------
+        eli : str
+            ELI of the document, e.g. http://data.legilux.public.lu/eli/etat/leg/loi/2006/07/31/n2/jo
+
+        Returns
+        -------
+        str
+            The part of the ELI after 'loi/' for laws, e.g. 2006_07_31_n2_jo, and after 'eli/' otherwise.
+        """
+        if 'loi/' in eli:
+            return eli.split('loi/')[1].replace('/', '_')
+        return eli.split('eli/', 1)[-1].strip('/').replace('/', '_')
+
+    def download_eli(self, eli):
+        """
+        Downloads the document of an ELI.
+
+        Parameters
+        ----------
+        eli : str
+            ELI of the document.
+
+        Returns
+        -------
+        str or None
+            Path of the downloaded file, or None if the response could not be saved.
+
+        Raises
+        ------
+        requests.RequestException
+            If the request fails or the server answers with an error status.
+        """
         url = self.build_request_url(eli)
-        response = self.fetch_content(url)        
-        filename = eli.split('loi/')[1].replace('/', '_')
-        if response.status_code == 200:
-            file_paths.append(self.handle_response(response, filename=filename))
-            print(f"Document downloaded successfully and saved to {file_paths}")
-            return file_paths
-        else:
-            print(f"Failed to download document. Status code: {response.status_code}")
+        with self.host_slot(url):
+            response = self.fetch_content(url)
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                raise
+            return self.handle_response(response, filename=self.eli_filename(eli))
+
+    def download(self, eli):
+        """
+        Downloads the document of an ELI.
+
+        Parameters
+        ----------
+        eli : str
+            ELI of the document.
+
+        Returns
+        -------
+        list or None
+            List with the path of the downloaded file, or None if it could not be downloaded.
+        """
+        try:
+            file_path = self.download_eli(eli)
+        except requests.RequestException as e:
+            logging.error(f"Failed to download document {eli}: {e}")
+            return None
+        if file_path is None:
             return None
+        logging.info(f"Document downloaded successfully and saved to {file_path}")
+        return [file_path]
+
+    def enumerate_elis(self, start_year, end_year=None, types=('LOI',)):
+        """
+        Lists the ELIs of the acts published on Legilux in a range of years.
+
+        Parameters
+        ----------
+        start_year : int
+            First year of the range.
+        end_year : int, optional
+            Last year of the range, included. Defaults to start_year.
+        types : tuple of str, optional
+            Types of documents, as codes of the Legilux resource-type authority table, e.g. 'LOI' or 'RGD'.
+
+        Returns
+        -------
+        list of str
+            The ELIs of the acts.
+
+        Raises
+        ------
+        requests.RequestException
+            If the query fails.
+        """
+        end_year = start_year if end_year is None else end_year
+        query = ENUMERATION_QUERY.format(
+            types=' '.join(f"<{RESOURCE_TYPE}{type}>" for type in types),
+            start=int(start_year),
+            end=int(end_year)
+        )
+        response = self.request(
+            "POST", self.sparql_endpoint, data={'query': query},
+            headers={'Accept': 'application/sparql-results+json'}
+        )
+        response.raise_for_status()
+        bindings = response.json()['results']['bindings']
+        return [binding['act']['value'] for binding in bindings]
+
+    def download_many(self, elis=None, start_year=None, end_year=None, types=('LOI',), max_workers=8, skip_existing=True, job=None):
+        """
+        Downloads many documents concurrently.
+
+        Parameters
+        ----------
+        elis : list of str, optional
+            ELIs of the documents. If None, they are enumerated with `enumerate_elis`
+            from start_year, end_year and types.
+        start_year : int, optional
+            First year of the acts to enumerate.
+        end_year : int, optional
+            Last year of the acts to enumerate.
+        types : tuple of str, optional
+            Types of the acts to enumerate.
+        max_workers : int, optional
+            Number of documents downloaded concurrently. The number of concurrent
+            downloads from Legilux is further capped by max_per_host.
+        skip_existing : bool, optional
+            Whether documents already saved in the download directory are skipped.
+        job : str, optional
+            Name of a resumable job, see `DocumentDownloader.download_items`.
+
+        Returns
+        -------
+        list of dict
+            One record per ELI, in order, with the keys 'eli', 'path', 'status'
+            ('downloaded', 'skipped' or 'failed') and 'error'.
+        """
+        if elis is None:
+            if start_year is None:
+                raise ValueError("Either elis or start_year must be given")
+            elis = self.enumerate_elis(start_year, end_year, types)
+        elis = list(dict.fromkeys(elis))
+
+        records = []
+        for eli in elis:
+            path = self.existing_path(self.eli_filename(eli)) if skip_existing else None
+            records.append({'eli': eli, 'path': path, 'status': 'skipped' if path else None, 'error': None})
+
+        todo = [record['eli'] for record in records if record['status'] is None]
+        errors = {}
+        paths = dict(zip(todo, self.download_items(self.download_eli, todo, max_workers=max_workers, job=job, errors=errors)))
+        for record in records:
+            if record['status'] is None:
+                record['path'] = paths[record['eli']]
+                record['error'] = errors.get(record['eli'])
+                record['status'] = 'downloaded' if record['path'] is not None else 'failed'
+        return records
 
 if __name__ == "__main__":
     downloader = LegiluxDownloader(download_dir='./tests/data/legilux', log_dir='./tests/metadata/logs')
@@ -0,0 +1,174 @@
+"""
+Durable manifest of batch download jobs.
+
+The manifest is a SQLite database recording, for each item of a job, its state
+(pending, done or failed), the path of the downloaded document, the number of
+attempts and the last error. Every change is committed immediately, so that a
+job interrupted by a crash can be resumed where it stopped.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobManifest:
+    """
+    Records the state of the items of a download job.
+
+    Attributes
+    ----------
+    path : str
+        Path of the SQLite database.
+    job : str
+        Name of the job. A database can hold several jobs.
+    """
+
+    def __init__(self, path, job):
+        """
+        Opens or creates the manifest of a job.
+
+        Parameters
+        ----------
+        path : str
+            Path of the SQLite database.
+        job : str
+            Name of the job.
+        """
+        self.path = path
+        self.job = job
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS items ('
+                'job TEXT NOT NULL, item TEXT NOT NULL, position INTEGER NOT NULL, state TEXT NOT NULL, '
+                'path TEXT, attempts INTEGER NOT NULL DEFAULT 0, error TEXT, updated REAL, '
+                'PRIMARY KEY (job, item))'
+            )
+
+    def register(self, items):
+        """
+        Adds items to the job as pending. Items already registered keep their state.
+
+        Parameters
+        ----------
+        items : list of str
+            Identifiers of the items.
+        """
+        with self._lock, self._connection:
+            (offset,) = self._connection.execute('SELECT COUNT(*) FROM items WHERE job = ?', (self.job,)).fetchone()
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO items (job, item, position, state, updated) VALUES (?, ?, ?, ?, ?)',
+                [(self.job, item, offset + position, PENDING, time.time()) for position, item in enumerate(items)]
+            )
+
+    def _update(self, item, state, path, error):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE items SET state = ?, path = ?, error = ?, attempts = attempts + 1, updated = ? WHERE job = ? AND item = ?',
+                (state, path, error, time.time(), self.job, item)
+            )
+
+    def complete(self, item, path):
+        """
+        Marks an item as downloaded.
+
+        Parameters
+        ----------
+        item : str
+            Identifier of the item.
+        path : str
+            Path of the downloaded document.
+        """
+        self._update(item, DONE, path, None)
+
+    def fail(self, item, error):
+        """
+        Marks an item as failed.
+
+        Parameters
+        ----------
+        item : str
+            Identifier of the item.
+        error : str
+            Description of the error.
+        """
+        self._update(item, FAILED, None, str(error))
+
+    def get(self, item):
+        """
+        Returns the record of an item.
+
+        Parameters
+        ----------
+        item : str
+            Identifier of the item.
+
+        Returns
+        -------
+        dict or None
+            Dictionary with the keys 'item', 'state', 'path', 'attempts' and 'error', or None if the item is not registered.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT item, state, path, attempts, error FROM items WHERE job = ? AND item = ?', (self.job, item)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(['item', 'state', 'path', 'attempts', 'error'], row))
+
+    def completed(self):
+        """
+        Returns the downloaded items whose document still exists on disk.
+
+        Returns
+        -------
+        dict
+            Dictionary mapping item identifiers to the paths of their documents.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT item, path FROM items WHERE job = ? AND state = ?', (self.job, DONE)
+            ).fetchall()
+        return {item: path for item, path in rows if path and os.path.exists(path)}
+
+    def status(self):
+        """
+        Reports the progress of the job.
+
+        Returns
+        -------
+        dict
+            Dictionary with the number of items in each state ('pending', 'done', 'failed'),
+            their 'total', the 'progress' as a fraction of done items, and the list of 'errors'
+            as (item, error) tuples.
+        """
+        with self._lock:
+            counts = dict(self._connection.execute(
+                'SELECT state, COUNT(*) FROM items WHERE job = ? GROUP BY state', (self.job,)
+            ).fetchall())
+            errors = self._connection.execute(
+                'SELECT item, error FROM items WHERE job = ? AND state = ? ORDER BY position', (self.job, FAILED)
+            ).fetchall()
+        status = {state: counts.get(state, 0) for state in (PENDING, DONE, FAILED)}
+        status['total'] = sum(status.values())
+        status['progress'] = status[DONE] / status['total'] if status['total'] else 0.0
+        status['errors'] = errors
+        return status
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._connection.close()
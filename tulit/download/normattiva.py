@@ -1,31 +1,121 @@
 from tulit.download.download import DocumentDownloader
 import requests
 import logging
+import csv
+import threading
+import time
 from datetime import datetime
 
 
 class NormattivaDownloader(DocumentDownloader):
-    def __init__(self, download_dir, log_dir):
-        super().__init__(download_dir, log_dir)
+    def __init__(self, download_dir, log_dir, cookie_ttl=1800, stale_cookie_age=600, **kwargs):
+        """
+        Initializes the downloader.
+
+        Parameters
+        ----------
+        download_dir : str
+            Directory where downloaded files will be saved.
+        log_dir : str
+            Directory where log files will be saved.
+        cookie_ttl : float, optional
+            Number of seconds after which the session cookies are fetched again. They are
+            reused until they expire otherwise. No limit if None.
+        stale_cookie_age : float, optional
+            Age in seconds from which an HTML answer is taken as a sign that the server
+            expired the session cookies. Younger cookies are kept, as Normattiva also
+            answers with an HTML page when the act does not exist. Only 401 and 403
+            answers refresh the cookies if None.
+        **kwargs
+            Additional arguments passed to `DocumentDownloader`.
+        """
+        super().__init__(download_dir, log_dir, **kwargs)
         self.endpoint = "https://www.normattiva.it/do/atto/caricaAKN"
+        self.eli_endpoint = "https://www.normattiva.it/eli/id/"
+        self.cookie_ttl = cookie_ttl
+        self.stale_cookie_age = stale_cookie_age
+        self._cookies = None
+        self._cookies_time = None
+        self._cookies_lock = threading.Lock()
     
     def build_request_url(self, params=None) -> str:
         """
         Build the request URL based on the source and parameters.
         """
-        uri = f"https://www.normattiva.it/eli/id/{params['date']}//{params['codiceRedaz']}/CONSOLIDATED"
+        uri = f"{self.eli_endpoint}{params['date']}//{params['codiceRedaz']}/CONSOLIDATED"
         # In case we want to use the NIR:URI instead of ELI
         #uri = f"https://www.normattiva.it/uri-res/N2Ls?urn:nir:stato:decreto.legislativo:{params['date']};{params['number']}"
         url = f"{self.endpoint}?dataGU={params['dataGU']}&codiceRedaz={params['codiceRedaz']}&dataVigenza={params['dataVigenza']}"
         
         return uri, url
                     
+    def get_cookies(self, uri, refresh=False):
+        """
+        Returns the session cookies of Normattiva, fetching them only when needed.
+
+        The cookies are obtained with a GET request to the ELI page of a document, and
+        reused for the following documents until they expire, the cookie_ttl elapses,
+        or a refresh is requested.
+
+        Parameters
+        ----------
+        uri : str
+            ELI of a document, requested to obtain the cookies.
+        refresh : bool, optional
+            Whether to fetch new cookies even if the current ones are still valid.
+
+        Returns
+        -------
+        requests.cookies.RequestsCookieJar
+            The session cookies.
+
+        Raises
+        ------
+        requests.RequestException
+            If there is an error sending the request.
+        """
+        with self._cookies_lock:
+            if refresh or not self._cookies_valid():
+                response = self.request("GET", uri)
+                response.raise_for_status()
+                self._cookies = response.cookies
+                self._cookies_time = time.monotonic()
+                response.close()
+            return self._cookies
+
+    def _cookies_valid(self):
+        """
+        Checks whether the session cookies can be reused.
+        """
+        if self._cookies is None:
+            return False
+        if self.cookie_ttl is not None and time.monotonic() - self._cookies_time > self.cookie_ttl:
+            return False
+        now = time.time()
+        return not any(getattr(cookie, 'expires', None) is not None and cookie.expires <= now for cookie in self._cookies)
+
+    def _rejected(self, response):
+        """
+        Checks whether the server rejected the session cookies.
+
+        The server rejects them with a 401 or 403 error, or with an HTML page instead of the
+        act. An HTML page is only taken as a rejection when the cookies are older than
+        stale_cookie_age, as it is also the answer for an unknown act.
+        """
+        if response.status_code in (401, 403):
+            return True
+        if 'text/html' not in response.headers.get('Content-Type', '') or self.stale_cookie_age is None:
+            return False
+        return time.monotonic() - self._cookies_time > self.stale_cookie_age
+
     def fetch_content(self, uri, url) -> requests.Response:
         """
         Send a GET request to download a file
 
         Parameters
         ----------
+        uri : str
+            The ELI of the document, used to obtain the session cookies.
         url : str
             The URL to send the request to.
 
@@ -34,34 +124,71 @@ class NormattivaDownloader(DocumentDownloader):
         requests.Response
             The response from the server.
 
+        Notes
+        -----
+        The session cookies are fetched once and reused across documents. If the server
+        rejects reused cookies, they are refreshed and the request is sent again. Otherwise
+        an HTML answer is returned as is, and `download_snapshot` reports the missing act.
+
         Raises
         ------
         requests.RequestException
             If there is an error sending the request.
         """
         try:
-            
-            # Make a GET request to the URI to get the cookies        
-            cookies_response = requests.get(uri)
-            cookies_response.raise_for_status()
-            cookies = cookies_response.cookies
-
             headers = {
                 'Accept': "text/xml",
                 'Accept-Encoding': "gzip, deflate, br, zstd",
                 'Accept-Language': "en-US,en;q=0.9",
                 
-            }                     
-            response = requests.get(url, headers=headers, cookies=cookies)
+            }
+            # No cookies are needed when the document is served from the cache
+            if self.offline:
+                response = self.request("GET", url, headers=headers, stream=True, cached=True)
+                response.raise_for_status()
+                return response
+
+            start = time.monotonic()
+            cookies = self.get_cookies(uri)
+            response = self.request("GET", url, headers=headers, cookies=cookies, stream=True, cached=True)
+            # Cookies fetched before this call may have expired on the server side
+            if self._cookies_time < start and self._rejected(response):
+                response.close()
+                cookies = self.get_cookies(uri, refresh=True)
+                response = self.request("GET", url, headers=headers, cookies=cookies, stream=True, cached=True)
             response.raise_for_status()
             return response
         except requests.RequestException as e:
             logging.error(f"Error sending GET request: {e}")
             return None    
         
-    def download(self, dataGU, codiceRedaz, dataVigenza = datetime.today().strftime('%Y%m%d')):     
-        document_paths = []
-        
+    def snapshot_filename(self, dataGU, codiceRedaz, dataVigenza):
+        """
+        Returns the filename, without extension, of a snapshot of an act.
+        """
+        return f"{dataGU}_{codiceRedaz}_VIGENZA_{dataVigenza}"
+
+    def download_snapshot(self, dataGU, codiceRedaz, dataVigenza=None):
+        """
+        Downloads an act as in force at a given date.
+
+        Parameters
+        ----------
+        dataGU : str
+            Date of publication in the Gazzetta Ufficiale, in the format YYYYMMDD.
+        codiceRedaz : str
+            Editorial code of the act.
+        dataVigenza : str, optional
+            Date at which the act is in force, in the format YYYYMMDD. Defaults to today.
+
+        Returns
+        -------
+        str or None
+            Path of the downloaded file, or None if there is no XML file for these parameters.
+        """
+        if dataVigenza is None:
+            dataVigenza = datetime.today().strftime('%Y%m%d')
+
         # Convert the dataGU to a datetime object
         dataGU = datetime.strptime(dataGU, '%Y%m%d')
             
@@ -75,16 +202,130 @@ class NormattivaDownloader(DocumentDownloader):
         }
         
         uri, url = self.build_request_url(params)
-        response = self.fetch_content(uri, url)
-        
-        # If the response in HTML, raise an error saying that the date or codiceRedaz is wrong
-        if 'text/html' in response.headers.get('Content-Type', ''):
-            logging.error(f"Error downloading document: there is not an XML file with the following parameters: {params}")
+        with self.host_slot(url):
+            response = self.fetch_content(uri, url)
+            if response is None:
+                return None
+            
+            # If the response in HTML, raise an error saying that the date or codiceRedaz is wrong
+            if 'text/html' in response.headers.get('Content-Type', ''):
+                logging.error(f"Error downloading document: there is not an XML file with the following parameters: {params}")
+                response.close()
+                return None
+            
+            return self.handle_response(response=response, filename=self.snapshot_filename(params['dataGU'], codiceRedaz, dataVigenza))
+
+    def download(self, dataGU, codiceRedaz, dataVigenza=None):
+        """
+        Downloads an act as in force at a given date.
+
+        Parameters
+        ----------
+        dataGU : str
+            Date of publication in the Gazzetta Ufficiale, in the format YYYYMMDD.
+        codiceRedaz : str
+            Editorial code of the act.
+        dataVigenza : str, optional
+            Date at which the act is in force, in the format YYYYMMDD. Defaults to today.
+
+        Returns
+        -------
+        list or None
+            List with the path of the downloaded file, or None if it could not be downloaded.
+        """
+        file_path = self.download_snapshot(dataGU, codiceRedaz, dataVigenza)
+        if file_path is None:
             return None
-        
-        file_path = self.handle_response(response=response, filename=f"{params['dataGU']}_{params['codiceRedaz']}_VIGENZA_{params['dataVigenza']}")
-        document_paths.append(file_path)
-        return document_paths
+        return [file_path]
+
+    @staticmethod
+    def read_acts(csv_path):
+        """
+        Reads a list of acts from a CSV file.
+
+        Parameters
+        ----------
+        csv_path : str
+            Path of a CSV file with a header row and the columns 'dataGU', 'codiceRedaz' and,
+            optionally, 'dataVigenza'. Several dates can be given in one cell, separated by ';'.
+
+        Returns
+        -------
+        list of dict
+            The acts, with the keys 'dataGU', 'codiceRedaz' and 'dataVigenza' (a list of dates, possibly empty).
+        """
+        acts = []
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                dates = [date.strip() for date in (row.get('dataVigenza') or '').split(';') if date.strip()]
+                acts.append({'dataGU': row['dataGU'].strip(), 'codiceRedaz': row['codiceRedaz'].strip(), 'dataVigenza': dates})
+        return acts
+
+    def download_many(self, acts, dataVigenza=None, max_workers=4, skip_existing=True, job=None):
+        """
+        Downloads many acts, each at one or more dates, concurrently.
+
+        Parameters
+        ----------
+        acts : list or str
+            The acts to download, or the path of a CSV file read with `read_acts`. Each act is a
+            dictionary with the keys 'dataGU', 'codiceRedaz' and optionally 'dataVigenza', or a
+            tuple (dataGU, codiceRedaz) or (dataGU, codiceRedaz, dataVigenza). The dataVigenza of
+            an act is a date or a list of dates, in the format YYYYMMDD.
+        dataVigenza : str or list of str, optional
+            Dates used for the acts that do not specify any. Defaults to today.
+        max_workers : int, optional
+            Number of documents downloaded concurrently. The number of concurrent
+            downloads from Normattiva is further capped by max_per_host.
+        skip_existing : bool, optional
+            Whether snapshots already saved in the download directory are skipped.
+        job : str, optional
+            Name of a resumable job, see `DocumentDownloader.download_items`.
+
+        Returns
+        -------
+        list of dict
+            One record per snapshot, in the order of the acts, with the keys 'dataGU', 'codiceRedaz',
+            'dataVigenza', 'path', 'status' ('downloaded', 'skipped' or 'failed') and 'error'.
+        """
+        if isinstance(acts, str):
+            acts = self.read_acts(acts)
+        if dataVigenza is None:
+            dataVigenza = datetime.today().strftime('%Y%m%d')
+        default_dates = [dataVigenza] if isinstance(dataVigenza, str) else list(dataVigenza)
+
+        # Expand the acts to one snapshot per date, fetched only once
+        snapshots = []
+        for act in acts:
+            if isinstance(act, dict):
+                dataGU, codiceRedaz, dates = act['dataGU'], act['codiceRedaz'], act.get('dataVigenza')
+            else:
+                dataGU, codiceRedaz, dates = act[0], act[1], act[2] if len(act) > 2 else None
+            if isinstance(dates, str):
+                dates = [dates]
+            for date in dates or default_dates:
+                snapshots.append((dataGU, codiceRedaz, date))
+        snapshots = list(dict.fromkeys(snapshots))
+
+        records = []
+        for snapshot in snapshots:
+            path = self.existing_path(self.snapshot_filename(*snapshot)) if skip_existing else None
+            records.append({
+                'dataGU': snapshot[0], 'codiceRedaz': snapshot[1], 'dataVigenza': snapshot[2],
+                'path': path, 'status': 'skipped' if path else None, 'error': None
+            })
+
+        todo = [snapshot for snapshot, record in zip(snapshots, records) if record['status'] is None]
+        errors = {}
+        key = lambda snapshot: self.snapshot_filename(*snapshot)
+        paths = self.download_items(lambda snapshot: self.download_snapshot(*snapshot), todo, max_workers=max_workers, job=job, key=key, errors=errors)
+        downloaded = dict(zip(todo, paths))
+        for snapshot, record in zip(snapshots, records):
+            if record['status'] is None:
+                record['path'] = downloaded[snapshot]
+                record['error'] = errors.get(key(snapshot))
+                record['status'] = 'downloaded' if record['path'] is not None else 'failed'
+        return records
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+"""
+Record and replay of HTTP exchanges.
+
+`RecordReplayAdapter` is a transport adapter for `requests` sessions. In record mode
+it saves every response received to a cassette directory; in replay mode it answers
+the requests from the cassette without any network access. Downloads can thus be
+recorded once against the live endpoints, then replayed offline and reproducibly.
+
+Usage
+-----
+>>> downloader = CellarDownloader(download_dir='./data', log_dir='./logs')
+>>> RecordReplayAdapter('./tests/cassettes', mode='auto').mount(downloader.session)
+"""
+
+import io
+import os
+import json
+import hashlib
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from tulit.download.cache import DocumentUnavailable
+
+# Headers describing the encoding on the wire, which no longer applies to the saved body
+HOP_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive')
+
+
+class RecordReplayAdapter(HTTPAdapter):
+    """
+    Transport adapter recording responses to, and replaying them from, a cassette directory.
+
+    Attributes
+    ----------
+    cassette_dir : str
+        Directory where the exchanges are saved.
+    mode : str
+        'record' to always send the requests and save the responses, 'replay' to answer
+        only from the cassette, or 'auto' to replay the saved exchanges and record the others.
+    """
+
+    def __init__(self, cassette_dir, mode='auto', **kwargs):
+        """
+        Initializes the adapter.
+
+        Parameters
+        ----------
+        cassette_dir : str
+            Directory where the exchanges are saved. It is created if it does not exist.
+        mode : str, optional
+            'record', 'replay' or 'auto'.
+        **kwargs
+            Additional arguments passed to `requests.adapters.HTTPAdapter`, e.g. pool_maxsize.
+        """
+        if mode not in ('record', 'replay', 'auto'):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'record', 'replay' or 'auto'")
+        super().__init__(**kwargs)
+        self.cassette_dir = cassette_dir
+        self.mode = mode
+        os.makedirs(cassette_dir, exist_ok=True)
+
+    def mount(self, session):
+        """
+        Routes all the HTTP and HTTPS requests of a session through the adapter.
+
+        Parameters
+        ----------
+        session : requests.Session
+            The session, e.g. the `session` attribute of a downloader.
+        """
+        session.mount('http://', self)
+        session.mount('https://', self)
+
+    @staticmethod
+    def key(request):
+        """
+        Returns the key of a request in the cassette, computed from its method, URL and body.
+
+        Parameters
+        ----------
+        request : requests.PreparedRequest
+            The request.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256()
+        for part in (request.method.encode('ascii'), request.url.encode('utf-8'), body):
+            digest.update(part)
+            digest.update(b'\0')
+        return digest.hexdigest()[:32]
+
+    def _paths(self, key):
+        return os.path.join(self.cassette_dir, f"{key}.json"), os.path.join(self.cassette_dir, f"{key}.body")
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """
+        Sends a request, or answers it from the cassette.
+
+        Raises
+        ------
+        DocumentUnavailable
+            In replay mode, if the request was not recorded.
+        """
+        key = self.key(request)
+        meta_path, body_path = self._paths(key)
+        if self.mode != 'record' and os.path.exists(meta_path):
+            return self._replay(request, meta_path, body_path)
+        if self.mode == 'replay':
+            raise DocumentUnavailable(f"No recorded response for {request.method} {request.url}", request=request)
+
+        response = super().send(request, stream=False, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        self._record(request, response, meta_path, body_path)
+        return response
+
+    def _record(self, request, response, meta_path, body_path):
+        meta = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': [[name, value] for name, value in response.headers.items() if name.lower() not in HOP_HEADERS]
+        }
+        # Write the body first, so a cassette entry is never visible without it
+        with open(f"{body_path}.tmp", 'wb') as f:
+            f.write(response.content)
+        os.replace(f"{body_path}.tmp", body_path)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=1)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def _replay(self, request, meta_path, body_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+        headers = meta['headers'] + [['Content-Length', str(len(body))]]
+        raw = HTTPResponse(
+            body=io.BytesIO(body), headers=headers, status=meta['status'], reason=meta['reason'],
+            preload_content=False, decode_content=False, request_method=request.method
+        )
+        return self.build_response(request, raw)
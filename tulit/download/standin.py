@@ -0,0 +1,345 @@
+"""
+Local stand-in for the remote endpoints used by the downloaders.
+
+`StandInServer` is a small HTTP server emulating:
+
+- the CELLAR REST API, with content negotiation between zip archives and single XML files;
+- the Normattiva flow, where the ELI page sets a session cookie that is required to download the Akoma Ntoso file;
+- the Legilux ELIs, each serving the XML file of an act;
+- the SPARQL endpoint of the Publications Office.
+
+Latency, bandwidth and errors can be injected, so that the concurrency, connection
+pooling and retry behaviour of the downloaders can be tested and benchmarked
+reproducibly without network access.
+
+Usage
+-----
+>>> with StandInServer(documents={'abc.0006.04/DOC_1': b'<ACT/>'}, latency=0.05) as server:
+...     downloader = CellarDownloader(download_dir='./data', log_dir='./logs')
+...     server.configure(downloader)
+...     downloader.download_item('abc.0006.04/DOC_1')
+"""
+
+import io
+import json
+import time
+import uuid
+import random
+import zipfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from http.cookies import SimpleCookie
+from urllib.parse import urlparse, parse_qs
+
+
+class StandInServer:
+    """
+    HTTP server emulating CELLAR, Normattiva, Legilux and the SPARQL endpoint.
+
+    Attributes
+    ----------
+    documents : dict
+        CELLAR ids mapped to their content: bytes for a single XML file, or a dictionary
+        mapping member names to bytes for a document served as a zip archive.
+    etags : dict
+        CELLAR ids mapped to the ETag of their document. Requests whose If-None-Match
+        header matches it are answered with 304 (Not Modified).
+    acts : dict
+        Normattiva acts, as 'dataGU_codiceRedaz' keys mapped to their Akoma Ntoso content.
+    legilux_acts : dict
+        Legilux acts, as ELI paths (e.g. 'eli/etat/leg/loi/2006/07/31/n2/jo') mapped to their
+        XML content, served under `legilux_endpoint`.
+    sparql_results : dict or callable
+        JSON results of the SPARQL endpoint, or a function returning them for a query.
+    latency : float
+        Seconds waited before answering each request.
+    bandwidth : float or None
+        Bytes per second at which response bodies are sent. Unlimited if None.
+    error_rate : float
+        Probability of answering a request with error_status.
+    error_status : int
+        Status of the injected errors.
+    statuses : list
+        Statuses answered in turn to the next requests, as injected errors, before they are
+        served normally again.
+    retry_after : int or None
+        Value of the Retry-After header of the injected errors.
+    stats : dict
+        Counters of the requests served: 'requests', 'errors', 'bytes', 'max_in_flight' and 'sessions'.
+    history : list
+        Headers of the requests served, in the order they were received.
+    """
+
+    def __init__(self, documents=None, etags=None, acts=None, legilux_acts=None, sparql_results=None, latency=0.0, bandwidth=None,
+                 error_rate=0.0, error_status=503, statuses=None, retry_after=None, seed=0, host='127.0.0.1', port=0):
+        """
+        Initializes the server. It is started by `start` or by entering it as a context manager.
+
+        Parameters
+        ----------
+        documents : dict, optional
+            CELLAR documents, see the attribute.
+        etags : dict, optional
+            ETags of the CELLAR documents, see the attribute. Documents without an ETag are always sent.
+        acts : dict, optional
+            Normattiva acts, see the attribute.
+        legilux_acts : dict, optional
+            Legilux acts, see the attribute.
+        sparql_results : dict or callable, optional
+            SPARQL results, see the attribute. Defaults to empty results.
+        latency : float, optional
+            Seconds waited before answering each request.
+        bandwidth : float, optional
+            Bytes per second at which response bodies are sent.
+        error_rate : float, optional
+            Probability of answering a request with error_status.
+        error_status : int, optional
+            Status of the injected errors.
+        statuses : list, optional
+            Statuses answered in turn to the next requests, see the attribute.
+        retry_after : int, optional
+            Value of the Retry-After header of the injected errors.
+        seed : int, optional
+            Seed of the random generator deciding the injected errors, for reproducible runs.
+        host : str, optional
+            Address to listen on.
+        port : int, optional
+            Port to listen on. A free port is chosen if 0.
+        """
+        self.documents = documents or {}
+        self.etags = etags or {}
+        self.acts = acts or {}
+        self.legilux_acts = legilux_acts or {}
+        self.sparql_results = sparql_results if sparql_results is not None else {'head': {'vars': []}, 'results': {'bindings': []}}
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.statuses = list(statuses or [])
+        self.retry_after = retry_after
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0, 'max_in_flight': 0, 'sessions': 0}
+        self.history = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._sessions = set()
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self):
+        """
+        Base URL of the server.
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def cellar_endpoint(self):
+        return f"{self.url}/resource/cellar/"
+
+    @property
+    def normattiva_endpoint(self):
+        return f"{self.url}/do/atto/caricaAKN"
+
+    @property
+    def normattiva_eli(self):
+        return f"{self.url}/eli/id/"
+
+    @property
+    def legilux_endpoint(self):
+        return f"{self.url}/legilux/"
+
+    @property
+    def sparql_endpoint(self):
+        return f"{self.url}/webapi/rdf/sparql"
+
+    def configure(self, downloader):
+        """
+        Points a downloader to the server.
+
+        Parameters
+        ----------
+        downloader : DocumentDownloader
+            A CELLAR, Normattiva or Legilux downloader. Legilux acts are requested by their
+            ELI, so only the SPARQL endpoint of a Legilux downloader is changed.
+        """
+        if hasattr(downloader, 'eli_endpoint'):
+            downloader.endpoint = self.normattiva_endpoint
+            downloader.eli_endpoint = self.normattiva_eli
+        elif hasattr(downloader, 'sparql_endpoint'):
+            downloader.sparql_endpoint = self.sparql_endpoint
+        else:
+            downloader.endpoint = self.cellar_endpoint
+
+    def expire_sessions(self):
+        """
+        Invalidates the Normattiva session cookies, as the server does when they expire.
+        """
+        with self._lock:
+            self._sessions.clear()
+
+    def start(self):
+        """
+        Starts serving requests in a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the server.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(_StandInHandler):
+            standin = server
+
+        return Handler
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    standin = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle(None)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._handle(self.rfile.read(length))
+
+    def _handle(self, body):
+        standin = self.standin
+        with standin._lock:
+            standin.stats['requests'] += 1
+            standin.history.append(dict(self.headers))
+            standin._in_flight += 1
+            standin.stats['max_in_flight'] = max(standin.stats['max_in_flight'], standin._in_flight)
+            if standin.statuses:
+                error_status = standin.statuses.pop(0)
+            elif standin._random.random() < standin.error_rate:
+                error_status = standin.error_status
+            else:
+                error_status = None
+        try:
+            if standin.latency:
+                time.sleep(standin.latency)
+            if error_status is not None:
+                with standin._lock:
+                    standin.stats['errors'] += 1
+                headers = {'Retry-After': str(standin.retry_after)} if standin.retry_after is not None else {}
+                self._send(error_status, 'text/plain', b'injected error', headers)
+                return
+
+            url = urlparse(self.path)
+            if url.path.startswith('/resource/cellar/'):
+                self._cellar(url.path[len('/resource/cellar/'):])
+            elif url.path.startswith('/eli/id/'):
+                self._eli_page()
+            elif url.path == '/do/atto/caricaAKN':
+                self._akn(parse_qs(url.query))
+            elif url.path.startswith('/legilux/'):
+                self._legilux(url.path[len('/legilux/'):])
+            elif url.path == '/webapi/rdf/sparql':
+                params = parse_qs(url.query)
+                if body:
+                    params.update(parse_qs(body.decode('utf-8')))
+                self._sparql(params.get('query', [''])[0])
+            else:
+                self._send(404, 'text/plain', b'not found')
+        finally:
+            with standin._lock:
+                standin._in_flight -= 1
+
+    def _cellar(self, cellar_id):
+        document = self.standin.documents.get(cellar_id)
+        if document is None:
+            self._send(404, 'text/plain', b'not found')
+            return
+        etag = self.standin.etags.get(cellar_id)
+        headers = {'ETag': etag} if etag is not None else {}
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self._send(304, 'text/plain', b'', headers)
+            return
+        if isinstance(document, bytes):
+            self._send(200, 'application/xml;mtype=fmx4', document, headers)
+            return
+        # Documents made of several files are only available as zip archives
+        if 'zip' not in self.headers.get('Accept', '') and '*' not in self.headers.get('Accept', ''):
+            self._send(406, 'text/plain', b'not acceptable')
+            return
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name, content in document.items():
+                z.writestr(name, content)
+        self._send(200, 'application/zip;mtype=fmx4', archive.getvalue(), headers)
+
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return cookie['JSESSIONID'].value if 'JSESSIONID' in cookie else None
+
+    def _eli_page(self):
+        session = uuid.uuid4().hex
+        with self.standin._lock:
+            self.standin._sessions.add(session)
+            self.standin.stats['sessions'] += 1
+        self._send(200, 'text/html', b'<html><body>Atto</body></html>', {'Set-Cookie': f"JSESSIONID={session}; Path=/"})
+
+    def _akn(self, params):
+        with self.standin._lock:
+            valid = self._session() in self.standin._sessions
+        key = f"{params.get('dataGU', [''])[0]}_{params.get('codiceRedaz', [''])[0]}"
+        act = self.standin.acts.get(key)
+        # Without a valid session, or for an unknown act, Normattiva answers with an HTML page
+        if not valid or act is None:
+            self._send(200, 'text/html', b'<html><body>Errore</body></html>')
+            return
+        self._send(200, 'text/xml', act)
+
+    def _legilux(self, eli):
+        act = self.standin.legilux_acts.get(eli)
+        if act is None:
+            self._send(404, 'text/plain', b'not found')
+            return
+        self._send(200, 'application/xml', act)
+
+    def _sparql(self, query):
+        results = self.standin.sparql_results
+        if callable(results):
+            results = results(query)
+        self._send(200, 'application/sparql-results+json', json.dumps(results).encode('utf-8'))
+
+    def _send(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        bandwidth = self.standin.bandwidth
+        chunk_size = 16 * 1024
+        for start in range(0, len(body), chunk_size):
+            chunk = body[start:start + chunk_size]
+            self.wfile.write(chunk)
+            if bandwidth:
+                time.sleep(len(chunk) / bandwidth)
+        with self.standin._lock:
+            self.standin.stats['bytes'] += len(body)
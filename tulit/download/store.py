@@ -0,0 +1,247 @@
+"""
+Content-addressed store of downloaded documents.
+
+Every downloaded file is stored once as an object named by the SHA-256 hash of its
+content, whatever the number of identifiers it was downloaded under. A small SQLite
+table maps each identifier (a CELLAR id, a Normattiva snapshot, an ELI, ...) to the
+hashes of its files, so checking whether a document was already downloaded is a single
+primary-key lookup. The usual paths in the download directory are hard links to the
+objects, so identical documents take the disk space of one copy.
+"""
+
+import os
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+from tulit.compression import strip_compression_extension
+
+
+# Extensions made of several suffixes, kept whole
+COMPOUND_EXTENSIONS = ('fmx.xml',)
+
+
+def file_extension(name):
+    """
+    Returns the extension of a file, including the suffix of its compression method.
+
+    Dots inside the name are not taken as the start of the extension, so that the
+    extension of 'L_2024.0001.fmx.xml.gz' is 'fmx.xml.gz'.
+
+    Parameters
+    ----------
+    name : str
+        Name or path of the file.
+
+    Returns
+    -------
+    str
+        The extension, without the leading dot. Empty if the file has none.
+    """
+    name = os.path.basename(name)
+    base = strip_compression_extension(name)
+    compression = name[len(base):]
+    for extension in COMPOUND_EXTENSIONS:
+        if base.endswith(f".{extension}") and len(base) > len(extension) + 1:
+            return f"{extension}{compression}"
+    extension = os.path.splitext(base)[1]
+    return f"{extension[1:]}{compression}" if extension else compression.lstrip('.')
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """
+    Computes the SHA-256 hash of the content of a file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file.
+    chunk_size : int, optional
+        Size in bytes of the chunks read from the file.
+
+    Returns
+    -------
+    str
+        The hexadecimal hash.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """
+    Store of documents addressed by the hash of their content.
+
+    Attributes
+    ----------
+    root : str
+        Directory of the store, holding the objects and the index.
+    """
+
+    def __init__(self, root):
+        """
+        Opens or creates a store.
+
+        Parameters
+        ----------
+        root : str
+            Directory of the store. It is created if it does not exist.
+        """
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'id TEXT NOT NULL, name TEXT NOT NULL, hash TEXT NOT NULL, extension TEXT NOT NULL, '
+                'PRIMARY KEY (id, name))'
+            )
+
+    def object_path(self, content_hash, extension=''):
+        """
+        Returns the path of an object.
+
+        Parameters
+        ----------
+        content_hash : str
+            SHA-256 hash of the content.
+        extension : str, optional
+            Extension of the object, e.g. 'xml' or 'xml.gz', kept so that the object can be read by type.
+
+        Returns
+        -------
+        str
+            Path of the object.
+        """
+        name = f"{content_hash}.{extension}" if extension else content_hash
+        return os.path.join(self.root, 'objects', content_hash[:2], name)
+
+    def has_object(self, content_hash, extension=''):
+        """
+        Checks whether an object is in the store.
+        """
+        return os.path.exists(self.object_path(content_hash, extension))
+
+    def put(self, path, content_hash=None, extension=''):
+        """
+        Moves a file into the store. If the store already holds the same content, the file is deleted.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file.
+        content_hash : str, optional
+            SHA-256 hash of the content, computed if None.
+        extension : str, optional
+            Extension of the object.
+
+        Returns
+        -------
+        str
+            Path of the object.
+        """
+        if content_hash is None:
+            content_hash = file_hash(path)
+        object_path = self.object_path(content_hash, extension)
+        if os.path.exists(object_path):
+            os.remove(path)
+            return object_path
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        os.replace(path, object_path)
+        return object_path
+
+    @staticmethod
+    def link(object_path, target_path):
+        """
+        Makes a file available at a path as a hard link to an object, or as a copy if hard links are not supported.
+
+        Parameters
+        ----------
+        object_path : str
+            Path of the object.
+        target_path : str
+            Path where the file is made available. An existing file is replaced atomically.
+        """
+        directory = os.path.dirname(target_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f".{os.path.basename(target_path)}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            os.link(object_path, tmp_path)
+        except OSError:
+            shutil.copyfile(object_path, tmp_path)
+        os.replace(tmp_path, target_path)
+
+    def record(self, id, entries):
+        """
+        Maps an identifier to the objects of its files, replacing any previous mapping.
+
+        Parameters
+        ----------
+        id : str
+            Identifier of the document.
+        entries : list of tuple
+            (name, hash, extension) of each file. The name is the path of the file relative to
+            the folder of the document, or '' for a document made of a single file.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM entries WHERE id = ?', (id,))
+            self._connection.executemany(
+                'INSERT INTO entries (id, name, hash, extension) VALUES (?, ?, ?, ?)',
+                [(id, name, content_hash, extension) for name, content_hash, extension in entries]
+            )
+
+    def contains(self, id):
+        """
+        Checks whether a document is in the store.
+
+        Parameters
+        ----------
+        id : str
+            Identifier of the document.
+
+        Returns
+        -------
+        bool
+            True if the document was stored.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT 1 FROM entries WHERE id = ? LIMIT 1', (id,)).fetchone()
+        return row is not None
+
+    def get(self, id):
+        """
+        Returns the objects of a document.
+
+        Parameters
+        ----------
+        id : str
+            Identifier of the document.
+
+        Returns
+        -------
+        list of tuple
+            (name, object path) of each file of the document, sorted by name. Empty if the document is not in the store.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT name, hash, extension FROM entries WHERE id = ? ORDER BY name', (id,)
+            ).fetchall()
+        return [(name, self.object_path(content_hash, extension)) for name, content_hash, extension in rows]
+
+    def close(self):
+        """
+        Closes the index.
+        """
+        with self._lock:
+            self._connection.close()
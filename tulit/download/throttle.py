@@ -0,0 +1,263 @@
+"""
+Retry scheduling and adaptive rate control for remote endpoints.
+
+`RetryPolicy` decides whether a failed request is retried and how long to wait
+before retrying it: the Retry-After header of the server when there is one,
+otherwise an exponential backoff with full jitter.
+
+`AdaptiveLimiter` bounds the number of requests sent at the same time to a host,
+and adjusts the bound AIMD-style (additive increase, multiplicative decrease):
+the bound grows by one after a full window of successful requests, and is halved
+when the server throttles (429, 503) or when the latency rises well above the
+best latency observed. The bound thus settles around the highest rate the
+endpoint tolerates.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from tulit.download.cache import DocumentUnavailable
+
+# Statuses meaning that the server is overloaded and asks the client to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+class RetryPolicy:
+    """
+    Retry policy with exponential backoff and jitter.
+
+    Attributes
+    ----------
+    max_retries : int
+        Maximum number of retries of a request.
+    backoff_factor : float
+        Base delay in seconds. The delay before the n-th retry is drawn uniformly
+        between 0 and backoff_factor * 2 ** n.
+    max_backoff : float
+        Maximum delay in seconds, including delays requested with Retry-After.
+    statuses : tuple of int
+        Response statuses that are retried.
+    exceptions : tuple of type
+        Exceptions that are retried.
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=60, statuses=(429, 500, 502, 503, 504),
+                 exceptions=(requests.ConnectionError, requests.Timeout)):
+        """
+        Initializes the retry policy.
+
+        Parameters
+        ----------
+        max_retries : int, optional
+            Maximum number of retries of a request. No request is retried if 0.
+        backoff_factor : float, optional
+            Base delay in seconds of the exponential backoff.
+        max_backoff : float, optional
+            Maximum delay in seconds.
+        statuses : tuple of int, optional
+            Response statuses that are retried.
+        exceptions : tuple of type, optional
+            Exceptions that are retried.
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.exceptions = exceptions
+
+    def should_retry(self, attempt, response=None, error=None):
+        """
+        Returns whether a request is retried.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of attempts already made, starting at 1.
+        response : requests.Response, optional
+            The response of the last attempt.
+        error : Exception, optional
+            The exception raised by the last attempt.
+
+        Returns
+        -------
+        bool
+            True if the request is retried.
+        """
+        if attempt > self.max_retries:
+            return False
+        if error is not None:
+            # Documents missing from the local copies are not going to appear
+            return isinstance(error, self.exceptions) and not isinstance(error, DocumentUnavailable)
+        return response is not None and response.status_code in self.statuses
+
+    def delay(self, attempt, response=None):
+        """
+        Returns the delay before the next attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            Number of attempts already made, starting at 1.
+        response : requests.Response, optional
+            The response of the last attempt. Its Retry-After header takes precedence over the backoff.
+
+        Returns
+        -------
+        float
+            Delay in seconds.
+        """
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1)))
+
+
+def retry_after_seconds(response):
+    """
+    Parses the Retry-After header of a response.
+
+    Parameters
+    ----------
+    response : requests.Response or None
+        The response.
+
+    Returns
+    -------
+    float or None
+        Number of seconds to wait, or None if the header is missing or invalid.
+    """
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter for the requests sent to a host.
+
+    Attributes
+    ----------
+    limit : float
+        Current number of requests allowed at the same time.
+    minimum : int
+        Lowest limit.
+    maximum : int
+        Highest limit.
+    decrease : float
+        Factor applied to the limit when the host is congested.
+    latency_tolerance : float
+        The host is considered congested when the latency exceeds the best latency
+        observed times this factor. The latency is not used if None.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, decrease=0.5, latency_tolerance=4.0):
+        """
+        Initializes the limiter.
+
+        Parameters
+        ----------
+        initial : int, optional
+            Initial limit.
+        minimum : int, optional
+            Lowest limit.
+        maximum : int, optional
+            Highest limit.
+        decrease : float, optional
+            Factor applied to the limit when the host is congested.
+        latency_tolerance : float, optional
+            Ratio of the latency to the best latency above which the host is considered congested.
+        """
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._issued = 0
+        self._last_decrease = 0
+        self._successes = 0
+        self._latency = None
+        self._best_latency = None
+        self._resume_at = 0.0
+
+    def acquire(self):
+        """
+        Waits for a free slot, and for the end of any pause requested by the host.
+
+        Returns
+        -------
+        int
+            Ticket of the request, to pass to `release`.
+        """
+        with self._condition:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait <= 0 and self._in_flight < int(self.limit):
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            self._in_flight += 1
+            self._issued += 1
+            return self._issued
+
+    def release(self, ticket, status=None, latency=None):
+        """
+        Frees a slot and adjusts the limit to the outcome of the request.
+
+        Parameters
+        ----------
+        ticket : int
+            Ticket returned by `acquire`.
+        status : int, optional
+            Status of the response, or None if the request failed without a response.
+        latency : float, optional
+            Time in seconds until the response was received.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            congested = status in THROTTLE_STATUSES
+            if latency is not None and status is not None and not congested:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                if self._best_latency is None or self._latency < self._best_latency:
+                    self._best_latency = self._latency
+                if self.latency_tolerance is not None and self._latency > self.latency_tolerance * self._best_latency:
+                    congested = True
+
+            if congested:
+                # Responses to requests sent before the last decrease do not decrease the limit again
+                if ticket > self._last_decrease:
+                    self.limit = max(float(self.minimum), self.limit * self.decrease)
+                    self._last_decrease = self._issued
+                    self._successes = 0
+            elif status is not None:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(float(self.maximum), self.limit + 1)
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def pause(self, seconds):
+        """
+        Stops sending requests to the host for a while, e.g. as requested with Retry-After.
+
+        Parameters
+        ----------
+        seconds : float
+            Duration of the pause.
+        """
+        with self._condition:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+            self._condition.notify_all()
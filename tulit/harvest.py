@@ -0,0 +1,252 @@
+"""
+Harvesting of the acts published in the Official Journal over a date range.
+
+A single query for all the acts of several years exceeds the limits of the SPARQL
+endpoint or times out. `OJHarvester` splits the date range into windows, and bisects
+any window holding more results than a threshold until each window can be fetched with
+one query. Windows are queried concurrently, the results are deduplicated, and every
+completed window is checkpointed, so that an interrupted harvest resumes where it stopped.
+
+Usage
+-----
+>>> harvester = OJHarvester(checkpoint_dir='./data/harvest')
+>>> acts = harvester.harvest(date(2023, 1, 1), date(2024, 12, 31))
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from tulit.sparql import ENDPOINT, get_results_table, iter_results, normalize_query
+
+# Acts published in the Official Journal with a document date in [{start}, {end})
+ACTS_QUERY = """PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+SELECT DISTINCT ?work ?celex ?date
+WHERE {{
+    ?work cdm:resource_legal_published_in_official-journal ?oj ;
+          cdm:resource_legal_id_celex ?celex ;
+          cdm:work_date_document ?date .
+    FILTER(?date >= "{start}"^^xsd:date && ?date < "{end}"^^xsd:date)
+}}
+ORDER BY ?work"""
+
+
+class OJHarvester:
+    """
+    Harvester of the results of a SPARQL query over a date range, split into adaptive windows.
+
+    Attributes
+    ----------
+    query : str
+        Query template with {start} and {end} placeholders, the dates (ISO format) delimiting
+        a window, the end excluded. It must be ordered, see `tulit.sparql.paginate_query`.
+    endpoint : str
+        URL of the SPARQL endpoint.
+    window_days : int
+        Number of days of the initial windows.
+    max_results : int
+        Maximum number of results of a window. Larger windows are bisected.
+    max_workers : int
+        Number of windows queried concurrently.
+    checkpoint_dir : str or None
+        Directory where the results of each completed window are saved. No checkpoints if None.
+    key : str
+        Variable identifying a result, used to deduplicate the results of overlapping windows.
+    stats : dict
+        Counters of the last harvest: 'queries', 'bisections' and 'resumed' windows.
+    """
+
+    def __init__(self, query=ACTS_QUERY, endpoint=ENDPOINT, window_days=31, max_results=10000,
+                 max_workers=4, checkpoint_dir=None, key='work', cache=None):
+        """
+        Initializes the harvester.
+
+        Parameters
+        ----------
+        query : str, optional
+            Query template, see the attribute. Defaults to the acts published in the Official Journal.
+        endpoint : str, optional
+            URL of the SPARQL endpoint.
+        window_days : int, optional
+            Number of days of the initial windows.
+        max_results : int, optional
+            Maximum number of results of a window.
+        max_workers : int, optional
+            Number of windows queried concurrently.
+        checkpoint_dir : str, optional
+            Directory of the checkpoints. It is created if it does not exist.
+        key : str, optional
+            Variable identifying a result.
+        cache : SparqlCache, optional
+            Cache of the results of each query.
+        """
+        self.query = query
+        self.endpoint = endpoint
+        self.window_days = window_days
+        self.max_results = max_results
+        self.max_workers = max_workers
+        self.checkpoint_dir = checkpoint_dir
+        self.key = key
+        self.cache = cache
+        self.stats = {'queries': 0, 'bisections': 0, 'resumed': 0}
+        self._lock = threading.Lock()
+        if checkpoint_dir is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def windows(self, start, end):
+        """
+        Splits a date range into the initial windows.
+
+        Parameters
+        ----------
+        start : datetime.date
+            First day of the range.
+        end : datetime.date
+            Last day of the range, included.
+
+        Returns
+        -------
+        list of tuple
+            (start, end) of each window, the end excluded.
+        """
+        windows = []
+        stop = end + timedelta(days=1)
+        while start < stop:
+            window_end = min(start + timedelta(days=self.window_days), stop)
+            windows.append((start, window_end))
+            start = window_end
+        return windows
+
+    def fingerprint(self):
+        """
+        Returns a short hash of the query, the endpoint and the threshold.
+
+        The checkpoints of a window only hold for the harvest that wrote them, so their
+        names include the fingerprint: a harvest with another query, endpoint or max_results
+        in the same directory does not resume from them.
+        """
+        digest = hashlib.sha256()
+        for part in (normalize_query(self.query), self.endpoint, str(self.max_results)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()[:16]
+
+    def checkpoint_path(self, window):
+        """
+        Returns the path of the checkpoint of a window, or None without a checkpoint directory.
+        """
+        if self.checkpoint_dir is None:
+            return None
+        start, end = window
+        return os.path.join(self.checkpoint_dir, f"{start.isoformat()}_{end.isoformat()}_{self.fingerprint()}.json")
+
+    def _load(self, window):
+        path = self.checkpoint_path(window)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save(self, window, bindings):
+        # Bisected windows are checkpointed too, so that they are not queried again on resume
+        path = self.checkpoint_path(window)
+        if path is None:
+            return
+        tmp_path = f"{path}.{uuid.uuid4().hex[:12]}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'bisected': bindings is None, 'bindings': bindings or []}, f)
+        os.replace(tmp_path, path)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def query_window(self, window):
+        """
+        Queries the results of a window.
+
+        Parameters
+        ----------
+        window : tuple
+            (start, end) of the window, the end excluded.
+
+        Returns
+        -------
+        list or None
+            The bindings of the results, or None if the window holds more than max_results
+            results and spans more than one day. The results of a single day are paged
+            through whatever their number, as the window cannot be bisected further.
+        """
+        start, end = window
+        query = self.query.format(start=start.isoformat(), end=end.isoformat())
+        self._count('queries')
+        # One more result than the threshold tells whether the window overflows
+        bindings = get_results_table(f"{query}\nLIMIT {self.max_results + 1}", endpoint=self.endpoint, cache=self.cache)['results']['bindings']
+        if len(bindings) <= self.max_results:
+            return bindings
+        if end - start > timedelta(days=1):
+            return None
+        logging.warning(f"More than {self.max_results} results on {start.isoformat()}, paging through them")
+        return list(iter_results(query, page_size=self.max_results, endpoint=self.endpoint, cache=self.cache))
+
+    def _harvest_window(self, window):
+        checkpoint = self._load(window)
+        if checkpoint is not None:
+            self._count('resumed')
+            return None if checkpoint['bisected'] else checkpoint['bindings']
+        bindings = self.query_window(window)
+        self._save(window, bindings)
+        return bindings
+
+    def harvest(self, start, end):
+        """
+        Harvests the results of the query between two dates.
+
+        Parameters
+        ----------
+        start : datetime.date
+            First day of the range.
+        end : datetime.date
+            Last day of the range, included.
+
+        Returns
+        -------
+        list
+            The bindings of the results, in the order of the windows, each result once.
+        """
+        self.stats = {'queries': 0, 'bisections': 0, 'resumed': 0}
+        completed = {}
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            pending = {executor.submit(self._harvest_window, window): window for window in self.windows(start, end)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = pending.pop(future)
+                    bindings = future.result()
+                    if bindings is not None:
+                        completed[window] = bindings
+                        continue
+                    # Bisect the window, the middle day starting the second half
+                    self._count('bisections')
+                    middle = window[0] + (window[1] - window[0]) / 2
+                    for half in ((window[0], middle), (middle, window[1])):
+                        pending[executor.submit(self._harvest_window, half)] = half
+
+        results = []
+        seen = set()
+        for window in sorted(completed):
+            for binding in completed[window]:
+                identifier = binding.get(self.key, {}).get('value')
+                if identifier is None:
+                    results.append(binding)
+                elif identifier not in seen:
+                    seen.add(identifier)
+                    results.append(binding)
+        return results
@@ -0,0 +1,3 @@
+"""
+This subpackage provides a persistent full-text inverted index over the provisions extracted by the parsers.
+"""
@@ -0,0 +1,371 @@
+"""
+Incremental inverted index over parsed provisions, with BM25 ranking.
+
+Provisions are added document by document and buffered in memory. Committing the
+buffer writes a new immutable segment (see tulit.index.segment); searches run
+across all segments. Re-adding a document supersedes its provisions in older
+segments, and merging compacts all segments into one, optionally in a background thread.
+
+Usage
+-----
+>>> index = InvertedIndex('./index')
+>>> index.add('32014L0092', parser.articles)
+>>> index.commit()
+>>> index.search('payment account', k=5)
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import shutil
+import threading
+
+from tulit.index.segment import Segment, write_segment
+from tulit.parsers.parser import iter_provisions
+
+MANIFEST_FILE = 'segments.json'
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """
+    Splits a text in lowercase terms.
+
+    Parameters
+    ----------
+    text : str
+        The text to tokenize.
+
+    Returns
+    -------
+    list
+        List of terms.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Persistent inverted index mapping terms to the provisions containing them.
+
+    Attributes
+    ----------
+    path : str
+        Directory where the segments and the manifest are stored.
+    buffer_size : int
+        Number of buffered provisions after which a segment is written automatically.
+    k1 : float
+        BM25 term frequency saturation parameter.
+    b : float
+        BM25 length normalization parameter.
+    segments : list
+        The open segments, oldest first.
+    owners : dict
+        Dictionary mapping each document identifier to the name of the segment holding its live provisions.
+    """
+
+    def __init__(self, path, buffer_size=10000, k1=1.2, b=0.75):
+        """
+        Opens or creates an index.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the index. It is created if it does not exist.
+        buffer_size : int, optional
+            Number of buffered provisions after which `commit` is called automatically.
+        k1 : float, optional
+            BM25 term frequency saturation parameter.
+        b : float, optional
+            BM25 length normalization parameter.
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._merge_lock = threading.Lock()
+        self._merge_thread = None
+
+        os.makedirs(self.path, exist_ok=True)
+        manifest = self._read_manifest()
+        self._next_segment = manifest['next_segment']
+        self.owners = manifest['owners']
+        self.segments = [Segment(os.path.join(self.path, name)) for name in manifest['segments']]
+        self._reset_buffer()
+        self._update_stats()
+
+    ### Manifest
+    def _read_manifest(self):
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return {'next_segment': 0, 'segments': [], 'owners': {}}
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        manifest = {
+            'next_segment': self._next_segment,
+            'segments': [segment.name for segment in self.segments],
+            'owners': self.owners
+        }
+        with open(f"{manifest_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    def _new_segment_path(self):
+        name = f"seg_{self._next_segment:06d}"
+        self._next_segment += 1
+        return os.path.join(self.path, name)
+
+    def _update_stats(self):
+        """
+        Computes which provisions are live in each segment, and the collection statistics used by BM25.
+        """
+        self._live = {}
+        total_length = 0
+        count = 0
+        for segment in self.segments:
+            live = [self.owners.get(doc[0]) == segment.name for doc in segment.docs]
+            self._live[segment.name] = live
+            for is_live, doc in zip(live, segment.docs):
+                if is_live:
+                    total_length += doc[3]
+                    count += 1
+        self.num_provisions = count
+        self.avg_length = total_length / count if count else 0.0
+
+    ### Indexing
+    def _reset_buffer(self):
+        self._docs = []
+        self._postings = {}
+        self._buffered_ids = set()
+
+    def add(self, doc_id, articles):
+        """
+        Adds the provisions of a document to the in-memory buffer.
+
+        Adding a document that is already indexed replaces its provisions once the buffer is committed.
+
+        Parameters
+        ----------
+        doc_id : str
+            Identifier of the document, e.g. a CELEX number.
+        articles : list
+            List of article dictionaries as produced by the parsers.
+        """
+        with self._lock:
+            if doc_id in self._buffered_ids:
+                self._remove_from_buffer(doc_id)
+            self._buffered_ids.add(doc_id)
+
+            for provision in iter_provisions(articles):
+                terms = tokenize(provision['text'])
+                ordinal = len(self._docs)
+                self._docs.append([doc_id, provision['article_eId'], provision['eId'], len(terms)])
+
+                frequencies = {}
+                for term in terms:
+                    frequencies[term] = frequencies.get(term, 0) + 1
+                for term, frequency in frequencies.items():
+                    self._postings.setdefault(term, []).append((ordinal, frequency))
+
+            if len(self._docs) >= self.buffer_size:
+                self.commit()
+
+    def _remove_from_buffer(self, doc_id):
+        docs, postings, buffered_ids = self._docs, self._postings, self._buffered_ids
+        self._reset_buffer()
+        self._buffered_ids = buffered_ids - {doc_id}
+        keep = {}
+        for ordinal, doc in enumerate(docs):
+            if doc[0] != doc_id:
+                keep[ordinal] = len(self._docs)
+                self._docs.append(doc)
+        for term, entries in postings.items():
+            entries = [(keep[ordinal], frequency) for ordinal, frequency in entries if ordinal in keep]
+            if entries:
+                self._postings[term] = entries
+
+    def delete(self, doc_id):
+        """
+        Removes a document from the index. The change is persisted immediately.
+
+        Parameters
+        ----------
+        doc_id : str
+            Identifier of the document.
+        """
+        with self._lock:
+            if doc_id in self._buffered_ids:
+                self._remove_from_buffer(doc_id)
+            if self.owners.pop(doc_id, None) is not None:
+                self._write_manifest()
+                self._update_stats()
+
+    def commit(self):
+        """
+        Writes the buffered provisions to a new segment and makes them searchable.
+
+        Returns
+        -------
+        str or None
+            Name of the new segment, or None if the buffer was empty.
+        """
+        with self._lock:
+            if not self._buffered_ids:
+                return None
+            path = self._new_segment_path()
+            write_segment(path, self._docs, self._postings)
+            segment = Segment(path)
+            self.segments.append(segment)
+            for doc_id in self._buffered_ids:
+                self.owners[doc_id] = segment.name
+            self._reset_buffer()
+            self._write_manifest()
+            self._update_stats()
+            return segment.name
+
+    ### Merging
+    def merge(self, background=False):
+        """
+        Merges all the committed segments into a single one, dropping superseded provisions.
+
+        Parameters
+        ----------
+        background : bool, optional
+            If True, the merge runs in a background thread and this method returns immediately.
+            Searches and commits remain possible while the merge is running.
+
+        Returns
+        -------
+        threading.Thread or None
+            The thread running the merge if background is True, None otherwise.
+        """
+        if background:
+            with self._lock:
+                if self._merge_thread is not None and self._merge_thread.is_alive():
+                    return self._merge_thread
+                self._merge_thread = threading.Thread(target=self._merge, daemon=True)
+                self._merge_thread.start()
+                return self._merge_thread
+        self._merge()
+        return None
+
+    def _merge(self):
+        # Only one merge at a time may read and close the segments
+        with self._merge_lock:
+            self._merge_segments()
+
+    def _merge_segments(self):
+        with self._lock:
+            segments = list(self.segments)
+            if len(segments) < 2:
+                return
+            live = {name: list(flags) for name, flags in self._live.items()}
+            path = self._new_segment_path()
+
+        # The merged segment is written without holding the lock
+        docs = []
+        postings = {}
+        for segment in segments:
+            mapping = {}
+            for ordinal, doc in enumerate(segment.docs):
+                if live[segment.name][ordinal]:
+                    mapping[ordinal] = len(docs)
+                    docs.append(doc)
+            for term in segment.terms:
+                entries = [(mapping[ordinal], frequency) for ordinal, frequency in segment.postings(term) if ordinal in mapping]
+                if entries:
+                    postings.setdefault(term, []).extend(entries)
+        write_segment(path, docs, postings)
+
+        with self._lock:
+            merged = Segment(path)
+            merged_names = {segment.name for segment in segments}
+            # Documents re-added or deleted during the merge keep their newer state
+            for doc_id, owner in self.owners.items():
+                if owner in merged_names:
+                    self.owners[doc_id] = merged.name
+            self.segments = [merged] + [segment for segment in self.segments if segment.name not in merged_names]
+            self._write_manifest()
+            self._update_stats()
+
+        for segment in segments:
+            segment.close()
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+    def wait(self):
+        """
+        Waits for a background merge to complete.
+        """
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join()
+
+    ### Searching
+    def search(self, query, k=10):
+        """
+        Searches the committed provisions and ranks them with BM25.
+
+        Parameters
+        ----------
+        query : str
+            Free-text query.
+        k : int, optional
+            Maximum number of hits to return.
+
+        Returns
+        -------
+        list
+            List of dictionaries sorted by decreasing score, with the keys
+            'doc_id', 'article_eId', 'eId' and 'score'.
+        """
+        # A merge swaps the merged segments out of self.segments under the lock and closes them
+        # after releasing it. Holding the lock for the whole search means the search only
+        # sees the segments that are in the list, so none of them is closed while it runs.
+        with self._lock:
+            avg_length = self.avg_length or 1.0
+            scores = {}
+            for term in set(tokenize(query)):
+                matches = []
+                for segment in self.segments:
+                    flags = self._live[segment.name]
+                    matches.extend(
+                        (segment, ordinal, frequency)
+                        for ordinal, frequency in segment.postings(term) if flags[ordinal]
+                    )
+                if not matches:
+                    continue
+                df = len(matches)
+                idf = math.log(1 + (self.num_provisions - df + 0.5) / (df + 0.5))
+                for segment, ordinal, frequency in matches:
+                    length = segment.docs[ordinal][3]
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    key = (segment, ordinal)
+                    scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+            hits = []
+            for (segment, ordinal), score in heapq.nlargest(k, scores.items(), key=lambda item: item[1]):
+                doc_id, article_eId, eId, _ = segment.docs[ordinal]
+                hits.append({
+                    'doc_id': doc_id,
+                    'article_eId': article_eId,
+                    'eId': eId,
+                    'score': score
+                })
+            return hits
+
+    def close(self):
+        """
+        Waits for background merges and closes all segments. Buffered provisions that were not committed are discarded.
+        """
+        self.wait()
+        with self._lock:
+            for segment in self.segments:
+                segment.close()
+            self.segments = []
@@ -0,0 +1,131 @@
+"""
+Immutable on-disk segments of the inverted index.
+
+A segment is a directory containing three files:
+
+- docs.json: list of [doc_id, article_eId, eId, length] records, one per provision
+- terms.json: dictionary mapping each term to [offset, document frequency]
+- postings.bin: unsigned 32-bit integers, stored as (provision ordinal, term frequency)
+  pairs for each term, starting at the term's offset
+
+The postings file is memory-mapped when the segment is opened, so postings are
+read lazily from the operating system page cache rather than loaded in memory.
+"""
+
+import json
+import mmap
+import os
+import shutil
+from array import array
+
+POSTINGS_FILE = 'postings.bin'
+TERMS_FILE = 'terms.json'
+DOCS_FILE = 'docs.json'
+
+
+def write_segment(path, docs, postings):
+    """
+    Writes a new segment to disk.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the segment. It must not exist yet.
+    docs : list
+        List of [doc_id, article_eId, eId, length] records.
+    postings : dict
+        Dictionary mapping each term to a list of (provision ordinal, term frequency)
+        tuples, sorted by provision ordinal.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    terms = {}
+    data = array('I')
+    for term in sorted(postings):
+        entries = postings[term]
+        terms[term] = [len(data) // 2, len(entries)]
+        for ordinal, frequency in entries:
+            data.append(ordinal)
+            data.append(frequency)
+
+    with open(os.path.join(tmp_path, POSTINGS_FILE), 'wb') as f:
+        data.tofile(f)
+    with open(os.path.join(tmp_path, TERMS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(terms, f)
+    with open(os.path.join(tmp_path, DOCS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(docs, f)
+
+    # Publish the segment only once all of its files are complete
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """
+    Read-only view over a segment stored on disk.
+
+    Attributes
+    ----------
+    name : str
+        Name of the segment, i.e. the name of its directory.
+    docs : list
+        List of [doc_id, article_eId, eId, length] records.
+    terms : dict
+        Dictionary mapping each term to [offset, document frequency].
+    """
+
+    def __init__(self, path):
+        """
+        Opens a segment and memory-maps its postings.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the segment.
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, TERMS_FILE), 'r', encoding='utf-8') as f:
+            self.terms = json.load(f)
+        with open(os.path.join(path, DOCS_FILE), 'r', encoding='utf-8') as f:
+            self.docs = json.load(f)
+
+        self._file = open(os.path.join(path, POSTINGS_FILE), 'rb')
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._postings = memoryview(self._mmap).cast('I')
+        else:
+            self._mmap = None
+            self._postings = memoryview(array('I'))
+
+    def postings(self, term):
+        """
+        Returns the postings of a term.
+
+        Parameters
+        ----------
+        term : str
+            The term to look up.
+
+        Returns
+        -------
+        list
+            List of (provision ordinal, term frequency) tuples.
+        """
+        entry = self.terms.get(term)
+        if entry is None:
+            return []
+        offset, count = entry
+        values = self._postings[offset * 2:(offset + count) * 2]
+        return list(zip(values[0::2], values[1::2]))
+
+    def close(self):
+        """
+        Releases the memory map and the underlying file.
+        """
+        self._postings.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
@@ -1,10 +1,8 @@
 import json
 import logging
-import os
-from tulit.download.download import download_documents
-from sparql import send_sparql_query
-from parsers.html import HTMLParser
-from parsers.formex import Formex4Parser
+from tulit.download.cellar import CellarDownloader
+from tulit.sparql import send_sparql_query
+from tulit.pipeline import Pipeline
 
 def main():
     """
@@ -31,30 +29,17 @@ def main():
         with open('./tests/metadata/query_results/query_results.json', 'r') as f:
             results = json.loads(f.read())
 
-        # Download documents
-        logger.info("Downloading documents")
-        downloaded_document_paths = download_documents(
-            results, 
-            './tests/data/formex', 
-            log_dir='./tests/logs', 
-            format='fmx4'
-        )
-        logger.info(f'{len(downloaded_document_paths)} documents downloaded in {downloaded_document_paths}')
-                
-        # Extract the directory path (removing what's after the last '/')
-
-        # List the contents of the first directory
-        first_path = downloaded_document_paths[0]
-        first_item = os.listdir(first_path)[0]
-        file_path = os.path.join(*first_path.split('/'), first_item)
-    
-        print(f'Parsing {file_path}')
-        # Sort the contents alphabetically and get the first item
-        
-        parser = Formex4Parser()
-        parser.parse(file_path)
-        print(parser.articles)
-        #print(document_tree)
+        # Download and parse documents, parsing each one as soon as it is downloaded
+        logger.info("Downloading and parsing documents")
+        downloader = CellarDownloader('./tests/data/formex', log_dir='./tests/logs')
+        cellar_ids = downloader.get_cellar_ids_from_json_results(results, format='fmx4')
+        pipeline = Pipeline(downloader.download_item, format='fmx4', download_workers=4)
+        for record in pipeline.run(cellar_ids):
+            if record['error'] is not None:
+                logger.error(f"{record['item']}: {record['error']}")
+                continue
+            logger.info(f"Parsed {record['path']}")
+            print(record['result']['articles'])
 
     except Exception as e:
         logger.error(f"An error occurred: {e}")
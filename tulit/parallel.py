@@ -0,0 +1,294 @@
+"""
+Multilingual parallel parsing of EU legal acts.
+
+This module retrieves the manifestations of a CELEX number in several official
+languages with a single SPARQL query, downloads and parses them concurrently,
+and aligns their provisions by eId or article number.
+
+Usage
+-----
+>>> documents = fetch_parallel('32024R0903', './data/parallel', './logs', format='fmx4')
+>>> articles = parse_parallel(documents, format='fmx4')
+>>> aligned = align_provisions(articles)
+>>> aligned['001']['FRA']
+"""
+
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from tulit.compression import strip_compression_extension
+from tulit.sparql import get_results_table
+from tulit.download.cellar import CellarDownloader
+from tulit.parsers.parser import iter_provisions
+from tulit.parsers.formex import Formex4Parser
+from tulit.parsers.html import HTMLParser
+from tulit.parsers.akomantoso import AkomaNtosoParser
+
+# Official languages of the European Union, as used by the CELLAR language authority table
+LANGUAGES = [
+    'BUL', 'CES', 'DAN', 'DEU', 'ELL', 'ENG', 'EST', 'FIN', 'FRA', 'GLE', 'HRV', 'HUN',
+    'ITA', 'LAV', 'LIT', 'MLT', 'NLD', 'POL', 'POR', 'RON', 'SLK', 'SLV', 'SPA', 'SWE'
+]
+
+PARSERS = {
+    'fmx4': Formex4Parser,
+    'xhtml': HTMLParser,
+    'akn': AkomaNtosoParser,
+}
+
+MULTILINGUAL_QUERY = """
+PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
+PREFIX purl: <http://purl.org/dc/elements/1.1/>
+
+SELECT DISTINCT ?cellarURIs, ?manif, ?format, ?expr, ?langCode
+WHERE {
+    ?work owl:sameAs <http://publications.europa.eu/resource/celex/{CELEX}> .
+    ?expr cdm:expression_belongs_to_work ?work ;
+           cdm:expression_uses_language ?lang .
+    ?lang purl:identifier ?langCode .
+    ?manif cdm:manifestation_manifests_expression ?expr;
+           cdm:manifestation_type ?format.
+    ?cellarURIs cdm:item_belongs_to_manifestation ?manif.
+
+    FILTER(str(?format)="{FORMAT}" && str(?langCode) IN ({LANGUAGES}))
+}
+ORDER BY ?langCode ?cellarURIs
+"""
+
+
+def get_language_results(celex, format='fmx4', languages=None):
+    """
+    Queries the manifestations of an act in several languages with a single SPARQL query.
+
+    Parameters
+    ----------
+    celex : str
+        The CELEX number of the act.
+    format : str, optional
+        The manifestation type, e.g. 'fmx4' or 'xhtml'.
+    languages : list, optional
+        Three-letter language codes. Defaults to all the official languages.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping each language code to SPARQL results in the same structure
+        as returned by `tulit.sparql.get_results_table`, restricted to that language.
+    """
+    languages = languages or LANGUAGES
+    query = MULTILINGUAL_QUERY.replace('{CELEX}', celex).replace('{FORMAT}', format)
+    query = query.replace('{LANGUAGES}', ', '.join(f'"{language}"' for language in languages))
+    results = get_results_table(query)
+
+    by_language = {}
+    for binding in results['results']['bindings']:
+        language = binding['langCode']['value']
+        by_language.setdefault(language, {'head': results.get('head'), 'results': {'bindings': []}})
+        by_language[language]['results']['bindings'].append(binding)
+    return by_language
+
+
+def find_document_files(path):
+    """
+    Lists the files holding the text of a downloaded document.
+
+    CELLAR zip archives are extracted in a folder that also contains the document
+    descriptor (*.doc.fmx.xml) and the table of contents (*.toc.fmx.xml); these are
+    skipped, whether they are compressed or not.
+
+    Parameters
+    ----------
+    path : str
+        Path returned by a downloader, either a file or a folder.
+
+    Returns
+    -------
+    list
+        Sorted paths of the document files. The main act comes first, followed by its annexes.
+    """
+    if path is None:
+        return []
+    if os.path.isfile(path):
+        return [path]
+    files = []
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            name = strip_compression_extension(filename)
+            if name.endswith('.doc.fmx.xml') or name.endswith('.toc.fmx.xml'):
+                continue
+            files.append(os.path.join(root, filename))
+    return sorted(files)
+
+
+def fetch_parallel(celex, download_dir, log_dir, format='fmx4', languages=None, max_workers=8):
+    """
+    Downloads the manifestations of an act in several languages concurrently.
+
+    Parameters
+    ----------
+    celex : str
+        The CELEX number of the act.
+    download_dir : str
+        Directory where the documents are saved.
+    log_dir : str
+        Directory where the logs are saved.
+    format : str, optional
+        The manifestation type, e.g. 'fmx4' or 'xhtml'.
+    languages : list, optional
+        Three-letter language codes. Defaults to all the official languages.
+    max_workers : int, optional
+        Maximum number of languages downloaded at the same time.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping each language code to the list of downloaded paths, None for the documents that could not be downloaded.
+    """
+    results = get_language_results(celex, format=format, languages=languages)
+    downloader = CellarDownloader(download_dir=download_dir, log_dir=log_dir)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            language: executor.submit(downloader.download, language_results, format=format)
+            for language, language_results in results.items()
+        }
+        return {language: future.result() for language, future in futures.items()}
+
+
+def parse_document(format, path):
+    """
+    Parses the main file of a downloaded document and returns its articles.
+
+    Parameters
+    ----------
+    format : str
+        The format of the document: 'fmx4', 'xhtml' or 'akn'.
+    path : str
+        Path returned by a downloader, either a file or a folder.
+
+    Returns
+    -------
+    list
+        The articles extracted by the parser, or an empty list if no file was found.
+    """
+    files = find_document_files(path)
+    if not files:
+        return []
+    parser = PARSERS[format]()
+    parser.parse(files[0])
+    return parser.articles
+
+
+def main_document(paths):
+    """
+    Selects the main document among the downloaded items of a manifestation.
+
+    CELLAR numbers the items of a manifestation DOC_1, DOC_2, ...: the first one holds
+    the act, the following ones its annexes or corrigenda.
+
+    Parameters
+    ----------
+    paths : list
+        Paths returned by a downloader for the items of one manifestation.
+
+    Returns
+    -------
+    str or None
+        The path of the item with the lowest number, or the first path if no item number
+        can be read from the paths. None if there is no path.
+    """
+    paths = [path for path in paths if path is not None]
+    if not paths:
+        return None
+    numbered = []
+    for path in paths:
+        match = re.search(r'DOC_(\d+)(?:\.[^/\\]*)?$', path.rstrip('/\\'))
+        if match:
+            numbered.append((int(match.group(1)), path))
+    if numbered:
+        main = min(numbered)[1]
+    else:
+        main = paths[0]
+        if len(paths) > 1:
+            logging.warning(f"No item number in the paths {paths}, parsing the first one")
+    if len(paths) > 1:
+        logging.info(f"Parsing {main}, ignoring the other items {[path for path in paths if path != main]}")
+    return main
+
+
+def parse_parallel(documents, format='fmx4', max_workers=None):
+    """
+    Parses the downloaded documents of several languages in a pool of processes.
+
+    Parameters
+    ----------
+    documents : dict
+        Dictionary mapping each language code to a list of downloaded paths, as returned by `fetch_parallel`.
+    format : str, optional
+        The format of the documents: 'fmx4', 'xhtml' or 'akn'.
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of processors.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping each language code to the articles of its main document, see `main_document`.
+    """
+    # Only the main act of each language is aligned, not its annexes
+    documents = {language: main_document(paths) for language, paths in documents.items()}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            language: executor.submit(parse_document, format, path)
+            for language, path in documents.items() if path is not None
+        }
+        articles = {}
+        for language, future in futures.items():
+            try:
+                articles[language] = future.result()
+            except Exception as e:
+                logging.error(f"Error parsing {language} document: {e}")
+        return articles
+
+
+def _article_number(article):
+    # Article numbers are language-dependent ("Article 1", "Artikel 1"), only their digits are comparable
+    digits = re.findall(r'\d+', article.get('article_num') or '')
+    return digits[0] if digits else None
+
+
+def align_provisions(articles, key='eId'):
+    """
+    Aligns the provisions of the same act in several languages.
+
+    Each provision is inserted in a dictionary keyed by its identifier, so the
+    alignment is linear in the total number of provisions.
+
+    Parameters
+    ----------
+    articles : dict
+        Dictionary mapping each language code to the articles extracted by a parser.
+    key : str, optional
+        'eId' to align provisions by eId, or 'article_num' to align whole articles
+        by the number in their heading.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping each eId (or article number) to a dictionary of language code -> text,
+        in the order of first appearance.
+    """
+    aligned = {}
+    for language, language_articles in articles.items():
+        if key == 'article_num':
+            for article in language_articles:
+                number = _article_number(article)
+                if number is None:
+                    continue
+                text = ' '.join(provision['text'] for provision in iter_provisions([article]))
+                aligned.setdefault(number, {})[language] = text
+        else:
+            for provision in iter_provisions(language_articles):
+                aligned.setdefault(provision['eId'], {})[language] = provision['text']
+    return aligned
@@ -1,4 +1,5 @@
 from .parser import XMLParser
+from .fingerprint import fingerprint, article_fingerprint
 import re
 from lxml import etree
 import os
@@ -367,7 +368,8 @@ class AkomaNtosoParser(XMLParser):
             - 'eId': Article identifier
             - 'article_num': Article number
             - 'article_title': Article title
-            - 'article_text': List of dictionaries with eId and text content
+            - 'article_text': List of dictionaries with eId, text content and fingerprint
+            - 'fingerprint': Content fingerprint of the article
         """
         self.articles = []  # Reset articles list
 
@@ -398,13 +400,15 @@ class AkomaNtosoParser(XMLParser):
             article_text = self.get_text_by_eId(article)
         
             # Append the article data to the articles list
-            self.articles.append({
+            article_data = {
                 'eId': eId,
                 'article_num': article_num_text,
                 'article_title': article_title_text,
                 # This is not really text - rather a list of dictionaries composed by the eId and the text of each element
                 'article_text': article_text
-            })
+            }
+            article_data['fingerprint'] = article_fingerprint(article_data)
+            self.articles.append(article_data)
 
         return self.articles
     
@@ -423,6 +427,7 @@ class AkomaNtosoParser(XMLParser):
             List of dictionaries containing:
             - 'eId': Identifier of the nearest parent with an eId
             - 'text': Concatenated text content
+            - 'fingerprint': Content fingerprint of the text
         """
         elements = []
         # Find all <p> elements
@@ -442,7 +447,8 @@ class AkomaNtosoParser(XMLParser):
                 p_text = ''.join(p.itertext()).strip()
                 element = {
                     'eId': eId,
-                    'text': p_text
+                    'text': p_text,
+                    'fingerprint': fingerprint(p_text)
                 }
                 elements.append(element)
         return elements
@@ -505,7 +511,7 @@ class AkomaNtosoParser(XMLParser):
         debug_info = {}
         try:
             self.load_schema('akomantoso30.xsd')
-            self.validate(file, format='Akoma Ntoso')
+            self.validate(file=file, format='Akoma Ntoso')
             if self.valid == True:
                 try:
                     self.get_root(file)
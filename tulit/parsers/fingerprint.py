@@ -0,0 +1,258 @@
+"""
+Content fingerprints for parsed provisions.
+
+The functions in this module compute a fast, normalized hash of the text of
+articles and provisions, so that two versions of the same act (e.g. two
+consolidated versions from Normattiva, or two CELLAR expressions) can be
+compared provision by provision without diffing the full text.
+"""
+
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+# Size of the digest in bytes: 8 bytes (16 hex chars) are enough to tell
+# provisions apart within a corpus and keep the index small.
+DIGEST_SIZE = 8
+
+
+def normalize_text(text):
+    """
+    Normalizes a text before hashing it.
+
+    Parameters
+    ----------
+    text : str or None
+        The text to normalize.
+
+    Returns
+    -------
+    str
+        The text in Unicode NFKC form, with whitespace collapsed to single spaces
+        and leading and trailing whitespace removed.
+    """
+    if text is None:
+        return ''
+    text = unicodedata.normalize('NFKC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def fingerprint(text):
+    """
+    Computes the content fingerprint of a text.
+
+    Parameters
+    ----------
+    text : str or None
+        The text to fingerprint.
+
+    Returns
+    -------
+    str
+        Hexadecimal BLAKE2b digest of the normalized text. Texts differing only
+        in whitespace or Unicode representation share the same fingerprint.
+    """
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def combine_fingerprints(fingerprints):
+    """
+    Combines an ordered sequence of fingerprints into a single one.
+
+    Parameters
+    ----------
+    fingerprints : iterable of str
+        The fingerprints to combine, e.g. those of the provisions of an article.
+
+    Returns
+    -------
+    str
+        Fingerprint of the sequence. It changes whenever one of the fingerprints
+        changes, or when their order changes.
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for item in fingerprints:
+        digest.update(bytes.fromhex(item))
+    return digest.hexdigest()
+
+
+def article_fingerprint(article):
+    """
+    Returns the fingerprint of an article as produced by any of the parsers.
+
+    Parameters
+    ----------
+    article : dict
+        Article dictionary. Its 'article_text' is either a string (Formex) or a
+        list of provision dictionaries with 'eId' and 'text' keys (Akoma Ntoso, HTML).
+
+    Returns
+    -------
+    str
+        Fingerprint of the article text.
+    """
+    article_text = article.get('article_text')
+    if isinstance(article_text, list):
+        return combine_fingerprints(
+            provision.get('fingerprint') or fingerprint(provision.get('text'))
+            for provision in article_text
+        )
+    return fingerprint(article_text)
+
+
+class FingerprintIndex:
+    """
+    Corpus-level index of article fingerprints.
+
+    The index maps each document identifier to the fingerprints of its articles,
+    keyed by article eId. Comparing freshly parsed articles against the index
+    tells which articles were added, removed or changed since the last run.
+
+    Attributes
+    ----------
+    documents : dict
+        Dictionary mapping document identifiers to dictionaries of
+        article eId -> fingerprint.
+    """
+
+    def __init__(self, documents=None):
+        """
+        Initializes the index.
+
+        Parameters
+        ----------
+        documents : dict, optional
+            Existing mapping of document identifiers to article fingerprints.
+        """
+        self.documents = documents if documents is not None else {}
+
+    @staticmethod
+    def fingerprint_articles(articles):
+        """
+        Computes the fingerprints of a list of articles.
+
+        Parameters
+        ----------
+        articles : list
+            List of article dictionaries as produced by the parsers.
+
+        Returns
+        -------
+        dict
+            Dictionary mapping article eIds to their fingerprints.
+        """
+        return {str(article.get('eId')): article_fingerprint(article) for article in articles}
+
+    def diff(self, doc_id, articles):
+        """
+        Compares a list of articles with the fingerprints stored for a document.
+
+        Parameters
+        ----------
+        doc_id : str
+            Identifier of the document, e.g. a CELEX number or a Normattiva codiceRedaz.
+        articles : list
+            List of article dictionaries as produced by the parsers.
+
+        Returns
+        -------
+        dict
+            Dictionary with the keys 'added', 'removed', 'changed' and 'unchanged',
+            each mapping to a list of article eIds.
+        """
+        old = self.documents.get(doc_id, {})
+        new = self.fingerprint_articles(articles)
+        return {
+            'added': [eId for eId in new if eId not in old],
+            'removed': [eId for eId in old if eId not in new],
+            'changed': [eId for eId in new if eId in old and old[eId] != new[eId]],
+            'unchanged': [eId for eId in new if eId in old and old[eId] == new[eId]],
+        }
+
+    def update(self, doc_id, articles):
+        """
+        Stores the fingerprints of a document, replacing the previous ones.
+
+        Parameters
+        ----------
+        doc_id : str
+            Identifier of the document.
+        articles : list
+            List of article dictionaries as produced by the parsers.
+
+        Returns
+        -------
+        dict
+            The differences with the previously stored fingerprints, as returned by `diff`.
+        """
+        changes = self.diff(doc_id, articles)
+        self.documents[doc_id] = self.fingerprint_articles(articles)
+        return changes
+
+    def changed_articles(self, doc_id, articles):
+        """
+        Filters the articles that are new or whose text changed.
+
+        Parameters
+        ----------
+        doc_id : str
+            Identifier of the document.
+        articles : list
+            List of article dictionaries as produced by the parsers.
+
+        Returns
+        -------
+        list
+            The articles that need to be reprocessed.
+        """
+        old = self.documents.get(doc_id, {})
+        return [
+            article for article in articles
+            if old.get(str(article.get('eId'))) != article_fingerprint(article)
+        ]
+
+    def document_fingerprint(self, doc_id):
+        """
+        Returns the fingerprint of a whole document, or None if it is not indexed.
+        """
+        articles = self.documents.get(doc_id)
+        if articles is None:
+            return None
+        return combine_fingerprints(articles.values())
+
+    def save(self, path):
+        """
+        Saves the index to a JSON file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the JSON file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.documents, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads an index from a JSON file. A missing file yields an empty index.
+
+        Parameters
+        ----------
+        path : str
+            Path to the JSON file.
+
+        Returns
+        -------
+        FingerprintIndex
+            The loaded index.
+        """
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
@@ -3,6 +3,7 @@ import os
 
 from lxml import etree
 from .parser import XMLParser
+from .fingerprint import article_fingerprint
 
 class Formex4Parser(XMLParser):
     """
@@ -167,7 +168,7 @@ class Formex4Parser(XMLParser):
         Returns
         -------
         list
-            Articles with identifier and content.
+            Articles with identifier, content and content fingerprint.
         """
         self.articles = []
         if self.body is not None:
@@ -177,6 +178,7 @@ class Formex4Parser(XMLParser):
                     "article_num": article.findtext('.//TI.ART'),
                     "article_text": " ".join("".join(alinea.itertext()).strip() for alinea in article.findall('.//ALINEA'))
                 }
+                article_data["fingerprint"] = article_fingerprint(article_data)
                 self.articles.append(article_data)
         else:
             print('No enacting terms XML tag has been found')
@@ -195,7 +197,7 @@ class Formex4Parser(XMLParser):
             Parsed data containing metadata, title, preamble, and articles.
         """
         self.load_schema('formex4.xsd')
-        self.validate(file, format = 'Formex 4')
+        self.validate(file=file, format='Formex 4')
         self.get_root(file)
         self.get_metadata()
         self.get_preface(preface_xpath='.//TITLE', paragraph_xpath='.//P')
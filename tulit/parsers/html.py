@@ -1,4 +1,6 @@
 from bs4 import BeautifulSoup
+from .fingerprint import fingerprint, article_fingerprint
+from tulit.compression import open_text
 
 class HTMLParser():
     def __init__(self):
@@ -16,7 +18,7 @@ class HTMLParser():
         Parameters
         ----------
         file : str
-            The path to the HTML file.
+            The path to the HTML file. Files compressed with gzip or zstd are decompressed on the fly.
         
         Returns
         -------
@@ -24,7 +26,7 @@ class HTMLParser():
             The root element is stored in the parser under the 'root' attribute.
         """
         try:
-            with open(file, 'r', encoding='utf-8') as f:
+            with open_text(file) as f:
                 html = f.read()
             self.root = BeautifulSoup(html, 'html.parser')
             print("HTML loaded successfully.")
@@ -256,7 +258,7 @@ class HTMLParser():
         Subsequent subdivisions are processed based on the closest parent with an id.
 
         Returns:
-            list[dict]: List of articles, each containing its eId and associated content.
+            list[dict]: List of articles, each containing its eId, associated content and content fingerprint.
         """
         try:
             articles = self.body.find_all('div', id=lambda x: x and x.startswith('art_') and '.' not in x)
@@ -293,18 +295,22 @@ class HTMLParser():
                 # Combine grouped content into structured output
                 subdivisions = []
                 for sub_eId, texts in content_map.items():
+                    text = ' '.join(texts)  # Combine all <p> texts for the subdivision
                     subdivisions.append({
                         'eId': sub_eId,
-                        'text': ' '.join(texts)  # Combine all <p> texts for the subdivision
+                        'text': text,
+                        'fingerprint': fingerprint(text)
                     })
 
                 # Store the article with its eId and subdivisions
-                self.articles.append({
+                article_data = {
                     'eId': eId,
                     'article_num': article_num,
                     'article_title': article_title,
                     'article_text': subdivisions
-                })
+                }
+                article_data['fingerprint'] = article_fingerprint(article_data)
+                self.articles.append(article_data)
 
             print(f"Articles extracted: {len(self.articles)}")
         except Exception as e:
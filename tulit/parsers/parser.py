@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from lxml import etree
 import os
 import re
+from tulit.compression import open_text
 
 class XMLParser(ABC):
     """
@@ -123,7 +124,7 @@ class XMLParser(ABC):
             return None
 
         try:
-            with open(file, 'r', encoding='utf-8') as f:
+            with open_text(file) as f:
                 xml_doc = etree.parse(f)
                 self.schema.assertValid(xml_doc)
             print(f"{file} is a valid {format} file.")
@@ -143,14 +144,14 @@ class XMLParser(ABC):
         Parameters
         ----------
         file : str
-            Path to the XML file.
+            Path to the XML file. Files compressed with gzip or zstd are decompressed on the fly.
 
             
         Returns
         -------
         None
         """
-        with open(file, 'r', encoding='utf-8') as f:
+        with open_text(file) as f:
             tree = etree.parse(f)
             self.root = tree.getroot()
 
@@ -303,4 +304,39 @@ class XMLParser(ABC):
         self.body = self.root.find(body_xpath, namespaces=self.namespaces)
         if self.body is None:
             # Fallback: try without namespace
-            self.body = self.root.find(body_xpath)
\ No newline at end of file
+            self.body = self.root.find(body_xpath)
+
+def iter_provisions(articles):
+    """
+    Iterates over the provisions of a list of articles produced by any of the parsers.
+
+    Parameters
+    ----------
+    articles : list
+        List of article dictionaries. Their 'article_text' is either a string (Formex)
+        or a list of dictionaries with 'eId' and 'text' keys (Akoma Ntoso, HTML).
+
+    Yields
+    ------
+    dict
+        Dictionary with the keys:
+        - 'article_eId': Identifier of the article
+        - 'eId': Identifier of the provision, which is the article eId when the article is not subdivided
+        - 'text': Text of the provision
+    """
+    for article in articles:
+        article_eId = article.get('eId')
+        article_text = article.get('article_text')
+        if isinstance(article_text, list):
+            for provision in article_text:
+                yield {
+                    'article_eId': article_eId,
+                    'eId': provision.get('eId'),
+                    'text': provision.get('text') or ''
+                }
+        elif article_text:
+            yield {
+                'article_eId': article_eId,
+                'eId': article_eId,
+                'text': article_text
+            }
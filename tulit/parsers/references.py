@@ -0,0 +1,366 @@
+"""
+Extraction of references to EU legal acts and construction of citation graphs.
+
+References such as "Regulation (EU) No 1319/2011", "Regulation (EU) 2016/679" or
+"Directive 2008/98/EC" are found with a single precompiled pattern in one pass
+over the text, and mapped to their CELEX identifiers. The citation graph of a
+corpus is stored as compact adjacency arrays (compressed sparse rows).
+"""
+
+import re
+from array import array
+from collections import deque
+
+from tulit.parsers.parser import iter_provisions
+
+# CELEX descriptor letters of the acts of sector 3 (legal acts)
+CELEX_TYPES = {
+    'Regulation': 'R',
+    'Directive': 'L',
+    'Decision': 'D',
+    'Framework Decision': 'F',
+}
+
+_AUTHOR = r'(?:EU|EC|EEC|Euratom|EURATOM|ECSC|CFSP|JHA)'
+
+REFERENCE_PATTERN = re.compile(
+    r'\b(?P<type>Framework\s+Decision|Regulation|Directive|Decision)'
+    r'(?:\s+\(' + _AUTHOR + r'(?:,\s*' + _AUTHOR + r')*\))?'
+    r'(?:\s+(?P<no>No\.?))?'
+    r'\s+(?P<first>\d{1,4})/(?P<second>\d{1,4})'
+    r'(?:/' + _AUTHOR + r')?'
+    r'(?!\d)'
+)
+
+
+def _expand_year(year):
+    if year < 100:
+        return 1900 + year if year >= 50 else 2000 + year
+    return year
+
+
+def to_celex(act_type, year, number):
+    """
+    Builds the CELEX identifier of a legal act.
+
+    Parameters
+    ----------
+    act_type : str
+        The type of act: 'Regulation', 'Directive', 'Decision' or 'Framework Decision'.
+    year : int
+        The year of the act, with two or four digits.
+    number : int
+        The number of the act.
+
+    Returns
+    -------
+    str
+        The CELEX identifier, e.g. '32011R1319'.
+    """
+    return f"3{_expand_year(int(year))}{CELEX_TYPES[act_type]}{int(number):04d}"
+
+
+def extract_references(text):
+    """
+    Extracts the references to EU legal acts in a text.
+
+    The numbering convention is inferred from the reference itself: references
+    with "No" follow the number/year convention (e.g. "Regulation (EU) No 1319/2011"),
+    the others the year/number convention (e.g. "Directive 2008/98/EC").
+
+    Parameters
+    ----------
+    text : str
+        The text to search.
+
+    Returns
+    -------
+    list
+        List of dictionaries, in order of appearance, with the keys:
+        - 'text': The matched reference
+        - 'type': The type of act
+        - 'year': The four-digit year of the act
+        - 'number': The number of the act
+        - 'celex': The CELEX identifier of the act
+        - 'start': Start offset of the reference in the text
+        - 'end': End offset of the reference in the text
+    """
+    references = []
+    if not text:
+        return references
+    for match in REFERENCE_PATTERN.finditer(text):
+        act_type = re.sub(r'\s+', ' ', match.group('type'))
+        first, second = int(match.group('first')), int(match.group('second'))
+        if match.group('no'):
+            number, year = first, second
+        else:
+            year, number = first, second
+        year = _expand_year(year)
+        references.append({
+            'text': match.group(0),
+            'type': act_type,
+            'year': year,
+            'number': number,
+            'celex': to_celex(act_type, year, number),
+            'start': match.start(),
+            'end': match.end()
+        })
+    return references
+
+
+def iter_parser_texts(parser):
+    """
+    Iterates over the texts of the citations, recitals and articles extracted by a parser.
+
+    Parameters
+    ----------
+    parser : object
+        A parser on which `parse` has been called.
+
+    Yields
+    ------
+    str
+        The texts of the parsed sections.
+    """
+    for citation in getattr(parser, 'citations', None) or []:
+        yield citation.get('text') or citation.get('citation_text') or ''
+    for recital in getattr(parser, 'recitals', None) or []:
+        yield recital.get('recital_text') or recital.get('text') or ''
+    for provision in iter_provisions(getattr(parser, 'articles', None) or []):
+        yield provision['text']
+
+
+class CitationGraph:
+    """
+    Directed graph of citations between legal acts, stored as compressed sparse rows.
+
+    Attributes
+    ----------
+    nodes : list
+        CELEX identifiers, indexed by node number.
+    node_ids : dict
+        Dictionary mapping CELEX identifiers to node numbers.
+    indptr : array.array
+        Offsets in `indices` of the outgoing edges of each node; the edges of node i
+        are indices[indptr[i]:indptr[i + 1]].
+    indices : array.array
+        Node numbers of the cited acts.
+    """
+
+    def __init__(self, nodes, indptr, indices):
+        """
+        Initializes the graph from its adjacency arrays.
+
+        Parameters
+        ----------
+        nodes : list
+            CELEX identifiers, indexed by node number.
+        indptr : array.array
+            Offsets of the outgoing edges of each node.
+        indices : array.array
+            Node numbers of the cited acts.
+        """
+        self.nodes = nodes
+        self.node_ids = {celex: i for i, celex in enumerate(nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self._reverse = None
+
+    @classmethod
+    def from_edges(cls, edges):
+        """
+        Builds a graph from a mapping of citing acts to cited acts.
+
+        Parameters
+        ----------
+        edges : dict
+            Dictionary mapping each citing CELEX identifier to an iterable of cited CELEX identifiers.
+            Self-citations and duplicates are dropped.
+
+        Returns
+        -------
+        CitationGraph
+            The citation graph.
+        """
+        node_ids = {}
+        for source, targets in edges.items():
+            node_ids.setdefault(source, len(node_ids))
+            for target in targets:
+                node_ids.setdefault(target, len(node_ids))
+
+        adjacency = [[] for _ in node_ids]
+        for source, targets in edges.items():
+            source_id = node_ids[source]
+            adjacency[source_id] = sorted({node_ids[target] for target in targets} - {source_id})
+
+        return cls(list(node_ids), *cls._to_csr(adjacency))
+
+    @staticmethod
+    def _to_csr(adjacency):
+        indptr = array('I', [0])
+        indices = array('I')
+        for targets in adjacency:
+            indices.extend(targets)
+            indptr.append(len(indices))
+        return indptr, indices
+
+    def _neighbours(self, node, indptr, indices):
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def cites(self, celex):
+        """
+        Returns the acts cited by an act.
+
+        Parameters
+        ----------
+        celex : str
+            CELEX identifier of the citing act.
+
+        Returns
+        -------
+        list
+            CELEX identifiers of the cited acts.
+        """
+        node = self.node_ids.get(celex)
+        if node is None:
+            return []
+        return [self.nodes[i] for i in self._neighbours(node, self.indptr, self.indices)]
+
+    def cited_by(self, celex):
+        """
+        Returns the acts citing an act.
+
+        Parameters
+        ----------
+        celex : str
+            CELEX identifier of the cited act.
+
+        Returns
+        -------
+        list
+            CELEX identifiers of the citing acts.
+        """
+        node = self.node_ids.get(celex)
+        if node is None:
+            return []
+        indptr, indices = self._reverse_csr()
+        return [self.nodes[i] for i in self._neighbours(node, indptr, indices)]
+
+    def _reverse_csr(self):
+        # The transposed adjacency arrays are built lazily, on the first reverse lookup
+        if self._reverse is None:
+            counts = [0] * (len(self.nodes) + 1)
+            for target in self.indices:
+                counts[target + 1] += 1
+            for i in range(len(self.nodes)):
+                counts[i + 1] += counts[i]
+            indptr = array('I', counts)
+            indices = array('I', bytes(4 * len(self.indices)))
+            position = list(counts[:-1])
+            for source in range(len(self.nodes)):
+                for target in self._neighbours(source, self.indptr, self.indices):
+                    indices[position[target]] = source
+                    position[target] += 1
+            self._reverse = (indptr, indices)
+        return self._reverse
+
+    def reachable(self, celex, max_depth=None):
+        """
+        Returns the acts reachable from an act by following citations (breadth-first).
+
+        Parameters
+        ----------
+        celex : str
+            CELEX identifier of the starting act.
+        max_depth : int, optional
+            Maximum number of citation hops. Unlimited if None.
+
+        Returns
+        -------
+        dict
+            Dictionary mapping each reachable CELEX identifier to its distance from the starting act.
+        """
+        start = self.node_ids.get(celex)
+        if start is None:
+            return {}
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if max_depth is not None and distances[node] >= max_depth:
+                continue
+            for target in self._neighbours(node, self.indptr, self.indices):
+                if target not in distances:
+                    distances[target] = distances[node] + 1
+                    queue.append(target)
+        del distances[start]
+        return {self.nodes[node]: distance for node, distance in distances.items()}
+
+    def out_degree(self, celex):
+        """
+        Returns the number of acts cited by an act.
+        """
+        node = self.node_ids.get(celex)
+        return 0 if node is None else self.indptr[node + 1] - self.indptr[node]
+
+    def in_degree(self, celex):
+        """
+        Returns the number of acts citing an act.
+        """
+        node = self.node_ids.get(celex)
+        if node is None:
+            return 0
+        indptr, _ = self._reverse_csr()
+        return indptr[node + 1] - indptr[node]
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class CitationGraphBuilder:
+    """
+    Collects the references of the documents of a corpus and builds their citation graph.
+    """
+
+    def __init__(self):
+        self.edges = {}
+
+    def add_text(self, celex, text):
+        """
+        Adds the references found in a text to the outgoing edges of a document.
+
+        Parameters
+        ----------
+        celex : str
+            CELEX identifier of the citing document.
+        text : str
+            Text of the document or of one of its sections.
+        """
+        targets = self.edges.setdefault(celex, set())
+        targets.update(reference['celex'] for reference in extract_references(text))
+
+    def add_parser(self, celex, parser):
+        """
+        Adds the references found in the citations, recitals and articles extracted by a parser.
+
+        Parameters
+        ----------
+        celex : str
+            CELEX identifier of the parsed document.
+        parser : object
+            A parser on which `parse` has been called.
+        """
+        self.edges.setdefault(celex, set())
+        for text in iter_parser_texts(parser):
+            self.add_text(celex, text)
+
+    def build(self):
+        """
+        Builds the citation graph.
+
+        Returns
+        -------
+        CitationGraph
+            The citation graph of the collected documents.
+        """
+        return CitationGraph.from_edges(self.edges)
@@ -0,0 +1,146 @@
+"""
+Sentence segmentation of parsed provisions with spaCy.
+
+Provision texts from any parser are streamed through `nlp.pipe` in large batches,
+optionally over several processes, and split into sentence records keyed by the
+eId of their provision and their character offsets within it.
+"""
+
+import logging
+import spacy
+
+from .parser import iter_provisions
+
+# Pipeline components that play no role in sentence boundary detection
+UNUSED_COMPONENTS = ['tagger', 'morphologizer', 'attribute_ruler', 'lemmatizer', 'ner', 'entity_ruler', 'textcat']
+
+# Loaded pipelines, shared by all the segmenters of the process
+_PIPELINES = {}
+
+
+class SentenceSegmenter:
+    """
+    Splits the provisions extracted by the parsers into sentences.
+
+    Attributes
+    ----------
+    model : str
+        Name or path of the spaCy pipeline to load.
+    language : str
+        Language code of the rule-based fallback pipeline.
+    batch_size : int
+        Number of provisions sent to spaCy in each batch.
+    n_process : int
+        Number of processes used by `nlp.pipe`. Each worker receives the pipeline once.
+    fallback : bool
+        If True, a lightweight rule-based sentencizer is used when the model cannot be loaded.
+    """
+
+    def __init__(self, model='en_core_web_sm', language='en', batch_size=1000, n_process=1, fallback=True, exclude=None):
+        """
+        Initializes the segmenter. The pipeline is loaded on first use.
+
+        Parameters
+        ----------
+        model : str, optional
+            Name or path of the spaCy pipeline to load. If None, the rule-based sentencizer is used.
+        language : str, optional
+            Language code of the rule-based fallback pipeline.
+        batch_size : int, optional
+            Number of provisions sent to spaCy in each batch.
+        n_process : int, optional
+            Number of processes used by `nlp.pipe`.
+        fallback : bool, optional
+            Whether to fall back to the rule-based sentencizer when the model cannot be loaded.
+        exclude : list, optional
+            Pipeline components not to load. Defaults to the components unused for sentence segmentation.
+        """
+        self.model = model
+        self.language = language
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.fallback = fallback
+        self.exclude = exclude if exclude is not None else UNUSED_COMPONENTS
+        self._nlp = None
+
+    @property
+    def nlp(self):
+        """
+        The spaCy pipeline, loaded once per process.
+        """
+        if self._nlp is None:
+            key = (self.model, self.language, tuple(self.exclude), self.fallback)
+            if key not in _PIPELINES:
+                _PIPELINES[key] = self._load()
+            self._nlp = _PIPELINES[key]
+        return self._nlp
+
+    def _load(self):
+        if self.model is not None:
+            try:
+                nlp = spacy.load(self.model, exclude=self.exclude)
+                # The statistical sentence recognizer is much faster than the dependency parser
+                if 'senter' in nlp.disabled and 'parser' in nlp.pipe_names:
+                    nlp.enable_pipe('senter')
+                    nlp.disable_pipe('parser')
+                return nlp
+            except OSError as e:
+                if not self.fallback:
+                    raise
+                logging.warning(f"Could not load spaCy model {self.model}, using the rule-based sentencizer: {e}")
+        nlp = spacy.blank(self.language)
+        nlp.add_pipe('sentencizer')
+        return nlp
+
+    def segment(self, provisions):
+        """
+        Splits provisions into sentences.
+
+        Parameters
+        ----------
+        provisions : iterable of dict
+            Provisions with 'eId' and 'text' keys, and optionally 'article_eId',
+            as produced by `tulit.parsers.parser.iter_provisions`.
+
+        Yields
+        ------
+        dict
+            Sentence records with the keys:
+            - 'article_eId': Identifier of the article, if known
+            - 'eId': Identifier of the provision
+            - 'sentence': Position of the sentence within the provision, starting from 0
+            - 'start': Start character offset of the sentence within the provision text
+            - 'end': End character offset of the sentence within the provision text
+            - 'text': Text of the sentence
+        """
+        tuples = (
+            (provision.get('text') or '', (provision.get('article_eId'), provision.get('eId')))
+            for provision in provisions
+        )
+        docs = self.nlp.pipe(tuples, as_tuples=True, batch_size=self.batch_size, n_process=self.n_process)
+        for doc, (article_eId, eId) in docs:
+            for index, sentence in enumerate(doc.sents):
+                yield {
+                    'article_eId': article_eId,
+                    'eId': eId,
+                    'sentence': index,
+                    'start': sentence.start_char,
+                    'end': sentence.end_char,
+                    'text': sentence.text
+                }
+
+    def segment_articles(self, articles):
+        """
+        Splits the provisions of the articles extracted by a parser into sentences.
+
+        Parameters
+        ----------
+        articles : list
+            List of article dictionaries as produced by the parsers.
+
+        Returns
+        -------
+        list
+            List of sentence records, as yielded by `segment`.
+        """
+        return list(self.segment(iter_provisions(articles)))
@@ -0,0 +1,197 @@
+"""
+Pipelined download and parsing of legal documents.
+
+Documents are downloaded by a pool of threads (I/O-bound) and parsed by a pool of
+processes (CPU-bound) at the same time. The two stages are connected by a bounded
+queue, and the number of documents being parsed is bounded as well, so a slow
+stage makes the other one wait instead of accumulating documents in memory.
+
+Usage
+-----
+>>> downloader = CellarDownloader(download_dir='./data/formex', log_dir='./logs')
+>>> pipeline = Pipeline(downloader.download_item, format='fmx4', download_workers=8)
+>>> for record in pipeline.run(downloader.get_cellar_ids_from_json_results(results, 'fmx4')):
+...     print(record['item'], len(record['result']['articles']))
+"""
+
+import os
+import logging
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from tulit.parallel import PARSERS, find_document_files
+
+# Attributes of the parsers holding plain data, which can be sent back from the worker processes
+PARSED_ATTRIBUTES = ['metadata', 'meta', 'preface', 'formula', 'citations', 'recitals', 'chapters', 'articles', 'conclusions']
+
+_DONE = object()
+
+
+def parse_file(format, path):
+    """
+    Parses the main file of a downloaded document.
+
+    Parameters
+    ----------
+    format : str
+        The format of the document: 'fmx4', 'xhtml' or 'akn'.
+    path : str
+        Path returned by a downloader, either a file or a folder.
+
+    Returns
+    -------
+    dict or None
+        Dictionary mapping the names of the parsed sections (preface, citations,
+        recitals, chapters, articles, conclusions, ...) to their content, or None
+        if no file was found.
+    """
+    files = find_document_files(path)
+    if not files:
+        return None
+    parser = PARSERS[format]()
+    parser.parse(files[0])
+    parsed = {}
+    for attribute in PARSED_ATTRIBUTES:
+        value = getattr(parser, attribute, None)
+        # Elements of the XML or HTML tree are not sent back to the main process
+        if value is None or isinstance(value, (str, int, float, list, dict)):
+            parsed[attribute] = value
+    return parsed
+
+
+class Pipeline:
+    """
+    Overlaps the download and the parsing of documents, with backpressure.
+
+    Attributes
+    ----------
+    download : callable
+        Function downloading one item and returning its path, a list of paths, or None.
+    format : str
+        The format of the downloaded documents: 'fmx4', 'xhtml' or 'akn'.
+    download_workers : int
+        Number of threads downloading documents.
+    parse_workers : int or None
+        Number of processes parsing documents. Defaults to the number of processors.
+    queue_size : int
+        Maximum number of downloaded documents waiting to be parsed.
+    """
+
+    def __init__(self, download, format, download_workers=4, parse_workers=None, queue_size=16):
+        """
+        Initializes the pipeline.
+
+        Parameters
+        ----------
+        download : callable
+            Function downloading one item, such as `CellarDownloader.download_item`.
+        format : str
+            The format of the downloaded documents: 'fmx4', 'xhtml' or 'akn'.
+        download_workers : int, optional
+            Number of threads downloading documents.
+        parse_workers : int, optional
+            Number of processes parsing documents. Defaults to the number of processors.
+        queue_size : int, optional
+            Maximum number of downloaded documents waiting to be parsed.
+        """
+        self.download = download
+        self.format = format
+        self.download_workers = download_workers
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+
+    def _put(self, downloaded, record, stop):
+        # Blocks while the queue is full, which slows down the downloads to the pace of the parsing
+        while not stop.is_set():
+            try:
+                downloaded.put(record, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _download_worker(self, items, items_lock, downloaded, stop):
+        while not stop.is_set():
+            with items_lock:
+                item = next(items, _DONE)
+            if item is _DONE:
+                break
+            try:
+                paths = self.download(item)
+            except Exception as e:
+                logging.error(f"Error downloading {item}: {e}")
+                self._put(downloaded, {'item': item, 'path': None, 'error': str(e)}, stop)
+                continue
+            if paths is None or isinstance(paths, str):
+                paths = [paths]
+            for path in paths:
+                self._put(downloaded, {'item': item, 'path': path, 'error': None}, stop)
+        self._put(downloaded, _DONE, stop)
+
+    def run(self, items):
+        """
+        Downloads and parses items.
+
+        Parameters
+        ----------
+        items : iterable
+            The items passed to the download function, e.g. CELLAR ids. The iterable is consumed lazily.
+
+        Yields
+        ------
+        dict
+            Records with the keys 'item', 'path', 'result' (as returned by `parse_file`)
+            and 'error' (a message, or None on success), in order of completion.
+        """
+        downloaded = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        items = iter(items)
+        items_lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._download_worker, args=(items, items_lock, downloaded, stop), daemon=True)
+            for _ in range(self.download_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        parse_workers = self.parse_workers or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=parse_workers)
+        # Keep every process busy, with one more document each ready to start
+        max_in_flight = 2 * parse_workers
+        in_flight = {}
+        remaining_workers = len(threads)
+        try:
+            while remaining_workers or in_flight:
+                # Hand downloaded documents to the parsers while there is room
+                while remaining_workers and len(in_flight) < max_in_flight:
+                    try:
+                        record = downloaded.get(timeout=0.05 if in_flight else None)
+                    except queue.Empty:
+                        break
+                    if record is _DONE:
+                        remaining_workers -= 1
+                    elif record['path'] is None:
+                        record['result'] = None
+                        if record['error'] is None:
+                            record['error'] = f"{record['item']} could not be downloaded"
+                        yield record
+                    else:
+                        in_flight[executor.submit(parse_file, self.format, record['path'])] = record
+
+                if not in_flight:
+                    continue
+                done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = in_flight.pop(future)
+                    try:
+                        record['result'] = future.result()
+                    except Exception as e:
+                        logging.error(f"Error parsing {record['path']}: {e}")
+                        record['result'] = None
+                        record['error'] = str(e)
+                    yield record
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            for thread in threads:
+                thread.join()
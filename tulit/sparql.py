@@ -8,9 +8,627 @@ CELLAR IDs from a CSV file.
 """
 
 from SPARQLWrapper import SPARQLWrapper, JSON, POST
+import os
+import re
+import sys
 import json
+import codecs
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def send_sparql_query(sparql_query_filepath, celex=None):
+import pandas as pd
+
+# SPARQL endpoint of the Publications Office of the EU
+ENDPOINT = "http://publications.europa.eu/webapi/rdf/sparql"
+
+# String literals and IRIs are kept as they are, comments and runs of whitespace are collapsed
+_QUERY_TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|<[^<>\s]*>|(?:\s|#[^\n]*)+')
+
+
+def normalize_query(sparql_query):
+    """
+    Normalizes the text of a SPARQL query, so that equivalent queries share a cache entry.
+
+    Comments are removed and runs of whitespace are replaced by a single space, except
+    inside string literals and IRIs.
+
+    Parameters
+    ----------
+    sparql_query : str
+        The SPARQL query.
+
+    Returns
+    -------
+    str
+        The normalized query.
+    """
+    def replace(match):
+        token = match.group(0)
+        if token[0] in '"\'<':
+            return token
+        return ' '
+    return _QUERY_TOKENS.sub(replace, sparql_query).strip()
+
+
+class SparqlCache:
+    """
+    Persistent cache of SPARQL results, with expiry and size-bounded eviction.
+
+    The entries are keyed by the endpoint, the normalized query and its bindings, and
+    stored in a SQLite database. When the cache exceeds its maximum size, the least
+    recently used entries are evicted.
+
+    Attributes
+    ----------
+    path : str
+        Path of the SQLite database.
+    ttl : float or None
+        Number of seconds after which an entry expires. Entries never expire if None.
+    max_size : int or None
+        Maximum total size in bytes of the cached results. Unbounded if None.
+    """
+
+    def __init__(self, cache_dir, ttl=86400, max_size=256 * 1024 * 1024):
+        """
+        Opens or creates the cache.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Directory of the cache. It is created if it does not exist.
+        ttl : float, optional
+            Number of seconds after which an entry expires. Defaults to one day.
+        max_size : int, optional
+            Maximum total size in bytes of the cached results. Defaults to 256 MB.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'sparql.sqlite')
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, query TEXT NOT NULL, '
+                'created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL, results TEXT NOT NULL)'
+            )
+
+    @staticmethod
+    def key(sparql_query, endpoint=ENDPOINT, bindings=None):
+        """
+        Returns the key of a query in the cache.
+
+        Parameters
+        ----------
+        sparql_query : str
+            The SPARQL query, or a template whose placeholders are filled with the bindings.
+        endpoint : str, optional
+            URL of the SPARQL endpoint.
+        bindings : dict, optional
+            Values of the placeholders of the template.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        text = json.dumps([endpoint, normalize_query(sparql_query), sorted((bindings or {}).items())])
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, sparql_query, endpoint=ENDPOINT, bindings=None):
+        """
+        Returns the cached results of a query.
+
+        Returns
+        -------
+        dict or None
+            The results, or None if the query is not cached or its entry expired.
+        """
+        key = self.key(sparql_query, endpoint, bindings)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute('SELECT created, results FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[0] > self.ttl:
+                self._connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            self._connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+        return json.loads(row[1])
+
+    def set(self, sparql_query, results, endpoint=ENDPOINT, bindings=None):
+        """
+        Stores the results of a query, evicting the least recently used entries if the cache is full.
+
+        Parameters
+        ----------
+        sparql_query : str
+            The SPARQL query, or a template.
+        results : dict
+            The results of the query.
+        endpoint : str, optional
+            URL of the SPARQL endpoint.
+        bindings : dict, optional
+            Values of the placeholders of the template.
+        """
+        key = self.key(sparql_query, endpoint, bindings)
+        text = json.dumps(results)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO results (key, endpoint, query, created, accessed, size, results) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, endpoint, normalize_query(sparql_query), now, now, len(text), text)
+            )
+            if self.max_size is not None:
+                self._evict()
+
+    def _evict(self):
+        (total,) = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()
+        if total <= self.max_size:
+            return
+        for key, size in self._connection.execute('SELECT key, size FROM results ORDER BY accessed').fetchall():
+            self._connection.execute('DELETE FROM results WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def clear(self):
+        """
+        Removes all the entries.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM results')
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+CELEX_URI = "http://publications.europa.eu/resource/celex/"
+
+# Template of the batched lookup of the manifestations of many CELEX numbers
+MANIFESTATIONS_QUERY = """PREFIX cdm: <http://publications.europa.eu/ontology/cdm#>
+PREFIX purl: <http://purl.org/dc/elements/1.1/>
+PREFIX owl: <http://www.w3.org/2002/07/owl#>
+
+SELECT DISTINCT ?celex ?cellarURIs ?manif ?format ?expr ?langCode
+WHERE {{
+    VALUES ?celex {{ {values} }}
+    ?work owl:sameAs ?celex .
+    ?expr cdm:expression_belongs_to_work ?work ;
+           cdm:expression_uses_language ?lang .
+    ?lang purl:identifier ?langCode .
+    ?manif cdm:manifestation_manifests_expression ?expr;
+           cdm:manifestation_type ?format.
+    ?cellarURIs cdm:item_belongs_to_manifestation ?manif.
+    {filters}
+}}
+ORDER BY ?celex ?cellarURIs"""
+
+_CELEX_PATTERN = re.compile(r'^[0-9A-Za-z()_.\-]+$')
+
+
+def _in_filter(variable, values):
+    literals = ', '.join(json.dumps(str(value)) for value in values)
+    return f"FILTER(str(?{variable}) IN ({literals}))"
+
+
+def build_manifestations_query(celex_numbers, formats=None, languages=None):
+    """
+    Builds the query looking up the manifestations of a batch of CELEX numbers.
+
+    Parameters
+    ----------
+    celex_numbers : list of str
+        The CELEX numbers, packed in a VALUES block.
+    formats : list of str, optional
+        Manifestation types to keep, e.g. ['fmx4', 'xhtml']. All types are kept if None.
+    languages : list of str, optional
+        Language codes to keep, e.g. ['ENG', 'FRA']. All languages are kept if None.
+
+    Returns
+    -------
+    str
+        The SPARQL query.
+
+    Raises
+    ------
+    ValueError
+        If a CELEX number contains characters that cannot appear in a CELEX number.
+    """
+    for celex in celex_numbers:
+        if not _CELEX_PATTERN.match(celex):
+            raise ValueError(f"Invalid CELEX number: {celex!r}")
+    filters = []
+    if formats:
+        filters.append(_in_filter('format', formats))
+    if languages:
+        filters.append(_in_filter('langCode', languages))
+    return MANIFESTATIONS_QUERY.format(
+        values=' '.join(f"<{CELEX_URI}{celex}>" for celex in celex_numbers),
+        filters='\n    '.join(filters)
+    )
+
+
+def get_manifestations(celex_numbers, formats=('fmx4',), languages=('ENG',), batch_size=500, max_workers=4, endpoint=ENDPOINT, cache=None):
+    """
+    Looks up the manifestations of many CELEX numbers, a batch of numbers per query.
+
+    Parameters
+    ----------
+    celex_numbers : list of str
+        The CELEX numbers. Duplicates are looked up once.
+    formats : list of str, optional
+        Manifestation types to keep, filtered by the endpoint. All types are kept if None.
+    languages : list of str, optional
+        Language codes to keep, filtered by the endpoint. All languages are kept if None.
+    batch_size : int, optional
+        Number of CELEX numbers per query.
+    max_workers : int, optional
+        Number of queries sent concurrently.
+    endpoint : str, optional
+        URL of the SPARQL endpoint.
+    cache : SparqlCache, optional
+        Cache of the results of each batch.
+
+    Returns
+    -------
+    dict
+        CELEX numbers mapped to the list of their manifestations, in the order of the CELEX
+        numbers. Each manifestation is a dictionary with the keys 'manif', 'expr', 'format',
+        'language' and 'items' (the cellar URIs of its items). Numbers without any
+        manifestation map to an empty list.
+    """
+    celex_numbers = list(dict.fromkeys(celex_numbers))
+    batches = [celex_numbers[i:i + batch_size] for i in range(0, len(celex_numbers), batch_size)]
+
+    def lookup(batch):
+        return get_results_table(build_manifestations_query(batch, formats, languages), endpoint=endpoint, cache=cache)
+
+    if max_workers is None or max_workers <= 1 or len(batches) <= 1:
+        batch_results = [lookup(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            batch_results = list(executor.map(lookup, batches))
+
+    manifestations = {celex: {} for celex in celex_numbers}
+    for results in batch_results:
+        for binding in results['results']['bindings']:
+            celex = binding['celex']['value'][len(CELEX_URI):]
+            manif = binding['manif']['value']
+            entry = manifestations.setdefault(celex, {}).setdefault(manif, {
+                'manif': manif,
+                'expr': binding['expr']['value'],
+                'format': binding['format']['value'],
+                'language': binding['langCode']['value'],
+                'items': []
+            })
+            entry['items'].append(binding['cellarURIs']['value'])
+    return {celex: list(entries.values()) for celex, entries in manifestations.items()}
+
+
+# Prologue of a query (PREFIX and BASE declarations), kept outside the paginated subquery
+_PROLOGUE = re.compile(r'^\s*(?:(?:PREFIX\s+[^\s:]*:\s*<[^>]*>|BASE\s*<[^>]*>)\s*)*', re.IGNORECASE)
+# Trailing LIMIT and OFFSET clauses, in either order
+_SLICE = re.compile(r'(?:\s+(?:LIMIT|OFFSET)\s+\d+)+\s*$', re.IGNORECASE)
+
+
+def paginate_query(sparql_query, limit, offset=0, order_by=None):
+    """
+    Returns the query selecting one page of the results of another query.
+
+    The query is wrapped in a subquery, so that the endpoint sorts the results once and
+    slices them, instead of sorting at most a fixed number of rows as Virtuoso does for
+    ORDER BY with a large OFFSET.
+
+    Parameters
+    ----------
+    sparql_query : str
+        The SELECT query, without LIMIT and OFFSET clauses.
+    limit : int
+        Number of results of the page.
+    offset : int, optional
+        Number of results before the page.
+    order_by : str, optional
+        Condition appended as an ORDER BY clause, e.g. '?cellarURIs', if the query has none.
+
+    Returns
+    -------
+    str
+        The query of the page.
+
+    Raises
+    ------
+    ValueError
+        If the query has no ORDER BY clause and order_by is not given, as pages of unordered results may overlap.
+    """
+    prologue = _PROLOGUE.match(sparql_query).group(0)
+    body = sparql_query[len(prologue):].strip()
+    if order_by is not None:
+        body = f"{body}\nORDER BY {order_by}"
+    elif not re.search(r'\bORDER\s+BY\b', normalize_query(body), re.IGNORECASE):
+        raise ValueError("Paginated queries need an ORDER BY clause for a stable order of the results")
+    return f"{prologue}SELECT * WHERE {{\n{{\n{body}\n}}\n}}\nOFFSET {offset}\nLIMIT {limit}"
+
+
+def iter_results(sparql_query, page_size=10000, endpoint=ENDPOINT, order_by=None, prefetch=True, cache=None):
+    """
+    Iterates over the results of a SPARQL query, one page at a time.
+
+    Pages are selected with LIMIT and OFFSET over stably ordered results. While the
+    results of a page are consumed, the next page is fetched in the background, and
+    at most two pages are held in memory, whatever the number of results.
+
+    Parameters
+    ----------
+    sparql_query : str
+        The SELECT query. Trailing LIMIT and OFFSET clauses are kept as the maximum number
+        of results and the number of results skipped.
+    page_size : int, optional
+        Number of results per request.
+    endpoint : str, optional
+        URL of the SPARQL endpoint.
+    order_by : str, optional
+        Condition ordering the results, if the query has no ORDER BY clause.
+    prefetch : bool, optional
+        Whether the next page is fetched while the current one is consumed.
+    cache : SparqlCache, optional
+        Cache of the results of each page.
+
+    Yields
+    ------
+    dict
+        The bindings of each result, as in the 'results' of the JSON results.
+
+    Raises
+    ------
+    ValueError
+        If the results have no stable order, see `paginate_query`.
+    """
+    limit, offset = None, 0
+    clauses = _SLICE.search(sparql_query)
+    if clauses:
+        for keyword, value in re.findall(r'(LIMIT|OFFSET)\s+(\d+)', clauses.group(0), re.IGNORECASE):
+            if keyword.upper() == 'LIMIT':
+                limit = int(value)
+            else:
+                offset = int(value)
+        sparql_query = sparql_query[:clauses.start()]
+
+    def fetch(start):
+        size = page_size if limit is None else min(page_size, offset + limit - start)
+        if size <= 0:
+            return [], 0
+        query = paginate_query(sparql_query, size, start, order_by)
+        return get_results_table(query, endpoint=endpoint, cache=cache)['results']['bindings'], size
+
+    # Check the order before anything is sent
+    paginate_query(sparql_query, page_size, offset, order_by)
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        start = offset
+        page, size = fetch(start)
+        while page:
+            start += size
+            following = None
+            if len(page) == size:
+                following = executor.submit(fetch, start) if executor is not None else None
+            yield from page
+            if len(page) < size:
+                break
+            page, size = following.result() if following is not None else fetch(start)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+# Datatypes of the literals decoded as numbers, dates and booleans
+NUMERIC_TYPES = {f"{XSD}{name}" for name in (
+    'integer', 'int', 'long', 'short', 'byte', 'nonNegativeInteger', 'positiveInteger',
+    'unsignedInt', 'unsignedLong', 'decimal', 'double', 'float'
+)}
+DATE_TYPES = {f"{XSD}date", f"{XSD}dateTime"}
+BOOLEAN_TYPE = f"{XSD}boolean"
+
+_BINDINGS = re.compile(r'"bindings"\s*:\s*\[')
+_VARS = re.compile(r'"vars"\s*:\s*(\[[^\]]*\])')
+
+
+def iter_bindings(stream, head=None, chunk_size=64 * 1024):
+    """
+    Decodes the bindings of SPARQL JSON results incrementally, from a binary stream.
+
+    Only the binding being decoded and a chunk of the stream are held in memory,
+    instead of the whole document.
+
+    Parameters
+    ----------
+    stream : file-like
+        Binary stream of the JSON results, e.g. an HTTP response or an open file.
+    head : dict, optional
+        Dictionary where the variables of the results are stored under the key 'vars'.
+    chunk_size : int, optional
+        Size in bytes of the chunks read from the stream.
+
+    Yields
+    ------
+    dict
+        The bindings of each result.
+
+    Raises
+    ------
+    ValueError
+        If the stream ends in the middle of the results.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    eof = False
+
+    def fill(buffer):
+        chunk = stream.read(chunk_size)
+        return buffer + text_decoder.decode(chunk, final=not chunk), not chunk
+
+    match = _BINDINGS.search(buffer)
+    while match is None:
+        if eof:
+            # Results without bindings, e.g. of an ASK query
+            return
+        buffer, eof = fill(buffer)
+        match = _BINDINGS.search(buffer)
+    if head is not None:
+        variables = _VARS.search(buffer, 0, match.start())
+        head['vars'] = json.loads(variables.group(1)) if variables else []
+
+    buffer = buffer[match.end():]
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            if position == len(buffer):
+                raise json.JSONDecodeError('Incomplete binding', buffer, position)
+            binding, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError('The SPARQL results end in the middle of the bindings')
+            buffer, eof = fill(buffer[position:])
+            position = 0
+            continue
+        yield binding
+
+
+def decode_columns(stream, chunk_size=64 * 1024):
+    """
+    Decodes SPARQL JSON results into columns, incrementally.
+
+    The value of each variable is stored in a list per variable. URIs are interned, so
+    that the many repetitions of the same URI share one string.
+
+    Parameters
+    ----------
+    stream : file-like or dict
+        Binary stream of the JSON results, or the results already decoded, e.g. by `get_results_table`.
+    chunk_size : int, optional
+        Size in bytes of the chunks read from the stream.
+
+    Returns
+    -------
+    tuple
+        The columns, as a dictionary mapping each variable to the list of its values (None
+        where unbound), and the kinds of the columns, as a dictionary mapping each variable
+        to the set of the types ('uri', 'literal', 'bnode') or datatypes of its values.
+    """
+    head = {}
+    if isinstance(stream, dict):
+        head['vars'] = stream.get('head', {}).get('vars', [])
+        bindings = stream.get('results', {}).get('bindings', [])
+    else:
+        bindings = iter_bindings(stream, head, chunk_size)
+
+    columns = {}
+    kinds = {}
+    rows = 0
+    for binding in bindings:
+        for variable, term in binding.items():
+            column = columns.get(variable)
+            if column is None:
+                column = columns[variable] = [None] * rows
+                kinds[variable] = set()
+            value = term['value']
+            kind = term.get('datatype') or term['type']
+            if kind == 'uri':
+                value = sys.intern(value)
+            kinds[variable].add(kind)
+            column.append(value)
+        rows += 1
+        for column in columns.values():
+            if len(column) < rows:
+                column.append(None)
+
+    # Variables of the header never bound in the results are empty columns
+    variables = head.get('vars', []) + [variable for variable in columns if variable not in head.get('vars', [])]
+    return {variable: columns.get(variable, [None] * rows) for variable in variables}, {variable: kinds.get(variable, set()) for variable in variables}
+
+
+def columns_to_frame(columns, kinds):
+    """
+    Builds a DataFrame with typed columns from decoded columns.
+
+    URIs, and literals repeated on average at least twice, are stored as categories;
+    numbers, dates and booleans are converted according to their datatype.
+
+    Parameters
+    ----------
+    columns : dict
+        Variables mapped to the lists of their values, as returned by `decode_columns`.
+    kinds : dict
+        Variables mapped to the types of their values, as returned by `decode_columns`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        One row per result, one column per variable.
+    """
+    frame = {}
+    for variable, values in columns.items():
+        kind = kinds[variable]
+        if kind and kind <= NUMERIC_TYPES:
+            frame[variable] = pd.to_numeric(pd.Series(values, dtype=object))
+        elif kind and kind <= DATE_TYPES:
+            frame[variable] = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce', format='ISO8601')
+        elif kind == {BOOLEAN_TYPE}:
+            frame[variable] = pd.Series(values, dtype=object).map({'true': True, '1': True, 'false': False, '0': False}).astype('boolean')
+        elif kind == {'uri'} or len(set(values)) * 2 <= len(values):
+            frame[variable] = pd.Series(values, dtype='category')
+        else:
+            frame[variable] = pd.Series(values, dtype=object)
+    return pd.DataFrame(frame)
+
+
+def get_results_frame(sparql_query, endpoint=ENDPOINT, chunk_size=64 * 1024):
+    """
+    Sends a SPARQL query and decodes its results into a DataFrame while they are received.
+
+    Unlike `get_results_table`, the JSON document is never held in memory as a whole,
+    nor as nested dictionaries.
+
+    Parameters
+    ----------
+    sparql_query : str
+        The SPARQL query as a string.
+    endpoint : str, optional
+        URL of the SPARQL endpoint.
+    chunk_size : int, optional
+        Size in bytes of the chunks read from the response.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The results, see `columns_to_frame`.
+    """
+    sparql = SPARQLWrapper(endpoint)
+    sparql.setQuery(sparql_query)
+    sparql.setMethod(POST)
+    sparql.setReturnFormat(JSON)
+    response = sparql.query().response
+    try:
+        return columns_to_frame(*decode_columns(response, chunk_size))
+    finally:
+        response.close()
+
+
+def send_sparql_query(sparql_query_filepath, celex=None, endpoint=ENDPOINT, cache=None, refresh=False):
     """
     Sends a SPARQL query to the EU SPARQL endpoint and stores the results in a JSON file.
 
@@ -18,8 +636,14 @@ def send_sparql_query(sparql_query_filepath, celex=None):
     ----------
     sparql_query_filepath : str
         The path to the file containing the SPARQL query.
-    response_file : str
-        The path to the file where the results will be stored.
+    celex : str, optional
+        CELEX number replacing the {CELEX} placeholder of the query.
+    endpoint : str, optional
+        URL of the SPARQL endpoint.
+    cache : SparqlCache, optional
+        Cache of the results, keyed by the query template and the CELEX number.
+    refresh : bool, optional
+        Whether to send the query even if its results are cached, and update the cache.
 
     Returns
     -------
@@ -44,12 +668,21 @@ def send_sparql_query(sparql_query_filepath, celex=None):
         with open(sparql_query_filepath, 'r') as file:
             sparql_query = file.read()
         
+        bindings = {'CELEX': celex} if celex is not None else None
+        if cache is not None and not refresh:
+            results = cache.get(sparql_query, endpoint, bindings)
+            if results is not None:
+                return results
+
+        template = sparql_query
         if celex is not None:
             # Option 1: If you want to use format()
             sparql_query = sparql_query.replace("{CELEX}", celex) 
 
-            # send query to cellar endpoint and retrieve results
-            results = get_results_table(sparql_query)
+        # send query to cellar endpoint and retrieve results
+        results = get_results_table(sparql_query, endpoint=endpoint)
+        if cache is not None:
+            cache.set(template, results, endpoint, bindings)
 
         return results
     
@@ -60,7 +693,7 @@ def send_sparql_query(sparql_query_filepath, celex=None):
         print(f"An error occurred: {e}")
         raise e
 
-def get_results_table(sparql_query):
+def get_results_table(sparql_query, endpoint=ENDPOINT, cache=None, refresh=False):
     """
     Sends a SPARQL query to the EU SPARQL endpoint and returns the results as a JSON object.
 
@@ -68,6 +701,12 @@ def get_results_table(sparql_query):
     ----------
     sparql_query : str
         The SPARQL query as a string.
+    endpoint : str, optional
+        URL of the SPARQL endpoint. Defaults to the endpoint of the Publications Office.
+    cache : SparqlCache, optional
+        Cache of the results. The query is only sent if its results are not cached.
+    refresh : bool, optional
+        Whether to send the query even if its results are cached, and update the cache.
 
     Returns
     -------
@@ -86,8 +725,10 @@ def get_results_table(sparql_query):
 
     """
 
-    # Define the EU SPARQL endpoint URL
-    endpoint = "http://publications.europa.eu/webapi/rdf/sparql"
+    if cache is not None and not refresh:
+        results = cache.get(sparql_query, endpoint)
+        if results is not None:
+            return results
 
     try:
         # Create a SPARQLWrapper object with the endpoint URL
@@ -105,6 +746,8 @@ def get_results_table(sparql_query):
         # Send the query and retrieve the results
         results = sparql.query().convert()
 
+        if cache is not None:
+            cache.set(sparql_query, results, endpoint)
         return results
     except Exception as e:
         print(f"An error occurred: {e}")